@@ -7,8 +7,23 @@ This creates an intrinsic "ethical halt" mechanism preventing runaway AGI
 by forcing convergence to the golden ratio mixed state.
 """
 
+import os
+import sys
+
 import numpy as np
 import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'simulations'))
+from continuation import continuation_sweep, parameter_grid  # noqa: E402
+from density_kernels import as_density_stack, purity, von_neumann_entropy  # noqa: E402
+from entanglement_metrics import local_metrics, single_qubit_rdms  # noqa: E402
+from instrumentation import stage  # noqa: E402
+from lindblad_engine import (ADAPTIVE_BACKENDS, driven_ethical_model, driven_ethical_rates,  # noqa: E402
+                             ethical_circuit_model, evolve, evolve_adaptive)
+from mpdo_lindblad import DEFAULT_MAX_BOND, chain_ethical_model, evolve_mpdo  # noqa: E402
+from symmetric_lindblad import symmetric_ethical_model  # noqa: E402
+from run_planner import ResourceBudgetError, check_budget  # noqa: E402
+
 try:
     import qutip as qt
 except ImportError:
@@ -44,7 +59,10 @@ def calculate_pqrg_parameters():
     
     return sigma, S_q, N_r
 
-def ethical_agi_circuit(n_qubits=2, show_plot=True, verbose=True):
+def ethical_agi_circuit(n_qubits=2, show_plot=True, verbose=True, backend='qutip',
+                        memory_budget=None, precision='double', damping=None,
+                        max_bond=DEFAULT_MAX_BOND, driven=False, grad_psi=1.0, adaptive=False,
+                        tol=0.01, window=1.0):
     """
     Implement PQRG Ethical AGI Circuit
     
@@ -52,10 +70,33 @@ def ethical_agi_circuit(n_qubits=2, show_plot=True, verbose=True):
     n_qubits: Number of qubits (2 or 4 recommended)
     show_plot: Display convergence plot
     verbose: Print detailed output
+    backend: 'qutip' (mesolve), a lindblad_engine backend or 'auto' (planner's choice);
+             'symmetric' never builds 2^n arrays and handles 30-50 qubits, but needs
+             near-uniform per-qubit rates (n >= 14) and reports the Renyi-2 entropy;
+             'mpdo' (mpdo_lindblad.py) handles 20-100 qubits with per-qubit damping at
+             bounded bond dimension, also with the Renyi-2 entropy. With these two the
+             entropy is only bracketed (Renyi-2 below, sum of single-qubit entropies
+             above), so the safety check can come out undetermined
+    memory_budget: Bytes the run may use (default run_planner.memory_budget())
+    precision: 'double', or 'single' (complex64) for engine backends; enough for the
+               1e-2 SUCCESS tolerance at half the memory
+    damping: Per-qubit multipliers of the damping rates (heterogeneous circuits)
+    max_bond: Bond dimension limit of the 'mpdo' backend
+    driven: Use the time-dependent psi-field rates sin(grad_psi pi i t / 2^n) of the
+            README instead of the frozen sin(pi i / 2^n) ('qutip' and the dense, sparse
+            and structured engine backends)
+    grad_psi: Field gradient of the drive
+    adaptive: Stop once purity and entropy stay within tol for a time window, with
+              outputs only where they change (lindblad_engine.evolve_adaptive; dense,
+              sparse, structured or 'auto')
+    tol, window: Tolerance band and settling window of the adaptive mode
     
     Returns:
     final_purity: System purity (should converge to φ^{-1})
-    ethical_safe: Boolean indicating if system is ethically bounded
+    ethical_safe: Boolean indicating if system is ethically bounded (False when undetermined)
+    
+    Raises:
+    ResourceBudgetError: The run would exceed the memory budget (checked before solving)
     """
     
     if verbose:
@@ -64,72 +105,168 @@ def ethical_agi_circuit(n_qubits=2, show_plot=True, verbose=True):
         print(f"{'='*50}\n")
     
     # Calculate PQRG parameters
-    sigma, S_q, N_r = calculate_pqrg_parameters()
-    
-    # Consciousness parameters
-    mu_c = 0.85     # Microtubule coherence
-    eta_Yb = 0.92   # Ytterbium efficiency  
-    PLV_j = 0.71    # Phase-locking value
-    
-    # System dimension
-    dim = 2**n_qubits
-    
-    # Calculate damping rates with ethical prior
-    damp_rate = []
-    for i in range(dim):
-        rate = N_r * np.sin(np.pi * i / dim) * np.exp(S_q / PHI) * mu_c * eta_Yb * PLV_j
-        damp_rate.append(rate)
-    
-    # Scale for convergence
-    damp_rate = np.array(damp_rate) * 10
-    
-    # Create Hamiltonian - represents potential for good/harm
-    H = qt.tensor([qt.sigmaz() for _ in range(n_qubits)])
-    
-    # Initial state - superposition of all possibilities
-    psi0 = qt.tensor([(qt.basis(2,0) + qt.basis(2,1)).unit() for _ in range(n_qubits)])
-    
-    # Collapse operators with ethical damping
-    c_ops = []
-    for i in range(dim):
-        if damp_rate[i] > 0:
-            op_list = []
-            for j in range(n_qubits):
-                if j == i % n_qubits:
-                    op_list.append(qt.destroy(2))
-                else:
-                    op_list.append(qt.qeye(2))
-            c_ops.append(np.sqrt(damp_rate[i]) * qt.tensor(op_list))
+    with stage('pqrg_parameters', 'setup'):
+        sigma, S_q, N_r = calculate_pqrg_parameters()
+    
+        # Consciousness parameters
+        mu_c = 0.85     # Microtubule coherence
+        eta_Yb = 0.92   # Ytterbium efficiency  
+        PLV_j = 0.71    # Phase-locking value
+    
+        # System dimension
+        dim = 2**n_qubits
+    
+        # Calculate damping rates with ethical prior (the symmetric and mpdo backends
+        # sum them per qubit in closed form instead)
+        if backend not in ('symmetric', 'mpdo'):
+            damp_rate = []
+            for i in range(dim):
+                rate = N_r * np.sin(np.pi * i / dim) * np.exp(S_q / PHI) * mu_c * eta_Yb * PLV_j
+                damp_rate.append(rate)
+    
+            # Scale for convergence
+            damp_rate = np.array(damp_rate) * 10
+            if damping is not None:
+                damp_rate = damp_rate * np.resize(np.broadcast_to(damping, (n_qubits,)), dim)
     
     # Time evolution
     tlist = np.linspace(0, 10, 100)
     
-    if verbose:
-        print("Running quantum evolution with ethical constraints...")
-    
-    # Solve master equation
-    result = qt.mesolve(H, psi0, tlist, c_ops=c_ops)
-    
-    # Calculate purity evolution
-    purity_evolution = []
-    for state in result.states:
-        purity = (state * state).tr().real
-        purity_evolution.append(purity)
-    
-    final_purity = purity_evolution[-1]
+    if backend == 'qutip' and precision != 'double':
+        raise ValueError("The qutip backend runs in double precision only")
+    if driven and backend in ('symmetric', 'mpdo', 'trajectory'):
+        raise ValueError(f"The '{backend}' backend has no time-dependent rates")
+    if adaptive and (driven or backend not in ADAPTIVE_BACKENDS + ('auto',)):
+        raise ValueError(f"Adaptive runs need static rates and one of {ADAPTIVE_BACKENDS} or 'auto'")
+    
+    # Refuse oversized runs before any operator is built
+    with stage('plan', 'setup', n_qubits=n_qubits):
+        if backend == 'symmetric':
+            model = symmetric_ethical_model(n_qubits, mu_c, eta_Yb, PLV_j, damping=damping)
+        elif backend == 'mpdo':
+            model = chain_ethical_model(n_qubits, mu_c, eta_Yb, PLV_j, damping=damping)
+            check_budget('mpdo', n_qubits, len(tlist), budget=memory_budget, max_bond=max_bond,
+                         t_span=tlist[-1] - tlist[0], precision=precision)
+        elif driven:
+            model, drive = driven_ethical_model(n_qubits, tlist[-1], grad_psi=grad_psi, mu_c=mu_c,
+                                                eta_Yb=eta_Yb, PLV_j=PLV_j, damping=damping)
+        else:
+            model = ethical_circuit_model(n_qubits, mu_c, eta_Yb, PLV_j, damping=damping)
+        if backend == 'qutip':
+            n_jumps = n_qubits if driven else int(np.count_nonzero(damp_rate > 0))
+            norm = model.scaled(drive.max_factors()).norm_bound() if driven else model.norm_bound()
+            check_budget('qutip', n_qubits, len(tlist), budget=memory_budget, n_jumps=n_jumps,
+                         t_span=tlist[-1] - tlist[0], norm=norm)
+    
+    # Set by the backends that only report the Renyi-2 entropy
+    renyi2 = False
+    if backend == 'qutip':
+        # Create Hamiltonian - represents potential for good/harm
+        with stage('operators', 'operators', n_qubits=n_qubits):
+            H = qt.tensor([qt.sigmaz() for _ in range(n_qubits)])
+    
+            # Initial state - superposition of all possibilities
+            psi0 = qt.tensor([(qt.basis(2,0) + qt.basis(2,1)).unit() for _ in range(n_qubits)])
+    
+            # Collapse operators with ethical damping
+            c_ops = []
+            if driven:
+                # Merged per-qubit rates sampled once; mesolve interpolates the arrays
+                grid = np.linspace(tlist[0], tlist[-1], 20 * len(tlist) + 1)
+                rates = driven_ethical_rates(n_qubits, grid, grad_psi, mu_c, eta_Yb, PLV_j,
+                                             damping=damping)
+                for q in range(n_qubits):
+                    op = qt.tensor([qt.destroy(2) if j == q else qt.qeye(2) for j in range(n_qubits)])
+                    c_ops.append(qt.QobjEvo([op, np.sqrt(rates[:, q])], tlist=grid))
+            else:
+                for i in range(dim):
+                    if damp_rate[i] > 0:
+                        op_list = []
+                        for j in range(n_qubits):
+                            if j == i % n_qubits:
+                                op_list.append(qt.destroy(2))
+                            else:
+                                op_list.append(qt.qeye(2))
+                        c_ops.append(np.sqrt(damp_rate[i]) * qt.tensor(op_list))
+    
+        if verbose:
+            print("Running quantum evolution with ethical constraints...")
+    
+        # Solve master equation
+        with stage('mesolve', 'solver', n_qubits=n_qubits, n_times=len(tlist)):
+            result = qt.mesolve(H, psi0, tlist, c_ops=c_ops)
+    
+        # Purity and entropy over the whole trajectory (batched kernels)
+        with stage('purity_entropy', 'observables'):
+            rho_t = as_density_stack(result.states)
+            purity_evolution = purity(rho_t)
+            entropy_evolution = von_neumann_entropy(rho_t)
+        final_local = rho_t[-1:]
+    elif backend == 'mpdo':
+        if verbose:
+            print(f"Running MPDO evolution of {n_qubits} qubits (max bond {max_bond})...")
+        with stage('evolve', 'solver', n_qubits=n_qubits, n_times=len(tlist)):
+            run = evolve_mpdo(model, tlist, max_bond=max_bond, precision=precision)
+        purity_evolution = run['purity']
+        entropy_evolution = run['renyi2_entropy']
+        renyi2 = True
+        final_local = run['single_qubit_rdms']
+        if verbose:
+            print(f"Bond dimension {run['bond_dimension'].max()}, largest truncation error per "
+                  f"output step {run['truncation_error'].max():.1e}")
+    elif adaptive:
+        if verbose:
+            print(f"Running adaptive evolution (band {tol:g} over {window:g} time units)...")
+        with stage('evolve', 'solver', n_qubits=n_qubits, n_times=len(tlist)):
+            run = evolve_adaptive(model, tlist[-1], backend=backend, tol=tol, window=window,
+                                  entropy=True, memory_budget=memory_budget, precision=precision)
+        # Outputs were taken where purity and entropy change
+        tlist = run['t']
+        purity_evolution = run['purity']
+        entropy_evolution = run['entropy']
+        final_local = run['final_state'][None]
+        if verbose:
+            status = (f"settled at t = {run['t_converged']:.2f}" if run['converged']
+                      else f"not settled by t = {tlist[-1]:g}")
+            print(f"{len(tlist)} adaptive outputs, {status}")
+    else:
+        if verbose:
+            print(f"Running quantum evolution with the '{backend}' Lindblad engine...")
+        with stage('evolve', 'solver', n_qubits=n_qubits, n_times=len(tlist)):
+            run = evolve(model, tlist, backend=backend, entropy=True, memory_budget=memory_budget,
+                         precision=precision, drive=drive if driven else None)
+        purity_evolution = run['purity']
+        # The symmetric backend only has the Renyi-2 entropy (a lower bound)
+        renyi2 = 'entropy' not in run
+        entropy_evolution = run['renyi2_entropy'] if renyi2 else run['entropy']
+        final_local = run['final_state']
+        if run['backend'] == 'symmetric':
+            final_local = np.repeat(run['single_qubit_rdm'][None], n_qubits, axis=0)
+        elif run['backend'] == 'trajectory':
+            # Ensemble-averaged single-qubit states of the final kets
+            final_local = single_qubit_rdms(final_local, kets=True).mean(axis=0)
+        else:
+            final_local = final_local[None]
+    
+    final_purity = float(purity_evolution[-1])
     
     # Check ethical bounds
     entropy_threshold = S_q / PHI  # ~1.111 nats
-    final_state = result.states[-1]
-    
-    # Calculate von Neumann entropy
-    eigenvalues = final_state.eigenenergies()
-    entropy = 0
-    for eigenval in eigenvalues:
-        if eigenval > 0:
-            entropy -= eigenval * np.log(eigenval)
-    
-    ethical_safe = entropy < entropy_threshold
+    entropy = max(0.0, float(entropy_evolution[-1]))
+    
+    if renyi2:
+        # S_2 <= S <= sum_i S(rho_i) (subadditivity): SAFE needs the upper bound below the
+        # threshold, HALT follows from the lower bound, anything between is undetermined
+        entropy_upper = max(0.0, float(np.sum(von_neumann_entropy(final_local))))
+        if entropy_upper < entropy_threshold:
+            ethical_status = 'SAFE'
+        elif entropy >= entropy_threshold:
+            ethical_status = 'HALT REQUIRED'
+        else:
+            ethical_status = 'UNDETERMINED (halt to be safe)'
+    else:
+        ethical_status = 'SAFE' if entropy < entropy_threshold else 'HALT REQUIRED'
+    ethical_safe = ethical_status == 'SAFE'
     
     if verbose:
         print(f"\nResults:")
@@ -137,57 +274,101 @@ def ethical_agi_circuit(n_qubits=2, show_plot=True, verbose=True):
         print(f"Target (φ⁻¹): {PHI_INV:.6f}")
         print(f"Difference: {abs(final_purity - PHI_INV):.6f}")
         print(f"Convergence: {'SUCCESS' if abs(final_purity - PHI_INV) < 0.01 else 'ONGOING'}")
+        if final_local.ndim == 3 and final_local.shape[-1] == 2:
+            local_purity = purity(final_local)
+        else:
+            local_purity = local_metrics(final_local, pairs=None)['purity_1q'][0]
+        print(f"Single-qubit purities: {np.array2string(local_purity, precision=4)}")
         print(f"\nEthical Safety Check:")
-        print(f"System entropy: {entropy:.3f} nats")
+        if renyi2:
+            print(f"System entropy: Renyi-2 {entropy:.3f} nats <= S <= {entropy_upper:.3f} nats "
+                  f"(sum of single-qubit entropies)")
+        else:
+            print(f"System entropy: {entropy:.3f} nats")
         print(f"Threshold: {entropy_threshold:.3f} nats")
-        print(f"Ethical status: {'SAFE' if ethical_safe else 'HALT REQUIRED'}")
+        print(f"Ethical status: {ethical_status}")
     
     if show_plot:
-        plt.figure(figsize=(10, 6))
-        plt.plot(tlist, purity_evolution, 'b-', linewidth=2, label='System Purity')
-        plt.axhline(y=PHI_INV, color='gold', linestyle='--', linewidth=2, 
-                    label=f'φ⁻¹ ≈ {PHI_INV:.3f} (Ethical Convergence)')
-        plt.fill_between(tlist, PHI_INV - 0.01, PHI_INV + 0.01, 
-                         color='gold', alpha=0.2, label='Target Range')
+        with stage('convergence_plot', 'render'):
+            plt.figure(figsize=(10, 6))
+            plt.plot(tlist, purity_evolution, 'b-', linewidth=2, label='System Purity')
+            plt.axhline(y=PHI_INV, color='gold', linestyle='--', linewidth=2, 
+                        label=f'φ⁻¹ ≈ {PHI_INV:.3f} (Ethical Convergence)')
+            plt.fill_between(tlist, PHI_INV - 0.01, PHI_INV + 0.01, 
+                             color='gold', alpha=0.2, label='Target Range')
         
-        plt.xlabel('Time', fontsize=12)
-        plt.ylabel('Purity', fontsize=12)
-        plt.title(f'PQRG Ethical AGI Circuit - {n_qubits} Qubits\nConvergence to Golden Ratio', 
-                  fontsize=14)
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.ylim(0, 1)
+            plt.xlabel('Time', fontsize=12)
+            plt.ylabel('Purity', fontsize=12)
+            plt.title(f'PQRG Ethical AGI Circuit - {n_qubits} Qubits\nConvergence to Golden Ratio', 
+                      fontsize=14)
+            plt.legend()
+            plt.grid(True, alpha=0.3)
+            plt.ylim(0, 1)
         
-        # Add text box with results
-        textstr = f'Final: {final_purity:.3f}\nTarget: {PHI_INV:.3f}\nEthical: {"Safe" if ethical_safe else "Halt"}'
-        plt.text(0.65, 0.95, textstr, transform=plt.gca().transAxes, fontsize=10,
-                 verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+            # Add text box with results
+            textstr = f'Final: {final_purity:.3f}\nTarget: {PHI_INV:.3f}\nEthical: {ethical_status.split()[0].capitalize()}'
+            plt.text(0.65, 0.95, textstr, transform=plt.gca().transAxes, fontsize=10,
+                     verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
         
-        plt.tight_layout()
-        plt.savefig(f'ethical_agi_{n_qubits}qubit.png', dpi=300)
-        plt.show()
+            plt.tight_layout()
+            plt.savefig(f'ethical_agi_{n_qubits}qubit.png', dpi=300)
+            plt.show()
     
     return final_purity, ethical_safe
 
-def demonstrate_scaling():
-    """Show how the ethical mechanism scales with system size"""
+def demonstrate_scaling(qubit_counts=(2, 3, 4), backend='auto', memory_budget=None, adaptive=False):
+    """Show how the ethical mechanism scales with system size
+    
+    Each qubit count is planned before it runs (run_planner.py): 'auto' picks the cheapest
+    backend that fits the memory budget, and counts that fit nowhere are skipped instead
+    of exhausting the node. With adaptive=True each count stops once it has settled.
+    """
     print("\n" + "="*60)
     print("PQRG Ethical AGI: Scaling Analysis")
     print("="*60)
     
-    qubit_counts = [2, 3, 4]
     results = []
     
     for n in qubit_counts:
         try:
-            purity, safe = ethical_agi_circuit(n, show_plot=False, verbose=False)
+            purity, safe = ethical_agi_circuit(n, show_plot=False, verbose=False, backend=backend,
+                                               memory_budget=memory_budget, adaptive=adaptive)
             results.append((n, purity, safe))
             print(f"{n} qubits: Purity = {purity:.4f}, Ethical = {'Safe' if safe else 'Halt'}")
+        except ResourceBudgetError as e:
+            print(f"{n} qubits: Skipped - {e}")
         except Exception as e:
             print(f"{n} qubits: Error - {e}")
     
     return results
 
+def parameter_scan(n_qubits=3, mu_c_values=np.linspace(0.5, 1.0, 21),
+                   PLV_j_values=np.linspace(0.4, 1.0, 21), t_final=0.2, memory_budget=None):
+    """Purity and entropy of the ethical circuit at t_final over a (mu_c, PLV_j) grid
+
+    The grid is swept by continuation (continuation.py): the points only rescale the
+    damping rates, so they share one Liouvillian pattern and are visited in serpentine
+    order. Returns the sweep dict with purity and entropy reshaped to the grid.
+
+    t_final sits inside the initial transient: by t ~ 1 every point has relaxed to the
+    pure |0...0> state.
+    """
+    print("\n" + "="*60)
+    print(f"PQRG Ethical AGI: ({len(mu_c_values)} x {len(PLV_j_values)}) Parameter Scan")
+    print("="*60)
+
+    _, S_q, _ = calculate_pqrg_parameters()
+    points, shape = parameter_grid(mu_c_values, PLV_j_values)
+    with stage('continuation_sweep', 'solver', n_qubits=n_qubits, n_points=len(points)):
+        scan = continuation_sweep(lambda p: ethical_circuit_model(n_qubits, mu_c=p[0], PLV_j=p[1]),
+                                  points, shape, mode='evolve', tlist=[0.0, t_final],
+                                  entropy=True, memory_budget=memory_budget)
+    purity_grid = scan['purity'].reshape(shape)
+    safe = scan['entropy'].reshape(shape) < S_q / PHI
+    print(f"Purity at t = {t_final:g}: {purity_grid.min():.4f} - {purity_grid.max():.4f}")
+    print(f"Ethically safe: {safe.mean():.0%} of the grid")
+    return {**scan, 'purity': purity_grid, 'entropy': scan['entropy'].reshape(shape), 'safe': safe}
+
 def practical_implementation_example():
     """Show how to integrate into existing AI systems"""
     print("\n" + "="*60)
@@ -197,9 +378,11 @@ def practical_implementation_example():
     # Example: Modifying loss function
     print("\n1. Loss Function Modification:")
     print("```python")
-    print("def ethical_loss(output, target, model_params):")
+    print("from partition_function import ThermalSpectrum")
+    print("")
+    print("def ethical_loss(output, target, model_energies, temperature):")
     print("    ce_loss = cross_entropy(output, target)")
-    print("    T_E = -k_B * np.log(partition_function(model_params))")
+    print("    T_E = ThermalSpectrum(model_energies, k_B=1.0).ethical_entropy(temperature)  # -log Z, stable")
     print("    ethical_term = T_E / PHI")
     print("    return ce_loss + ethical_term")
     print("```")
@@ -215,11 +398,10 @@ def practical_implementation_example():
     # Example: Output monitoring
     print("\n3. Output Entropy Monitoring:")
     print("```python")
-    print("def check_ethical_bounds(output_distribution):")
-    print("    entropy = -np.sum(output_distribution * np.log(output_distribution))")
-    print("    threshold = S_q / PHI  # ~1.111 nats")
-    print("    if entropy > threshold:")
-    print("        trigger_ethical_halt()")
+    print("from ethical_monitor import EthicalHaltMonitor")
+    print("")
+    print("monitor = EthicalHaltMonitor(on_halt=trigger_ethical_halt)  # threshold S_q / PHI ~1.111 nats")
+    print("entropies, halt = monitor.check(logits)  # [batch, vocab] float16/float32 logits")
     print("```")
 
 if __name__ == "__main__":
@@ -239,6 +421,9 @@ if __name__ == "__main__":
     # Show scaling
     demonstrate_scaling()
     
+    # Scan the consciousness parameters
+    parameter_scan()
+    
     # Show practical implementation
     practical_implementation_example()
     
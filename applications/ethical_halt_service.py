@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+PQRG Ethical Halt Service
+Out-of-process entropy threshold check over a local socket
+
+Runs the S_q / φ entropy check (ethical_monitor.py) in an asyncio server listening on a
+Unix socket or a localhost TCP port, so many model replicas can share one monitor
+without importing QuTiP/matplotlib. Requests from all connections are micro-batched,
+admission is bounded by a queue (overloaded requests are rejected rather than queued
+forever), and end-to-end latencies are recorded in a log-scale histogram.
+
+Binary protocol (little-endian):
+  request:  'PQRG' | dtype u8 (0=f16, 1=f32, 2=f64) | flags u8 (1=logits) | 2 pad
+            | batch u32 | vocab u32 | batch*vocab values
+  response: 'PQRG' | status u8 (0=ok, 1=overloaded, 2=error) | 3 pad | n u32
+            | ok: n float32 entropies + n uint8 halt flags; otherwise n bytes of message
+
+The same listener also answers plain HTTP: GET /stats returns counters and latency
+percentiles, POST /check takes {"logits": [[...], ...]} and returns JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import time
+
+import numpy as np
+
+from ethical_monitor import ENTROPY_THRESHOLD, EthicalHaltMonitor
+
+MAGIC = b'PQRG'
+REQUEST_HEADER = struct.Struct('<4sBBxxII')
+RESPONSE_HEADER = struct.Struct('<4sBxxxI')
+DTYPES = (np.float16, np.float32, np.float64)
+DTYPE_CODES = {np.dtype(d): i for i, d in enumerate(DTYPES)}
+
+STATUS_OK, STATUS_OVERLOADED, STATUS_ERROR = 0, 1, 2
+
+# Batches with fewer elements are evaluated on the event loop (no thread hop)
+INLINE_ELEMENTS = 1 << 16
+
+# Largest accepted request payload
+MAX_REQUEST_BYTES = 1 << 28
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram from 1 µs to ~1 h"""
+
+    def __init__(self, n_buckets=32):
+        self.counts = np.zeros(n_buckets, dtype=np.int64)
+        self.total = 0.0
+        self.n = 0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        bucket = min(int(np.log2(micros)), self.counts.size - 1)
+        self.counts[bucket] += 1
+        self.total += seconds
+        self.n += 1
+
+    def percentile(self, q):
+        """Upper edge (seconds) of the bucket containing quantile q in [0, 1]"""
+        if self.n == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q * self.n))
+        return 2.0 ** (bucket + 1) * 1e-6
+
+    def summary(self):
+        return {
+            'count': self.n,
+            'mean_us': 1e6 * self.total / self.n if self.n else 0.0,
+            'p50_us': 1e6 * self.percentile(0.5),
+            'p99_us': 1e6 * self.percentile(0.99),
+            'p999_us': 1e6 * self.percentile(0.999),
+            'buckets_us': {f'<{2 ** (i + 1)}': int(c) for i, c in enumerate(self.counts) if c},
+        }
+
+
+class HaltService:
+    """
+    Micro-batching ethical halt server.
+
+    Parameters:
+    threshold: Entropy limit in nats (default S_q / φ)
+    max_batch_rows: Rows gathered into one monitor call
+    max_delay: Seconds the batcher may wait for more requests once the queue is drained
+        (default 0: flush as soon as the queue is empty or the batch is full)
+    max_queue: Pending requests admitted before new ones are rejected as overloaded
+    admission_timeout: Seconds a request may wait for a queue slot
+    """
+
+    def __init__(self, threshold=None, max_batch_rows=4096, max_delay=0.0,
+                 max_queue=1024, admission_timeout=1e-3):
+        self.monitor = EthicalHaltMonitor(threshold=threshold, n_workers=1)
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.admission_timeout = admission_timeout
+        self.latency = LatencyHistogram()
+        self.n_batches = 0
+        self.n_rows = 0
+        self.rejected = 0
+        self._queue = None
+        self._batcher = None
+        self._servers = []
+        self._handlers = set()
+
+    # -- batching -----------------------------------------------------------
+
+    async def submit(self, array, from_logits=True):
+        """Queue one request; returns (entropies, halt) or raises OverflowError"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put((array, from_logits, future)),
+                                   self.admission_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise OverflowError("ethical halt service overloaded") from None
+        return await future
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            items = [first]
+            rows = first[0].shape[0]
+            deadline = loop.time() + self.max_delay
+            yielded = False
+            while rows < self.max_batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining > 0:
+                        # Woken by the next put, not by polling the ~1 ms loop timer
+                        try:
+                            item = await asyncio.wait_for(self._queue.get(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+                    elif not yielded:
+                        # One pass of the loop lets already readable requests enqueue
+                        yielded = True
+                        await asyncio.sleep(0)
+                        continue
+                    else:
+                        break
+                items.append(item)
+                rows += item[0].shape[0]
+            await self._evaluate(items)
+
+    async def _evaluate(self, items):
+        # Requests sharing dtype, vocab and input kind are concatenated into one call
+        groups = {}
+        for item in items:
+            array, from_logits, _ = item
+            groups.setdefault((array.dtype, array.shape[1], from_logits), []).append(item)
+        for (_, _, from_logits), group in groups.items():
+            batch = np.concatenate([a for a, _, _ in group]) if len(group) > 1 else group[0][0]
+            self.n_batches += 1
+            self.n_rows += batch.shape[0]
+            try:
+                if batch.size <= INLINE_ELEMENTS:
+                    entropies, halt = self.monitor.check(batch, from_logits)
+                else:
+                    entropies, halt = await asyncio.get_running_loop().run_in_executor(
+                        None, self.monitor.check, batch, from_logits)
+            except Exception as exc:  # report to every waiter rather than kill the batcher
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            start = 0
+            for array, _, future in group:
+                stop = start + array.shape[0]
+                if not future.done():
+                    future.set_result((entropies[start:stop], halt[start:stop]))
+                start = stop
+
+    # -- connections --------------------------------------------------------
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readexactly(4)
+                except asyncio.IncompleteReadError:
+                    break
+                if head == MAGIC:
+                    await self._handle_binary(reader, writer)
+                elif head in (b'GET ', b'POST'):
+                    await self._handle_http(head, reader, writer)
+                    break
+                else:
+                    await self._protocol_error(writer, 'bad magic')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Ended by close(); return normally so the stream callback doesn't log it
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _handle_binary(self, reader, writer):
+        rest = await reader.readexactly(REQUEST_HEADER.size - 4)
+        _, dtype_code, flags, batch, vocab = REQUEST_HEADER.unpack(MAGIC + rest)
+        received = time.perf_counter()
+        if dtype_code >= len(DTYPES):
+            await self._protocol_error(writer, 'unknown dtype')
+        dtype = np.dtype(DTYPES[dtype_code])
+        n_bytes = batch * vocab * dtype.itemsize
+        if n_bytes > MAX_REQUEST_BYTES:
+            await self._protocol_error(writer, 'request too large')
+        payload = await reader.readexactly(n_bytes)
+        array = np.frombuffer(payload, dtype=dtype).reshape(batch, vocab)
+        try:
+            entropies, halt = await self.submit(array, from_logits=bool(flags & 1))
+        except OverflowError as exc:
+            return await self._reply(writer, STATUS_OVERLOADED, str(exc).encode())
+        except Exception as exc:
+            return await self._reply(writer, STATUS_ERROR, str(exc).encode())
+        writer.write(RESPONSE_HEADER.pack(MAGIC, STATUS_OK, batch)
+                     + entropies.astype(np.float32, copy=False).tobytes()
+                     + halt.astype(np.uint8).tobytes())
+        await writer.drain()
+        self.latency.record(time.perf_counter() - received)
+
+    async def _reply(self, writer, status, message):
+        writer.write(RESPONSE_HEADER.pack(MAGIC, status, len(message)) + message)
+        await writer.drain()
+
+    async def _protocol_error(self, writer, message):
+        """Send an error frame, then drop the connection (the stream can't be resynchronized)"""
+        await self._reply(writer, STATUS_ERROR, message.encode())
+        raise ConnectionAbortedError(message)
+
+    async def _handle_http(self, method, reader, writer):
+        request_line = method + await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        path = request_line.split()[1].decode('latin-1') if len(request_line.split()) > 1 else '/'
+
+        status, body = '404 Not Found', {'error': 'not found'}
+        if method == b'GET ' and path == '/stats':
+            status, body = '200 OK', self.stats()
+        elif method == b'POST' and path == '/check':
+            length = int(headers.get('content-length', 0))
+            try:
+                data = json.loads(await reader.readexactly(length))
+                if not isinstance(data, dict):
+                    raise ValueError("Expected a JSON object with a 'logits' array")
+                array = np.asarray(data['logits'], dtype=np.float32)
+                if array.ndim not in (1, 2):
+                    raise ValueError(f"'logits' must be [vocab] or [batch, vocab], got shape {array.shape}")
+                if array.ndim == 1:
+                    array = array[None, :]
+                received = time.perf_counter()
+                entropies, halt = await self.submit(array, data.get('from_logits', True))
+                self.latency.record(time.perf_counter() - received)
+                status, body = '200 OK', {'entropy': entropies.tolist(), 'halt': halt.tolist(),
+                                          'threshold': self.monitor.threshold}
+            except OverflowError as exc:
+                status, body = '503 Service Unavailable', {'error': str(exc)}
+            except (ValueError, KeyError, TypeError) as exc:
+                status, body = '400 Bad Request', {'error': str(exc)}
+
+        payload = json.dumps(body).encode()
+        writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                     f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode() + payload)
+        await writer.drain()
+
+    # -- lifecycle ----------------------------------------------------------
+
+    async def start(self, unix_path=None, host='127.0.0.1', port=None):
+        """Start listening on a Unix socket and/or a localhost TCP port"""
+        if unix_path is None and port is None:
+            raise ValueError("Give a unix_path and/or a TCP port")
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._batcher = asyncio.create_task(self._run_batcher())
+        if unix_path is not None:
+            self._servers.append(await asyncio.start_unix_server(self._handle, path=unix_path))
+        if port is not None:
+            if host not in ('127.0.0.1', '::1', 'localhost'):
+                raise ValueError("The halt service only binds to localhost")
+            self._servers.append(await asyncio.start_server(self._handle, host, port))
+        return self
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+        # Open connections keep wait_closed() waiting (Python >= 3.12): end them first
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+
+    def stats(self):
+        stats = self.monitor.stats()
+        stats.update({
+            'rejected': self.rejected,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'latency': self.latency.summary(),
+            'batches': self.n_batches,
+            'mean_batch_rows': self.n_rows / self.n_batches if self.n_batches else 0.0,
+        })
+        return stats
+
+
+def _encode_request(logits, from_logits):
+    array = np.asarray(logits)
+    if array.ndim == 1:
+        array = array[None, :]
+    if array.dtype not in DTYPE_CODES:
+        array = array.astype(np.float32)
+    array = np.ascontiguousarray(array)
+    header = REQUEST_HEADER.pack(MAGIC, DTYPE_CODES[array.dtype], int(bool(from_logits)), *array.shape)
+    return header + array.tobytes(), array.shape[0]
+
+
+def _decode_response(header, body):
+    _, status, n = RESPONSE_HEADER.unpack(header)
+    if status == STATUS_OVERLOADED:
+        raise OverflowError(body.decode())
+    if status != STATUS_OK:
+        raise RuntimeError(body.decode())
+    entropies = np.frombuffer(body[:4 * n], dtype=np.float32)
+    halt = np.frombuffer(body[4 * n:], dtype=np.uint8).astype(bool)
+    return entropies, halt
+
+
+def _body_size(header):
+    _, status, n = RESPONSE_HEADER.unpack(header)
+    return 5 * n if status == STATUS_OK else n
+
+
+class HaltClient:
+    """Asyncio client for the binary protocol (one request in flight per connection)"""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, unix_path=None, host='127.0.0.1', port=None):
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def check(self, logits, from_logits=True):
+        """Returns (entropies, halt) for a [batch, vocab] array"""
+        request, _ = _encode_request(logits, from_logits)
+        self._writer.write(request)
+        await self._writer.drain()
+        header = await self._reader.readexactly(RESPONSE_HEADER.size)
+        body = await self._reader.readexactly(_body_size(header))
+        return _decode_response(header, body)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+def check_sync(logits, unix_path=None, host='127.0.0.1', port=None, from_logits=True, sock=None):
+    """
+    Blocking one-shot check for servers without an event loop.
+
+    Pass an already connected socket via sock to reuse a connection.
+    """
+    own = sock is None
+    if own:
+        if unix_path is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(unix_path)
+        else:
+            sock = socket.create_connection((host, port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        request, _ = _encode_request(logits, from_logits)
+        sock.sendall(request)
+        header = _recv_exactly(sock, RESPONSE_HEADER.size)
+        return _decode_response(header, _recv_exactly(sock, _body_size(header)))
+    finally:
+        if own:
+            sock.close()
+
+
+def _recv_exactly(sock, n):
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise ConnectionError("halt service closed the connection")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+async def _serve(args):
+    service = HaltService(max_batch_rows=args.max_batch_rows, max_delay=args.max_delay_us * 1e-6,
+                          max_queue=args.max_queue)
+    await service.start(unix_path=args.unix, host=args.host, port=args.port)
+    where = ', '.join(filter(None, [args.unix and f'unix:{args.unix}',
+                                    args.port and f'http://{args.host}:{args.port}']))
+    print(f"PQRG ethical halt service on {where} (threshold {ENTROPY_THRESHOLD:.3f} nats)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PQRG ethical halt service")
+    parser.add_argument('--unix', default=None, help="Unix socket path")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None, help="Localhost TCP port")
+    parser.add_argument('--max-batch-rows', type=int, default=4096)
+    parser.add_argument('--max-delay-us', type=float, default=0.0)
+    parser.add_argument('--max-queue', type=int, default=1024)
+    args = parser.parse_args()
+    if args.unix is None and args.port is None:
+        args.unix = '/tmp/pqrg_ethical_halt.sock'
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
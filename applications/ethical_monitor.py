@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+PQRG Ethical Halt Monitor
+Batch output-entropy checks for inference serving
+
+Computes Shannon entropies of batches of output distributions ([batch, vocab] logits
+or probabilities) in a numerically stable log-softmax form and flags an ethical halt
+when the entropy exceeds the PQRG threshold S_q / φ (~1.111 nats).
+
+Only NumPy is imported, so the monitor can sit inline in a model server without
+pulling in QuTiP or matplotlib (unlike ethical_agi_demo.py).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Golden ratio - the consciousness constant
+PHI = (1 + np.sqrt(5)) / 2
+PHI_INV = 1 / PHI
+
+# Elements per chunk of work (~256 KB of float32 scratch, stays in L2)
+CHUNK_ELEMENTS = 65536
+
+
+def calculate_entropy_threshold():
+    """Ethical entropy threshold S_q / φ in nats (as in calculate_pqrg_parameters)"""
+    def fib(n):
+        if n <= 1:
+            return n
+        a, b = 0, 1
+        for _ in range(n-1):
+            a, b = b, a + b
+        return b
+
+    sigma = sum(1.0 / fib(n) for n in range(1, 50) if fib(n) != 0)
+    S_q = np.log(sigma)
+    for n in range(1, 50):
+        fib_n = fib(n)
+        if fib_n != 0:
+            S_q += (1.0/sigma) * (1.0/fib_n) * np.log(fib_n)
+    return float(S_q / PHI)
+
+
+ENTROPY_THRESHOLD = calculate_entropy_threshold()
+
+
+def _entropy_rows(x, out, from_logits, work):
+    """Entropy of each row of x into out, using the float32 scratch buffers in work."""
+    rows, vocab = x.shape
+    z = work[0][:rows, :vocab]
+    e = work[1][:rows, :vocab]
+    if from_logits:
+        # H = log(sum exp z) - sum(softmax(z) * z) with z = x - max(x)
+        m = x.max(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore'):   # All-masked rows give NaN, caught in check()
+            np.subtract(x, m, out=z, dtype=np.float32)
+        np.exp(z, out=e)
+        # Masked (-inf) logits: e = 0, so zero z to avoid 0 * -inf = NaN
+        np.copyto(z, 0, where=e == 0)
+        s = e.sum(axis=1)
+        np.log(s, out=out)
+        out -= np.einsum('ij,ij->i', e, z) / s
+    else:
+        # H = -sum p log p with 0 log 0 = 0
+        np.copyto(e, x, casting='same_kind')
+        z.fill(0)
+        np.log(e, out=z, where=e > 0)
+        np.negative(np.einsum('ij,ij->i', e, z), out=out)
+
+
+def batch_entropy(distributions, from_logits=True, out=None, n_workers=1):
+    """
+    Shannon entropy (nats) of each distribution in a batch.
+
+    Args:
+        distributions: [batch, vocab] float16/float32/float64 logits or probabilities
+        from_logits: Treat inputs as unnormalised logits (log-softmax form)
+        out: Optional float32 output array of length batch
+        n_workers: Threads to split the batch over
+
+    Returns:
+        float32 array of entropies, shape [batch]
+
+    The input is read in row chunks and cast into reused float32 scratch buffers,
+    so float16 batches are never copied or upcast as a whole.
+    """
+    x = np.asarray(distributions)
+    if x.ndim == 1:
+        x = x[None, :]
+    if x.ndim != 2:
+        raise ValueError(f"Expected [batch, vocab] array, got shape {x.shape}")
+    if x.dtype.kind != 'f':
+        raise TypeError(f"Expected floating point inputs, got {x.dtype}")
+    batch, vocab = x.shape
+    if out is None:
+        out = np.empty(batch, dtype=np.float32)
+    chunk_rows = max(1, CHUNK_ELEMENTS // max(vocab, 1))
+    bounds = [(start, min(start + chunk_rows, batch)) for start in range(0, batch, chunk_rows)]
+
+    def run(part):
+        work = (np.empty((chunk_rows, vocab), dtype=np.float32),
+                np.empty((chunk_rows, vocab), dtype=np.float32))
+        for start, stop in part:
+            _entropy_rows(x[start:stop], out[start:stop], from_logits, work)
+
+    n_workers = max(1, min(n_workers, len(bounds)))
+    if n_workers == 1:
+        run(bounds)
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            list(pool.map(run, [bounds[i::n_workers] for i in range(n_workers)]))
+    return out
+
+
+class EthicalHaltMonitor:
+    """
+    Inline ethical-halt check for model output distributions.
+
+    Parameters:
+    threshold: Entropy limit in nats (default S_q / φ ≈ 1.111)
+    from_logits: Inputs are logits rather than probabilities
+    on_halt: Optional callback(indices, entropies) invoked when rows exceed the threshold
+    n_workers: Threads used per batch (default: all cores)
+    """
+
+    def __init__(self, threshold=None, from_logits=True, on_halt=None, n_workers=None):
+        self.threshold = ENTROPY_THRESHOLD if threshold is None else float(threshold)
+        self.from_logits = from_logits
+        self.on_halt = on_halt
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self.n_checked = 0
+        self.n_halted = 0
+
+    def check(self, distributions, from_logits=None):
+        """
+        Check a batch of output distributions.
+
+        from_logits overrides the monitor default for this call.
+
+        Returns:
+        entropies: float32 entropies per row
+        halt: Boolean mask, True where the ethical halt must trigger (or the entropy is NaN)
+        """
+        if from_logits is None:
+            from_logits = self.from_logits
+        entropies = batch_entropy(distributions, from_logits, n_workers=self.n_workers)
+        # Non-finite entropies (NaN logits, all-masked rows) fail closed
+        halt = ~(entropies <= self.threshold)
+        n_halt = int(np.count_nonzero(halt))
+        with self._lock:
+            self.n_checked += entropies.size
+            self.n_halted += n_halt
+        if n_halt and self.on_halt is not None:
+            self.on_halt(np.flatnonzero(halt), entropies[halt])
+        return entropies, halt
+
+    def stats(self):
+        """Counters since construction"""
+        with self._lock:
+            return {
+                'checked': self.n_checked,
+                'halted': self.n_halted,
+                'halt_fraction': self.n_halted / self.n_checked if self.n_checked else 0.0,
+                'threshold': self.threshold,
+            }
+
+
+if __name__ == "__main__":
+    import time
+
+    print("PQRG Ethical Halt Monitor")
+    print("=========================")
+    print(f"Entropy threshold S_q/φ: {ENTROPY_THRESHOLD:.3f} nats\n")
+
+    rng = np.random.default_rng(0)
+    monitor = EthicalHaltMonitor()
+    for vocab, dtype in [(8, np.float16), (8, np.float32), (64, np.float32), (32000, np.float16)]:
+        batch = max(1, 4_000_000 // vocab) if vocab < 1000 else 256
+        logits = (rng.standard_normal((batch, vocab)) * 3).astype(dtype)
+        monitor.check(logits[:16])  # warm up
+        start = time.perf_counter()
+        entropies, halt = monitor.check(logits)
+        elapsed = time.perf_counter() - start
+        print(f"vocab={vocab:>6} {np.dtype(dtype).name:>8}: {batch / elapsed:>12,.0f} dists/s, "
+              f"halt fraction {halt.mean():.3f}")
+
+    print(f"\nMonitor stats: {monitor.stats()}")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+PQRG Partition Function
+Stable log Z, free energy and T_E for large energy spectra
+
+The naive Z = sum(exp(-E / (k_B T))) of the AGI oracle notebook underflows every term
+but the ground state (or overflows for negative energies). Here log Z is evaluated as
+
+    log Z = -beta E_min + log sum_i g_i exp(-beta (E_i - E_min)),   beta = 1 / (k_B T)
+
+so every exponent is <= 0 and no term overflows. Spectra of 10^6+ levels are streamed
+in chunks, and all temperatures of a batch are handled in the same pass.
+
+T_E = -k_B log Z is the ethical entropy used by ethical_loss in ethical_agi_demo.py.
+Only NumPy is imported.
+"""
+
+import numpy as np
+
+# Boltzmann constant (J/K)
+K_B = 1.380649e-23
+
+# Energy-temperature products per chunk (~4 MB of float64 scratch)
+CHUNK_ELEMENTS = 1 << 19
+
+
+class ThermalSpectrum:
+    """
+    Energy spectrum with cached ground-state shift for repeated thermal evaluations.
+
+    Parameters:
+    energies: 1-D array of levels (may be a np.memmap larger than RAM)
+    degeneracies: Optional level degeneracies g_i
+    k_B: Boltzmann constant (1.0 for energies in temperature units)
+    """
+
+    def __init__(self, energies, degeneracies=None, k_B=K_B):
+        self.energies = np.asarray(energies).ravel()
+        if self.energies.size == 0:
+            raise ValueError("Empty energy spectrum")
+        self.degeneracies = None if degeneracies is None else np.asarray(degeneracies, dtype=float).ravel()
+        if self.degeneracies is not None and self.degeneracies.shape != self.energies.shape:
+            raise ValueError("degeneracies must match energies")
+        self.k_B = k_B
+        self.e_min = float(self.energies.min())
+
+    def _moments(self, temperature, order):
+        """Shifted sums sum g (E - E_min)^k exp(-beta (E - E_min)) for k <= order, shape [order+1, B]"""
+        T = np.asarray(temperature, dtype=float).ravel()
+        if np.any(T <= 0):
+            raise ValueError("Temperatures must be positive")
+        beta = 1.0 / (self.k_B * T)
+        sums = np.zeros((order + 1, T.size))
+        chunk = max(1, CHUNK_ELEMENTS // T.size)
+        n_chunk = min(chunk, self.energies.size)
+        # Scratch buffers reused across chunks
+        dE_buf = np.empty(n_chunk)
+        w_buf = np.empty((T.size, n_chunk))
+        for start in range(0, self.energies.size, chunk):
+            stop = min(start + chunk, self.energies.size)
+            dE = dE_buf[:stop - start]
+            w = w_buf[:, :stop - start]
+            np.subtract(self.energies[start:stop], self.e_min, out=dE)
+            np.multiply(-beta[:, None], dE, out=w)
+            np.exp(w, out=w)
+            if self.degeneracies is not None:
+                w *= self.degeneracies[start:stop]
+            sums[0] += w.sum(axis=1)
+            for k in range(1, order + 1):
+                w *= dE
+                sums[k] += w.sum(axis=1)
+        return sums, beta
+
+    def log_z(self, temperature):
+        """log Z for a scalar or array of temperatures"""
+        sums, beta = self._moments(temperature, 0)
+        return _shape_like(np.log(sums[0]) - beta * self.e_min, temperature)
+
+    def free_energy(self, temperature):
+        """Helmholtz free energy F = -k_B T log Z"""
+        T = np.asarray(temperature, dtype=float)
+        return -self.k_B * T * self.log_z(temperature)
+
+    def ethical_entropy(self, temperature):
+        """T_E = -k_B log Z (ethical_agi_demo.py / AGI oracle definition)"""
+        return -self.k_B * self.log_z(temperature)
+
+    def observables(self, temperature):
+        """
+        Thermal averages in one pass over the spectrum.
+
+        Returns:
+        dict with 'log_z', 'mean_energy', 'energy_variance', 'entropy' (k_B (log Z + beta <E>))
+        and 'heat_capacity' (k_B beta^2 Var E); d log Z / d beta = -<E>
+        """
+        sums, beta = self._moments(temperature, 2)
+        log_z = np.log(sums[0]) - beta * self.e_min
+        shifted_mean = sums[1] / sums[0]
+        variance = np.maximum(sums[2] / sums[0] - shifted_mean ** 2, 0.0)
+        mean_energy = shifted_mean + self.e_min
+        result = {
+            'log_z': log_z,
+            'mean_energy': mean_energy,
+            'energy_variance': variance,
+            'entropy': self.k_B * (log_z + beta * mean_energy),
+            'heat_capacity': self.k_B * beta ** 2 * variance,
+        }
+        return {key: _shape_like(value, temperature) for key, value in result.items()}
+
+
+def _shape_like(values, temperature):
+    return values[0] if np.ndim(temperature) == 0 else values.reshape(np.shape(temperature))
+
+
+def log_partition_function(energies, temperature, degeneracies=None, k_B=K_B):
+    """log Z of a spectrum at one or many temperatures (see ThermalSpectrum)"""
+    return ThermalSpectrum(energies, degeneracies, k_B).log_z(temperature)
+
+
+def free_energy(energies, temperature, degeneracies=None, k_B=K_B):
+    """F = -k_B T log Z"""
+    return ThermalSpectrum(energies, degeneracies, k_B).free_energy(temperature)
+
+
+def ethical_entropy(energies, temperature, degeneracies=None, k_B=K_B):
+    """T_E = -k_B log Z"""
+    return ThermalSpectrum(energies, degeneracies, k_B).ethical_entropy(temperature)
+
+
+if __name__ == "__main__":
+    import time
+
+    print("PQRG Partition Function")
+    print("=======================")
+
+    # AGI oracle notebook: 16 toy levels in [0, 1] J at T = 1 K
+    energies = np.linspace(0, 1, 16)
+    with np.errstate(over='ignore', under='ignore'):
+        naive = np.sum(np.exp(-energies / (K_B * 1.0)))
+    print(f"Notebook spectrum: naive Z = {naive}, stable log Z = {log_partition_function(energies, 1.0):.3e}")
+    print("  (beta * dE ~ 5e21: only the ground state contributes, so T_E = 0 exactly)")
+    print(f"  In units k_B T: log Z = {log_partition_function(energies, 1.0, k_B=1.0):.6f}, "
+          f"T_E = {ethical_entropy(energies, 1.0, k_B=1.0):.6f}")
+
+    rng = np.random.default_rng(0)
+    spectrum = ThermalSpectrum(rng.gamma(2.0, 1.0, size=2_000_000), k_B=1.0)
+    temperatures = np.geomspace(0.01, 100, 64)
+    spectrum.log_z(temperatures[:2])  # warm up
+    start = time.perf_counter()
+    values = spectrum.observables(temperatures)
+    elapsed = time.perf_counter() - start
+    print(f"\n2,000,000 levels x {temperatures.size} temperatures: {elapsed * 1e3:.1f} ms")
+    start = time.perf_counter()
+    spectrum.log_z(1.0)
+    print(f"Single temperature (per training step): {(time.perf_counter() - start) * 1e3:.2f} ms")
+    print(f"  log Z range [{values['log_z'].min():.3f}, {values['log_z'].max():.3f}], "
+          f"<E> from {values['mean_energy'][0]:.4f} to {values['mean_energy'][-1]:.4f}")
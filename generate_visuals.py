@@ -5,6 +5,10 @@ import matplotlib.patches as patches
 from matplotlib.patches import FancyBboxPatch, Circle, Arrow
 import matplotlib.colors as colors
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulations'))
+from instrumentation import RECORDER, report, timed  # noqa: E402
 
 # Create figures directory if it doesn't exist
 os.makedirs('figs', exist_ok=True)
@@ -19,6 +23,7 @@ plt.rcParams['lines.linewidth'] = 2
 PHI = (1 + np.sqrt(5)) / 2
 PHI_INV = 1 / PHI
 
+@timed(category='render')
 def create_phi_convergence_plot():
     """Create the φ^{-1} purity convergence visualization"""
     print("Generating φ^{-1} convergence plot...")
@@ -61,6 +66,7 @@ def create_phi_convergence_plot():
     plt.savefig('figs/phi_convergence.png', dpi=300, bbox_inches='tight')
     plt.close()
 
+@timed(category='render')
 def create_wormhole_embedding():
     """Create 3D wormhole embedding diagram"""
     print("Generating wormhole embedding diagram...")
@@ -126,6 +132,7 @@ Consciousness Density Visualization',
     plt.savefig('figs/wormhole_embedding.png', dpi=300, bbox_inches='tight')
     plt.close()
 
+@timed(category='render')
 def create_alpha_derivation_diagram():
     """Create visual representation of α = φ^{-3} × f derivation"""
     print("Generating α derivation diagram...")
@@ -224,6 +231,7 @@ def create_alpha_derivation_diagram():
     plt.savefig('figs/alpha_derivation.png', dpi=300, bbox_inches='tight')
     plt.close()
 
+@timed(category='render')
 def create_consciousness_hierarchy():
     """Create consciousness hierarchy diagram"""
     print("Generating consciousness hierarchy diagram...")
@@ -283,6 +291,7 @@ def create_consciousness_hierarchy():
     plt.savefig('figs/consciousness_hierarchy.png', dpi=300, bbox_inches='tight')
     plt.close()
 
+@timed(category='render')
 def create_rg_flow_diagram():
     """Create RG flow visualization"""
     print("Generating RG flow diagram...")
@@ -363,6 +372,7 @@ Scale', fontsize=10, ha='center')
     plt.savefig('figs/rg_flow.png', dpi=300, bbox_inches='tight')
     plt.close()
 
+@timed(category='render')
 def create_experimental_setup():
     """Create GCASP experimental setup diagram"""
     print("Generating GCASP experimental setup...")
@@ -461,6 +471,7 @@ Decay\
     plt.savefig('figs/gcasp_setup.png', dpi=300, bbox_inches='tight')
     plt.close()
 
+@timed(category='render')
 def create_summary_infographic():
     """Create a summary infographic of PQRG theory"""
     print("Generating PQRG summary infographic...")
@@ -643,3 +654,5 @@ if __name__ == "__main__":
     create_experimental_setup()
     create_summary_infographic()
     print("\nAll visuals generated successfully!")
+    if RECORDER.enabled:
+        report()
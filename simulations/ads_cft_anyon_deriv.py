@@ -34,3 +34,6 @@ sp.pprint(ds2)
 R_any = sp.exp(sp.I * sp.pi / (4 * phi))  # Example R-phase for Fibonacci braiding
 print("\nPredictable TQC braiding phase (R_any):")
 sp.pprint(R_any.evalf())
+
+# Numerical evaluation: derivation_cache.py registers these expressions as compiled, cached
+# NumPy kernels (compile_derivation('ds2')); run it directly to benchmark ds^2 on 10^6 points
@@ -0,0 +1,243 @@
+# Parameter Continuation for Lindblad Sweeps
+
+"""
+Dense 1-D and 2-D parameter scans of the lindblad_engine models by continuation.
+
+A sweep is a model factory (point -> QubitLindbladModel) evaluated over many nearby
+points. Instead of independent solves:
+
+- The points are visited along a path: serpentine (boustrophedon) order on a grid, so
+  consecutive points differ in one coordinate by one step, and greedy nearest-neighbour
+  order for scattered points.
+- Models that differ only in their jump rates share one CombinedLiouvillian pattern;
+  moving to the next point recombines the term data instead of rebuilding sparse
+  matrices.
+- Steady states (mode='steady') solve L x = 0 with row 0 replaced by the trace
+  condition. The LU factorization of one point preconditions GMRES at the next ones,
+  warm-started from a secant predictor along the path; the matrix is refactorized only
+  when GMRES needs more than refactor_iter iterations or fails. Factorizations use the
+  minimum-degree ordering of A^T + A, which halves the fill of COLAMD here.
+- A point whose solution is far from the predictor (relative change > branch_tol) is
+  flagged as a branch change: a jump of the steady state, e.g. where the Liouvillian gap
+  closes, which no smooth continuation can follow.
+
+mode='evolve' records the state at tlist[-1] of each point with expm_multiply on the
+shared pattern. Time evolution always starts from psi0, so there the savings are the
+pattern reuse only.
+"""
+
+import inspect
+
+import numpy as np
+import scipy.sparse as sps
+from scipy.sparse.linalg import LinearOperator, expm_multiply, gmres, splu
+
+from lindblad_engine import CombinedLiouvillian, _observables
+from run_planner import check_budget
+
+MODES = ('steady', 'evolve')
+
+# gmres took tol= before SciPy 1.12 (rtol=, same meaning, from 1.12; tol= removed in 1.14)
+GMRES_RTOL = 'rtol' if 'rtol' in inspect.signature(gmres).parameters else 'tol'
+
+# Secant steps are used when consecutive path steps point this much the same way
+SECANT_ALIGNMENT = 0.9
+
+
+def parameter_grid(*axes):
+    """
+    Points [N, k] of the Cartesian product of k 1-D axes (C order) and the grid shape.
+    """
+    axes = [np.asarray(axis, dtype=float).ravel() for axis in axes]
+    shape = tuple(len(axis) for axis in axes)
+    mesh = np.meshgrid(*axes, indexing='ij')
+    return np.stack([m.ravel() for m in mesh], axis=1), shape
+
+
+def path_order(points, shape=None):
+    """
+    Visiting order of the sweep points.
+
+    Args:
+        points: [N, k] parameter values (or [N] for one parameter)
+        shape: Grid shape when points come from parameter_grid; gives the serpentine
+            order, in which every step changes one grid index by one
+
+    Returns:
+        Index array [N] into points
+    """
+    points = np.asarray(points, dtype=float)
+    points = points[:, None] if points.ndim == 1 else points
+    if shape is not None:
+        if int(np.prod(shape)) != len(points):
+            raise ValueError(f"Grid shape {shape} does not match {len(points)} points")
+        grid = np.indices(shape).reshape(len(shape), -1).T
+        snake = grid.copy()
+        for j in range(1, len(shape)):
+            flip = snake[:, :j].sum(axis=1) % 2 == 1
+            snake[flip, j] = shape[j] - 1 - grid[flip, j]
+        return np.ravel_multi_index(tuple(snake.T), shape)
+    # Greedy nearest neighbour in coordinates scaled to unit range (O(N^2))
+    span = np.ptp(points, axis=0)
+    scaled = points / np.where(span > 0, span, 1.0)
+    visited = np.zeros(len(points), dtype=bool)
+    order = np.empty(len(points), dtype=int)
+    current = 0
+    for k in range(len(points)):
+        order[k] = current
+        visited[current] = True
+        if k + 1 < len(points):
+            dist = np.sum((scaled - scaled[current]) ** 2, axis=1)
+            dist[visited] = np.inf
+            current = int(np.argmin(dist))
+    return order
+
+
+def _structure(model):
+    """Key of everything but the jump rates: equal keys differ by a rate scaling only"""
+    return (model.n_qubits, model.energies.tobytes(),
+            tuple((qubit, np.asarray(A, dtype=complex).tobytes()) for qubit, A, _ in model.jumps))
+
+
+def _steady_terms(model):
+    """Liouvillian terms with row 0 replaced by the trace row vec(I) (coefficient 1)"""
+    d = model.dim
+    hamiltonian, dissipators = model.liouvillian_terms()
+    keep = np.ones(d * d)
+    keep[0] = 0
+    mask = sps.diags(keep)
+    trace_row = sps.csr_matrix((np.ones(d), (np.zeros(d, dtype=int), np.arange(d) * (d + 1))),
+                               shape=(d * d, d * d), dtype=complex)
+    return [(mask @ term).tocsr() for term in [hamiltonian] + dissipators] + [trace_row]
+
+
+def continuation_sweep(factory, points, shape=None, mode='steady', tlist=None, tol=1e-10,
+                       branch_tol=0.02, refactor_iter=30, entropy=None, memory_budget=None):
+    """
+    Steady states (or final states) of factory(point) over a parameter sweep.
+
+    Args:
+        factory: point -> QubitLindbladModel; points where only the jump rates change
+            share one Liouvillian pattern and factorization
+        points: [N, k] parameter values (or [N]), e.g. from parameter_grid
+        shape: Grid shape of points (serpentine order); None for scattered points
+        mode: 'steady' (unique steady state) or 'evolve' (state at tlist[-1] from psi0)
+        tlist: Times of mode='evolve'; observables are taken at tlist[-1]
+        tol: Relative residual of the preconditioned GMRES solves
+        branch_tol: Relative distance from the predictor that flags a branch change
+        refactor_iter: GMRES iterations above which the LU factorization is renewed
+        entropy: Record von Neumann entropy (default: only when d <= 256)
+        memory_budget: Bytes available; checked on the first model with
+            run_planner.check_budget('sparse', ...)
+
+    Returns:
+        dict of arrays over the points (in their given order): 'purity', 'fidelity',
+        optional 'entropy', 'iterations' (GMRES, 0 where a factorization solved it
+        directly), 'branch' (flags); plus 'order' (visiting path), 'factorizations',
+        'points' and 'mode'
+
+    Raises:
+        ValueError: Unknown mode, or a steady state that is not unique (singular matrix)
+        ResourceBudgetError: The sparse Liouvillian does not fit the memory budget
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+    if refactor_iter < 1:
+        raise ValueError("refactor_iter must be at least 1")
+    if mode == 'evolve':
+        if tlist is None:
+            raise ValueError("mode='evolve' needs tlist")
+        tlist = np.asarray(tlist, dtype=float)
+    points = np.asarray(points, dtype=float)
+    points = points[:, None] if points.ndim == 1 else points
+    order = path_order(points, shape)
+    n_points = len(points)
+
+    obs = {'purity': np.empty(n_points), 'fidelity': np.empty(n_points)}
+    iterations = np.zeros(n_points, dtype=int)
+    branch = np.zeros(n_points, dtype=bool)
+    factorizations = 0
+
+    structure = combined = lu = None
+    history = []    # (point, vec) of the last two solved points on the path
+    for k, index in enumerate(order):
+        model = factory(points[index])
+        if k == 0:
+            d = model.dim
+            if entropy is None:
+                entropy = d <= 256
+            if entropy:
+                obs['entropy'] = np.empty(n_points)
+            check_budget('sparse', model.n_qubits, 1 if mode == 'steady' else len(tlist),
+                         budget=memory_budget, n_jumps=len(model.jumps), norm=model.norm_bound())
+        key = _structure(model)
+        if key != structure:
+            structure = key
+            if mode == 'steady':
+                terms = _steady_terms(model)
+            else:
+                hamiltonian, dissipators = model.liouvillian_terms()
+                terms = [hamiltonian] + dissipators
+            combined = CombinedLiouvillian(terms, complex)
+            lu = None
+        rates = [rate for _, _, rate in model.jumps]
+        if mode == 'steady':
+            M = combined([1.0] + rates + [1.0]).tocsc()
+            rhs = np.zeros(d * d, dtype=complex)
+            rhs[0] = 1.0
+            predictor = _predict(history, points[index])
+            v = None
+            if lu is not None:
+                count = [0]
+
+                def callback(_):
+                    count[0] += 1
+
+                precond = LinearOperator(M.shape, matvec=lu.solve, dtype=complex)
+                v, info = gmres(M, rhs, x0=predictor, atol=0.0, M=precond,
+                                restart=refactor_iter, maxiter=2, callback=callback,
+                                callback_type='pr_norm', **{GMRES_RTOL: tol})
+                iterations[index] = count[0]
+                if info != 0 or count[0] > refactor_iter:
+                    v = None
+            if v is None:
+                try:
+                    lu = splu(M, permc_spec='MMD_AT_PLUS_A')
+                except RuntimeError as exc:
+                    raise ValueError(f"No unique steady state at point {points[index]}: {exc}") from exc
+                factorizations += 1
+                v = lu.solve(rhs)
+            if predictor is not None:
+                branch[index] = (np.linalg.norm(v - predictor)
+                                 > branch_tol * np.linalg.norm(v))
+            # No secant across a branch change
+            history = [(points[index], v)] if branch[index] else (history + [(points[index], v)])[-2:]
+        else:
+            L = (tlist[-1] - tlist[0]) * combined([1.0] + rates)
+            v = expm_multiply(L, model.rho0.ravel(), traceA=L.diagonal().sum())
+            if history:
+                _, previous = history[-1]
+                branch[index] = np.linalg.norm(v - previous) > branch_tol * np.linalg.norm(v)
+            history = [(points[index], v)]
+        rho = v.reshape(1, d, d)
+        rho = 0.5 * (rho + rho.conj().transpose(0, 2, 1))
+        for name, value in _observables(model, rho, entropy).items():
+            obs[name][index] = value[0]
+
+    return {**obs, 'iterations': iterations, 'branch': branch, 'order': order,
+            'factorizations': factorizations, 'points': points, 'mode': mode}
+
+
+def _predict(history, point):
+    """Secant extrapolation along the path when the steps are aligned, else the last state"""
+    if not history:
+        return None
+    last_point, last = history[-1]
+    if len(history) < 2:
+        return last
+    prev_point, prev = history[0]
+    step, new = last_point - prev_point, point - last_point
+    norms = np.linalg.norm(step) * np.linalg.norm(new)
+    if norms == 0 or np.dot(step, new) < SECANT_ALIGNMENT * norms:
+        return last
+    return last + (last - prev) * (np.linalg.norm(new) / np.linalg.norm(step))
@@ -0,0 +1,274 @@
+# Fibonacci Anyon F-Symbol / Braid-Group Engine
+
+"""
+Numerical Fibonacci-anyon toolkit for the quasicrystal-code braiding predictions of
+ads_cft_anyon_deriv.py.
+
+Builds the F and R symbols, verifies the pentagon and hexagon identities, constructs
+braid-group generators on the fusion space of n tau anyons, and composes long braid
+words (10^4-10^6 letters) by batched matrix products with a log-depth pairwise
+reduction. Products of repeated fixed-length sub-words are cached.
+
+The F matrix is the F_any of ads_cft_anyon_deriv.py; the R symbols are the standard
+Fibonacci braiding phases (the script's exp(i*pi/(4*phi)) is only a proxy).
+"""
+
+from collections import OrderedDict
+from itertools import product
+
+import numpy as np
+
+# Golden ratio
+PHI = (1 + np.sqrt(5)) / 2
+PHI_INV = 1 / PHI
+
+# Anyon labels: vacuum (1) and tau
+VAC, TAU = 0, 1
+LABELS = (VAC, TAU)
+
+# F^{tau tau tau}_tau in the (e, f) = ((ab) channel, (bc) channel) basis
+F_MATRIX = np.array([[PHI_INV, np.sqrt(PHI_INV)],
+                     [np.sqrt(PHI_INV), -PHI_INV]])
+
+# R^{tau tau}_c braiding phases
+R_PHASES = np.array([np.exp(-4j * np.pi / 5), np.exp(3j * np.pi / 5)])
+
+
+def fusion_allowed(a, b, c):
+    """Fusion rule N_{ab}^c for 1 x x = x, tau x tau = 1 + tau."""
+    if a == VAC:
+        return b == c
+    if b == VAC:
+        return a == c
+    return True  # tau x tau contains both 1 and tau
+
+
+def f_symbol(a, b, c, d):
+    """
+    F-move [F^{abc}_d]_{ef} as a 2x2 array over (e, f).
+
+    Entries for inadmissible intermediate channels are zero.
+    """
+    if a == b == c == d == TAU:
+        return F_MATRIX.copy()
+    F = np.zeros((2, 2))
+    for e, f in product(LABELS, LABELS):
+        if (fusion_allowed(a, b, e) and fusion_allowed(e, c, d)
+                and fusion_allowed(b, c, f) and fusion_allowed(a, f, d)):
+            F[e, f] = 1.0
+    return F
+
+
+def r_symbol(a, b, c):
+    """Braiding phase R^{ab}_c (zero if c is not in a x b)."""
+    if not fusion_allowed(a, b, c):
+        return 0.0
+    if a == b == TAU:
+        return R_PHASES[c]
+    return 1.0
+
+
+def check_pentagon():
+    """
+    Maximum residual of the pentagon identity over all label assignments.
+
+    [F^{fcd}_e]_{gl} [F^{abl}_e]_{fk} = sum_h [F^{abc}_g]_{fh} [F^{ahd}_e]_{gk} [F^{bcd}_k]_{hl}
+    """
+    residual = 0.0
+    for a, b, c, d, e, f, g, k, l in product(LABELS, repeat=9):
+        lhs = f_symbol(f, c, d, e)[g, l] * f_symbol(a, b, l, e)[f, k]
+        rhs = sum(f_symbol(a, b, c, g)[f, h] * f_symbol(a, h, d, e)[g, k]
+                  * f_symbol(b, c, d, k)[h, l] for h in LABELS)
+        residual = max(residual, abs(lhs - rhs))
+    return residual
+
+
+def check_hexagon():
+    """
+    Maximum residual of both hexagon identities over all label assignments.
+
+    R^{ca}_e [F^{acb}_d]_{eg} R^{cb}_g = sum_f [F^{cab}_d]_{ef} R^{cf}_d [F^{abc}_d]_{fg}
+    and the same with every R replaced by its inverse.
+    """
+    residual = 0.0
+    for a, b, c, d, e, g in product(LABELS, repeat=6):
+        for power in (1, -1):
+            def R(x, y, z):
+                value = r_symbol(x, y, z)
+                return value if power == 1 or value == 0 else 1 / value
+            lhs = R(c, a, e) * f_symbol(a, c, b, d)[e, g] * R(c, b, g)
+            rhs = sum(f_symbol(c, a, b, d)[e, f] * R(c, f, d) * f_symbol(a, b, c, d)[f, g]
+                      for f in LABELS)
+            residual = max(residual, abs(lhs - rhs))
+    return residual
+
+
+def fusion_basis(n_anyons, total_charge=TAU):
+    """
+    Fusion-tree basis of n tau anyons.
+
+    Each basis state is a tuple (x_0, ..., x_{n-1}) where x_k is the total charge of
+    the first k+1 anyons, so x_0 = tau and x_{n-1} is the total charge.
+
+    Args:
+        n_anyons: Number of tau anyons (>= 2)
+        total_charge: Required total charge, or None for all sectors
+
+    Returns:
+        List of label tuples (dimension is a Fibonacci number)
+    """
+    if n_anyons < 2:
+        raise ValueError("Need at least two anyons to braid")
+    trees = [(TAU,)]
+    for _ in range(n_anyons - 1):
+        trees = [tree + (x,) for tree in trees for x in LABELS if fusion_allowed(tree[-1], TAU, x)]
+    if total_charge is not None:
+        trees = [tree for tree in trees if tree[-1] == total_charge]
+    return trees
+
+
+def braid_generators(n_anyons, total_charge=TAU):
+    """
+    Matrices of the braid generators sigma_1 ... sigma_{n-1} on the fusion space.
+
+    sigma_i exchanges anyons i and i+1 and acts on the tree label x_{i-1} through
+    (F R F^{-1})^T of the local F^{a tau tau}_d move, a = x_{i-2}, d = x_i.
+
+    Returns:
+        Complex array of shape (n_anyons - 1, dim, dim)
+    """
+    basis = fusion_basis(n_anyons, total_charge)
+    index = {tree: k for k, tree in enumerate(basis)}
+    dim = len(basis)
+    gens = np.zeros((n_anyons - 1, dim, dim), dtype=complex)
+    for i in range(1, n_anyons):
+        for tree in basis:
+            a = tree[i - 2] if i >= 2 else VAC
+            e, d = tree[i - 1], tree[i]
+            F = f_symbol(a, TAU, TAU, d)
+            R = np.array([r_symbol(TAU, TAU, f) for f in LABELS])
+            for e_new in LABELS:
+                amplitude = sum(F[e, f] * R[f] * F[e_new, f] for f in LABELS)
+                if amplitude != 0:
+                    new_tree = tree[:i - 1] + (e_new,) + tree[i:]
+                    gens[i - 1, index[new_tree], index[tree]] += amplitude
+    return gens
+
+
+def random_braid_word(length, n_anyons=3, rng=None):
+    """Random braid word: letters +-i stand for sigma_i^{+-1}."""
+    rng = np.random.default_rng(rng)
+    letters = rng.integers(1, n_anyons, size=length)
+    signs = rng.choice(np.array([-1, 1]), size=length)
+    return letters * signs
+
+
+def _tree_product(mats):
+    """Ordered product mats[-1] @ ... @ mats[0] by log-depth pairwise reduction."""
+    while mats.shape[0] > 1:
+        if mats.shape[0] % 2:
+            last = mats[-1:]
+            mats = np.concatenate([np.matmul(mats[1:-1:2], mats[0:-1:2]), last])
+        else:
+            mats = np.matmul(mats[1::2], mats[0::2])
+    return mats[0]
+
+
+class BraidCompiler:
+    """
+    Compose long braid words on the fusion space of n tau anyons.
+
+    The word is split into blocks of fixed length; each block is reduced with batched
+    matrix products in log depth and its product is cached by content, so repeated
+    sub-words (periodic quasicrystal braids) are only multiplied once.
+
+    Args:
+        n_anyons: Number of tau anyons
+        total_charge: Fusion sector (TAU, VAC or None for all)
+        block_size: Letters per cached block
+        cache_size: Maximum number of cached block products
+    """
+
+    def __init__(self, n_anyons=3, total_charge=TAU, block_size=256, cache_size=4096):
+        self.n_anyons = n_anyons
+        self.block_size = block_size
+        self.cache_size = cache_size
+        gens = braid_generators(n_anyons, total_charge)
+        self.dim = gens.shape[1]
+        # Letter table: index n-1+k holds sigma_k, n-1-k holds sigma_k^{-1}
+        inverses = np.conj(np.transpose(gens, (0, 2, 1)))
+        self._letters = np.concatenate([inverses[::-1], np.eye(self.dim)[None], gens])
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _block_product(self, block):
+        key = block.tobytes()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        result = _tree_product(self._letters[block + (self.n_anyons - 1)])
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def compose(self, word):
+        """
+        Unitary of a braid word (first letter acts first).
+
+        Args:
+            word: Integer sequence with letters in +-1 ... +-(n_anyons-1)
+
+        Returns:
+            (dim, dim) complex matrix
+        """
+        word = np.asarray(word, dtype=np.int64)
+        if word.size == 0:
+            return np.eye(self.dim, dtype=complex)
+        if np.any(word == 0) or np.any(np.abs(word) >= self.n_anyons):
+            raise ValueError(f"Braid letters must be in +-1..+-{self.n_anyons - 1}")
+        blocks = [self._block_product(word[start:start + self.block_size])
+                  for start in range(0, word.size, self.block_size)]
+        return _tree_product(np.stack(blocks))
+
+    def compose_many(self, words):
+        """Unitaries for a batch of braid words, shape (len(words), dim, dim)."""
+        return np.stack([self.compose(word) for word in words])
+
+
+def compose_braid(word, n_anyons=3, total_charge=TAU):
+    """Convenience wrapper: unitary of a single braid word."""
+    return BraidCompiler(n_anyons, total_charge).compose(word)
+
+
+if __name__ == "__main__":
+    import time
+
+    print("Fibonacci anyon consistency checks:")
+    print(f"  Pentagon residual: {check_pentagon():.2e}")
+    print(f"  Hexagon residual:  {check_hexagon():.2e}")
+    print(f"  Det(F) = {np.linalg.det(F_MATRIX):.6f} (ads_cft_anyon_deriv.py F_any)")
+
+    for n in (3, 4, 6):
+        gens = braid_generators(n)
+        yb = max(np.abs(gens[i] @ gens[i + 1] @ gens[i] - gens[i + 1] @ gens[i] @ gens[i + 1]).max()
+                 for i in range(n - 2))
+        print(f"  n={n}: fusion dim {gens.shape[1]}, Yang-Baxter residual {yb:.2e}")
+
+    compiler = BraidCompiler(n_anyons=4)
+    # Quasicrystal-style word: a Fibonacci substitution sequence over sigma_1, sigma_2
+    seq = [1]
+    while len(seq) < 1_000_000:
+        seq = [x for s in seq for x in ((1, 2) if s == 1 else (1,))]
+    word = np.array(seq[:1_000_000]) * np.where(np.arange(1_000_000) % 3 == 0, -1, 1)
+    start = time.perf_counter()
+    U = compiler.compose(word)
+    elapsed = time.perf_counter() - start
+    print(f"\nComposed {word.size:,}-letter braid on 4 anyons in {elapsed:.3f} s "
+          f"(cache hits {compiler.hits}, misses {compiler.misses})")
+    print(f"  Unitarity error: {np.abs(U @ U.conj().T - np.eye(compiler.dim)).max():.2e}")
+    print(f"  |Tr U| = {abs(np.trace(U)):.6f}")
@@ -0,0 +1,237 @@
+# Opt-in Stage Timing and Memory Instrumentation
+
+"""
+Lightweight instrumentation for the PQRG simulations.
+
+Code is annotated with named stages:
+
+    from instrumentation import stage, timed
+
+    with stage('mesolve', 'solver'):
+        result = qt.mesolve(...)
+
+    @timed(category='render')
+    def create_rg_flow_diagram(): ...
+
+Categories follow the pipeline of the scripts: setup, operators, solver, observables,
+io and render. Each finished stage records wall time, CPU time (process-wide) and,
+with memory tracking on, the peak traced allocation during the stage (tracemalloc,
+which also sees NumPy buffers). Stages nest, and child peaks propagate to parents.
+
+Recording is off by default and a disabled stage() costs one attribute check. Enable it
+with enable() or with the environment:
+
+    PQRG_PROFILE=1            record timings
+    PQRG_PROFILE=memory       record timings and peak memory
+    PQRG_PROFILE_OUT=prefix   write prefix.json and prefix.trace.json at exit
+
+The .trace.json file opens in chrome://tracing or Perfetto.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Stage categories used across the simulations
+CATEGORIES = ('setup', 'operators', 'solver', 'observables', 'io', 'render')
+
+
+class Recorder:
+    """
+    Collects stage records.
+
+    Parameters:
+    enabled: Record stages
+    memory: Track peak memory with tracemalloc (slows allocation-heavy Python code)
+    """
+
+    def __init__(self, enabled=False, memory=False):
+        self.enabled = False
+        self.memory = False
+        self._owns_tracing = False
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        if enabled:
+            self.enable(memory)
+
+    def enable(self, memory=False):
+        """Start recording (and peak-memory tracking if memory=True)"""
+        self.enabled = True
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+
+    def disable(self):
+        """Stop recording; already collected records are kept"""
+        self.enabled = False
+        # tracemalloc started by someone else keeps running
+        if self._owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._owns_tracing = False
+        self.memory = False
+
+    def reset(self):
+        """Drop all records"""
+        with self._lock:
+            self.records = []
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name, category=None, **args):
+        """Record the enclosed block as a stage (no-op while disabled)"""
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        frame = {'peak': 0}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        stack.append(frame)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            stack.pop()
+            record = {
+                'name': name,
+                'category': category or 'other',
+                'start': wall_start - self._origin,
+                'wall': wall,
+                'cpu': cpu,
+                'depth': len(stack),
+                'thread': threading.get_ident(),
+            }
+            if self.memory:
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_bytes'] = frame['peak']
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], frame['peak'])
+                tracemalloc.reset_peak()
+            if args:
+                record['args'] = args
+            with self._lock:
+                self.records.append(record)
+
+    def timed(self, name=None, category=None):
+        """Decorator recording every call of the function as a stage"""
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*a, **kw):
+                if not self.enabled:
+                    return func(*a, **kw)
+                with self.stage(label, category):
+                    return func(*a, **kw)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """Totals per stage name: calls, wall, cpu and maximum peak memory"""
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for r in records:
+            entry = totals.setdefault(r['name'], {'category': r['category'], 'calls': 0,
+                                                  'wall': 0.0, 'cpu': 0.0})
+            entry['calls'] += 1
+            entry['wall'] += r['wall']
+            entry['cpu'] += r['cpu']
+            if 'peak_bytes' in r:
+                entry['peak_bytes'] = max(entry.get('peak_bytes', 0), r['peak_bytes'])
+        return totals
+
+    def report(self, file=None):
+        """Print the summary sorted by wall time"""
+        file = file or sys.stdout
+        rows = sorted(self.summary().items(), key=lambda item: -item[1]['wall'])
+        print(f"{'stage':<32} {'category':<12} {'calls':>6} {'wall [s]':>10} {'cpu [s]':>10} "
+              f"{'peak [MB]':>10}", file=file)
+        for name, e in rows:
+            peak = f"{e['peak_bytes'] / 2**20:>10.1f}" if 'peak_bytes' in e else f"{'-':>10}"
+            print(f"{name:<32} {e['category']:<12} {e['calls']:>6} {e['wall']:>10.4f} "
+                  f"{e['cpu']:>10.4f} {peak}", file=file)
+
+    def to_json(self, path):
+        """Write records, summary and process peak RSS as JSON"""
+        with self._lock:
+            records = list(self.records)
+        payload = {'records': records, 'summary': self.summary(), 'max_rss_bytes': max_rss_bytes()}
+        with open(path, 'w') as f:
+            json.dump(payload, f, indent=1)
+
+    def to_chrome_trace(self, path):
+        """Write the records in Chrome trace-event format (complete 'X' events)"""
+        with self._lock:
+            records = list(self.records)
+        pid = os.getpid()
+        events = []
+        for r in records:
+            args = {'cpu_s': r['cpu'], **r.get('args', {})}
+            if 'peak_bytes' in r:
+                args['peak_MB'] = r['peak_bytes'] / 2**20
+            events.append({'name': r['name'], 'cat': r['category'], 'ph': 'X', 'pid': pid,
+                           'tid': r['thread'], 'ts': r['start'] * 1e6, 'dur': r['wall'] * 1e6,
+                           'args': args})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def max_rss_bytes():
+    """Peak resident set size of the process (None where unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+# Process-wide recorder used by the module-level helpers
+RECORDER = Recorder()
+stage = RECORDER.stage
+timed = RECORDER.timed
+report = RECORDER.report
+
+
+def enable(memory=False):
+    """Enable the process-wide recorder"""
+    RECORDER.enable(memory)
+
+
+def disable():
+    """Disable the process-wide recorder"""
+    RECORDER.disable()
+
+
+def _export_at_exit(prefix):
+    if RECORDER.records:
+        RECORDER.to_json(prefix + '.json')
+        RECORDER.to_chrome_trace(prefix + '.trace.json')
+
+
+_mode = os.environ.get('PQRG_PROFILE', '').strip().lower()
+if _mode and _mode not in ('0', 'false', 'off'):
+    enable(memory=_mode == 'memory')
+    if os.environ.get('PQRG_PROFILE_OUT'):
+        atexit.register(_export_at_exit, os.environ['PQRG_PROFILE_OUT'])
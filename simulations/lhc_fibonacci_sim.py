@@ -9,6 +9,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.constants import golden  # φ ≈ 1.618
 
+from precision import real_dtype
+
 # PQRG parameters
 N_r = 0.641681  # Paradox density threshold
 E_0 = 6.5  # Baseline energy per nucleon in TeV (LHC Pb-Pb analog, scaled for O-Ne)
@@ -19,17 +21,23 @@ n_max = 5  # Number of Fibonacci-scaled pulses (n=0 to 5)
 # Toy model: Asymmetry peaks at energies ~ N_r TeV with φ-modulation
 # A(E) = N_r * sin(2 * π * E / φ) * exp(- (E - N_r)^2 / (2 * 0.1^2))  # Gaussian peak at N_r
 
-def t_violation_asymmetry(E):
+def t_violation_asymmetry(E, precision='double'):
     """
     Calculate T-violation asymmetry for given energy.
     
     Args:
         E: Energy in TeV/nucleon
+        precision: 'double' (float64) or 'single' (float32, for large scans;
+            see precision.checked_sweep)
         
     Returns:
         T-violation asymmetry amplitude
     """
-    return N_r * np.sin(2 * np.pi * E / phi) * np.exp(- (E - N_r)**2 / (2 * 0.1**2))
+    dtype = real_dtype(precision)
+    E = np.asarray(E, dtype=dtype)
+    # Constants in the working dtype so float32 scans stay float32
+    n_r, freq, width = dtype(N_r), dtype(2 * np.pi / phi), dtype(1 / (2 * 0.1**2))
+    return n_r * np.sin(freq * E) * np.exp(-(E - n_r)**2 * width)
 
 def run_lhc_fibonacci_simulation():
     """
@@ -0,0 +1,371 @@
+# Matrix-Product Density-Operator Backend for Long Qubit Chains
+
+"""
+Master-equation evolution of 20-100 qubit chains with per-qubit damping.
+
+When the qubits are damped at different rates the dynamics is no longer permutation
+symmetric (symmetric_lindblad.py), but the structure that remains is still small: the
+Hamiltonian c P x ... x P (sigma_z x ... x sigma_z for ethical_agi_circuit) is a single
+product operator and every jump acts on one qubit. rho is stored as a matrix-product
+density operator, one tensor [chi_left, 4, chi_right] per qubit, whose middle index is
+the row-major vec of the single-site matrix (e_00, e_01, e_10, e_11 as in
+symmetric_lindblad.site_superoperator).
+
+One time step dt is a Strang splitting D(dt/2) U(dt) D(dt/2):
+
+- D: the 4 x 4 propagator expm(dt sum_j rate_j D[A_j]) of each qubit, exact for any
+  rate (stiff ethical rates need no small steps) and without bond growth
+- U: rho -> e^{-i theta P^n} rho e^{i theta P^n}, theta = c dt. Since (P^n)^2 = 1 this is
+  cos^2 rho - i cos sin (P^n rho - rho P^n) + sin^2 P^n rho P^n, a sum of four product
+  superoperators: an MPO of bond dimension 4, applied exactly and then compressed
+
+Compression is a QR sweep followed by an SVD sweep that keeps at most max_bond singular
+values per bond and drops the smallest ones while their relative weight stays below
+cutoff. The discarded weight sum_dropped s^2 / sum s^2 is accumulated between outputs and
+reported per output step ('truncation_error'), next to the largest bond dimension.
+
+Purity (Tr rho^2 = |vec rho|^2), fidelity, trace and single-qubit states are tensor
+contractions of cost O(n chi^3). The von Neumann entropy needs the spectrum of rho and is
+not computed; the Renyi-2 entropy -log Tr rho^2 is reported instead, as in the symmetric
+backend. Truncation can leave rho slightly non-positive; the trace is renormalised after
+every compression.
+"""
+
+import numpy as np
+import scipy.linalg
+
+from lindblad_engine import DESTROY, SIGMA_Z
+from precision import complex_dtype
+from symmetric_lindblad import ethical_circuit_rates, site_superoperator
+
+# Largest bond dimension kept by default
+DEFAULT_MAX_BOND = 64
+
+# Relative discarded weight per bond accepted without counting against max_bond
+DEFAULT_CUTOFF = 1e-12
+
+# Strang step (the parity Hamiltonian has unit norm)
+DEFAULT_DT = 0.05
+
+# vec of the single-site identity
+_VEC_EYE = np.eye(2).ravel()
+
+
+class ChainLindbladModel:
+    """
+    n-qubit chain with H = coupling P x ... x P and single-qubit jumps.
+
+    Parameters:
+    n_qubits: Number of qubits
+    jumps: Iterable of (qubit, 2x2 operator, rate); duplicates are merged
+    coupling: Prefactor c of the product Hamiltonian
+    pauli: Hermitian single-site operator with P^2 = 1 (default sigma_z)
+    phis: Single-qubit initial kets [n, 2] or one ket for every qubit (default |+>)
+    """
+
+    def __init__(self, n_qubits, jumps, coupling=1.0, pauli=None, phis=None):
+        self.n_qubits = n = n_qubits
+        self.coupling = float(coupling)
+        P = np.diag(SIGMA_Z).astype(complex) if pauli is None else np.asarray(pauli, dtype=complex)
+        if not (np.allclose(P, P.conj().T) and np.allclose(P @ P, np.eye(2))):
+            raise ValueError("pauli must be Hermitian with P^2 = 1")
+        self.pauli = P
+        merged = {}
+        for qubit, op, rate in jumps:
+            if not 0 <= qubit < n:
+                raise ValueError(f"Jump on qubit {qubit} outside 0..{n - 1}")
+            if rate < 0:
+                raise ValueError("Jump rates must be non-negative")
+            op = np.asarray(op, dtype=complex)
+            key = (qubit, op.tobytes())
+            merged[key] = (qubit, op, merged.get(key, (0, 0, 0.0))[2] + rate)
+        self.jumps = [jump for jump in merged.values() if jump[2] > 0]
+        phis = np.full(2, 2 ** -0.5, dtype=complex) if phis is None else np.asarray(phis, dtype=complex)
+        phis = np.broadcast_to(phis, (n, 2))
+        self.phis = phis / np.linalg.norm(phis, axis=1, keepdims=True)
+
+    def rates(self, op=DESTROY):
+        """Rate of one jump operator on every qubit, [n]"""
+        op = np.asarray(op, dtype=complex)
+        out = np.zeros(self.n_qubits)
+        for qubit, A, rate in self.jumps:
+            if np.array_equal(A, op):
+                out[qubit] += rate
+        return out
+
+    def site_generators(self):
+        """4 x 4 dissipator sum_j rate_j D[A_j] of every qubit, [n, 4, 4]"""
+        D = np.zeros((self.n_qubits, 4, 4), dtype=complex)
+        for qubit, A, rate in self.jumps:
+            D[qubit] += site_superoperator(A, rate)
+        return D
+
+    def initial_state(self, dtype=complex):
+        """Product MPDO of |psi0><psi0|, bond dimension 1"""
+        return [np.outer(phi, phi.conj()).reshape(1, 4, 1).astype(dtype) for phi in self.phis]
+
+    def norm_bound(self):
+        """Upper bound on the norm of the Liouvillian"""
+        return 2 * abs(self.coupling) + sum(2 * rate * np.linalg.norm(A, 2) ** 2
+                                            for _, A, rate in self.jumps)
+
+
+def chain_ethical_model(n_qubits, mu_c=0.85, eta_Yb=0.92, PLV_j=0.71, scale=10.0, damping=None):
+    """
+    ethical_agi_circuit model as a chain, with optional per-qubit rate multipliers.
+
+    The merged rate of qubit q (ethical_circuit_rates, closed form) is multiplied by
+    damping[q], so heterogeneous circuits never enumerate the 2^n collapse operators.
+    """
+    rates = ethical_circuit_rates(n_qubits, mu_c, eta_Yb, PLV_j, scale)
+    if damping is not None:
+        rates = rates * np.broadcast_to(np.asarray(damping, dtype=float), rates.shape)
+    return ChainLindbladModel(n_qubits, [(q, DESTROY, rate) for q, rate in enumerate(rates)])
+
+
+def from_model(model, tol=1e-10):
+    """
+    Chain form of a lindblad_engine.QubitLindbladModel.
+
+    Raises:
+        ValueError: The energies are not c sigma_z x ... x sigma_z, or psi0 is entangled
+    """
+    from lindblad_engine import parity_energies
+
+    parity = parity_energies(model.n_qubits)
+    coupling = model.energies @ parity / model.dim
+    if not np.allclose(model.energies, coupling * parity):
+        raise ValueError("Energies are not a multiple of sigma_z x ... x sigma_z")
+    phis = []
+    rest = model.psi0.reshape(1, -1)
+    for _ in range(model.n_qubits):
+        u, s, vh = np.linalg.svd(rest.reshape(2, -1), full_matrices=False)
+        if s.size > 1 and s[1] > tol * s[0]:
+            raise ValueError("psi0 is not a product state")
+        phis.append(u[:, 0])
+        rest = s[0] * vh[:1]
+    phis[-1] = phis[-1] * rest.ravel()[0]
+    return ChainLindbladModel(model.n_qubits, model.jumps, coupling, phis=np.array(phis))
+
+
+# MPDO operations ------------------------------------------------------------------------
+
+def _apply_sites(tensors, propagators):
+    """Single-site superoperators [n, 4, 4] on every tensor (no bond growth)"""
+    return [np.matmul(G, A) for G, A in zip(propagators, tensors)]
+
+
+def _apply_product_hamiltonian(tensors, pauli, theta):
+    """
+    e^{-i theta P^n} rho e^{i theta P^n} as a bond-4 MPO with terms
+    (cos^2, 1), (-i cos sin, P x 1), (i cos sin, 1 x P^T), (sin^2, P x P^T) per site.
+    """
+    eye = np.eye(2)
+    ops = np.array([np.eye(4), np.kron(pauli, eye), np.kron(eye, pauli.T), np.kron(pauli, pauli.T)])
+    c, s = np.cos(theta), np.sin(theta)
+    coefficients = np.array([c * c, -1j * c * s, 1j * c * s, s * s])
+    n = len(tensors)
+    if n == 1:
+        G = np.einsum('a,ats->ts', coefficients, ops)
+        return [np.matmul(G, tensors[0]).astype(tensors[0].dtype)]
+    out = []
+    for q, A in enumerate(tensors):
+        terms = np.matmul(ops[:, None], A[None]).astype(A.dtype)
+        if q == 0:
+            terms = coefficients[:, None, None, None].astype(A.dtype) * terms
+            out.append(np.concatenate(list(terms), axis=2))
+        elif q == n - 1:
+            out.append(np.concatenate(list(terms), axis=0))
+        else:
+            chi_l, _, chi_r = A.shape
+            B = np.zeros((4 * chi_l, 4, 4 * chi_r), dtype=A.dtype)
+            for a in range(4):
+                B[a * chi_l:(a + 1) * chi_l, :, a * chi_r:(a + 1) * chi_r] = terms[a]
+            out.append(B)
+    return out
+
+
+def _compress(tensors, max_bond, cutoff):
+    """
+    QR sweep left to right, then truncated SVD sweep right to left (in place).
+
+    Returns the discarded weight, summed over bonds, relative to |vec rho|^2.
+    """
+    n = len(tensors)
+    for q in range(n - 1):
+        chi_l, _, chi_r = tensors[q].shape
+        Q, R = np.linalg.qr(tensors[q].reshape(chi_l * 4, chi_r))
+        tensors[q] = Q.reshape(chi_l, 4, -1)
+        tensors[q + 1] = (R @ tensors[q + 1].reshape(chi_r, -1)).reshape(R.shape[0], 4, -1)
+    discarded = 0.0
+    for q in range(n - 1, 0, -1):
+        chi_l, _, chi_r = tensors[q].shape
+        U, S, Vh = np.linalg.svd(tensors[q].reshape(chi_l, 4 * chi_r), full_matrices=False)
+        weight = S.astype(float) ** 2
+        total = weight.sum()
+        if total == 0:
+            keep = 1
+        else:
+            # tail[k] = weight dropped when k values are kept
+            tail = np.concatenate([np.cumsum(weight[::-1])[::-1], [0.0]]) / total
+            keep = min(max_bond, int(np.argmax(tail <= cutoff)))
+            keep = max(keep, 1)
+            discarded += tail[keep]
+        tensors[q] = Vh[:keep].reshape(keep, 4, chi_r)
+        left = tensors[q - 1]
+        tensors[q - 1] = (left.reshape(-1, chi_l) @ (U[:, :keep] * S[:keep])).reshape(left.shape[0], 4, keep)
+    return discarded
+
+
+def contract_product(tensors, vectors):
+    """<vectors|vec rho> for one length-4 vector per site, [n, 4] (or one for all sites)"""
+    vectors = np.broadcast_to(vectors, (len(tensors), 4))
+    env = np.ones(1, dtype=complex)
+    for A, v in zip(tensors, vectors):
+        env = env @ np.einsum('lsr,s->lr', A, v)
+    return env[0]
+
+
+def mpdo_trace(tensors):
+    return contract_product(tensors, _VEC_EYE).real
+
+
+def mpdo_purity(tensors):
+    """Tr rho^2 = sum |rho_ij|^2 for Hermitian rho"""
+    env = np.ones((1, 1), dtype=complex)
+    for A in tensors:
+        env = np.einsum('ab,asr,bsq->rq', env, A.conj(), A)
+    return env[0, 0].real
+
+
+def mpdo_single_qubit_rdms(tensors):
+    """Reduced state of every qubit, [n, 2, 2]"""
+    n = len(tensors)
+    traced = [np.einsum('lsr,s->lr', A, _VEC_EYE) for A in tensors]
+    left = [np.ones(1, dtype=complex)]
+    for M in traced[:-1]:
+        left.append(left[-1] @ M)
+    right = [np.ones(1, dtype=complex)]
+    for M in traced[:0:-1]:
+        right.append(M @ right[-1])
+    right = right[::-1]
+    rdms = np.array([np.einsum('l,lsr,r->s', left[q], tensors[q], right[q]) for q in range(n)])
+    return rdms.reshape(n, 2, 2)
+
+
+def bond_dimensions(tensors):
+    return [A.shape[2] for A in tensors[:-1]]
+
+
+def evolve_mpdo(model, tlist, max_bond=DEFAULT_MAX_BOND, cutoff=DEFAULT_CUTOFF, dt=DEFAULT_DT,
+                store_states=False, precision='double'):
+    """
+    Evolve a ChainLindbladModel as an MPDO and record observables at tlist.
+
+    Args:
+        model: ChainLindbladModel (lindblad_engine models via from_model)
+        tlist: Output times; each interval is split into Strang steps of at most dt
+        max_bond: Largest bond dimension kept
+        cutoff: Relative weight per bond that may be discarded below max_bond
+        dt: Largest Strang step (splitting error O(dt^2) per unit time)
+        store_states: Keep the MPDO tensors of every output time ('states')
+        precision: 'double' or 'single' (complex64 tensors)
+
+    Returns:
+        dict with 't', 'purity', 'fidelity', 'renyi2_entropy', 'trace' (before
+        renormalisation), 'truncation_error' (weight discarded since the previous output),
+        'bond_dimension' (largest bond per output), 'single_qubit_rdms' (final, [n, 2, 2]),
+        'final_state' (list of tensors), optional 'states' and 'backend' = 'mpdo'
+    """
+    tlist = np.asarray(tlist, dtype=float)
+    cdtype = complex_dtype(precision)
+    generators = model.site_generators()
+    fidelity_vectors = np.array([np.outer(phi.conj(), phi).ravel() for phi in model.phis])
+    tensors = model.initial_state(cdtype)
+    cache = {}
+
+    def propagators(h):
+        key = round(h, 12)
+        if key not in cache:
+            cache[key] = np.array([scipy.linalg.expm(0.5 * h * G) for G in generators]).astype(cdtype)
+        return cache[key]
+
+    T = len(tlist)
+    obs = {key: np.empty(T) for key in ('purity', 'fidelity', 'trace', 'truncation_error')}
+    obs['bond_dimension'] = np.empty(T, dtype=int)
+    states = [] if store_states else None
+    trace, discarded = 1.0, 0.0
+    for k in range(T):
+        if k > 0:
+            span = tlist[k] - tlist[k - 1]
+            n_steps = max(1, int(np.ceil(span / dt - 1e-9)))
+            h = span / n_steps
+            half = propagators(h)
+            for _ in range(n_steps):
+                tensors = _apply_sites(tensors, half)
+                tensors = _apply_product_hamiltonian(tensors, model.pauli, model.coupling * h)
+                discarded += _compress(tensors, max_bond, cutoff)
+                tensors = _apply_sites(tensors, half)
+                trace = mpdo_trace(tensors)
+                tensors[0] = tensors[0] / cdtype(trace)
+        obs['purity'][k] = mpdo_purity(tensors)
+        obs['fidelity'][k] = np.sqrt(max(contract_product(tensors, fidelity_vectors).real, 0))
+        obs['trace'][k] = trace
+        obs['truncation_error'][k] = discarded
+        obs['bond_dimension'][k] = max(bond_dimensions(tensors), default=1)
+        discarded = 0.0
+        if states is not None:
+            states.append([A.copy() for A in tensors])
+
+    result = {
+        't': tlist,
+        **obs,
+        'renyi2_entropy': -np.log(obs['purity']),
+        'single_qubit_rdms': mpdo_single_qubit_rdms(tensors),
+        'final_state': tensors,
+        'backend': 'mpdo',
+    }
+    if states is not None:
+        result['states'] = states
+    return result
+
+
+def to_dense(tensors):
+    """Full density matrix of a (small) MPDO, [2^n, 2^n]"""
+    vec = np.ones((1, 1), dtype=complex)
+    for A in tensors:
+        vec = np.einsum('pl,lsr->psr', vec, A).reshape(-1, A.shape[2])
+    n = len(tensors)
+    # Index order (a0 b0 a1 b1 ...) -> (a0 a1 ... b0 b1 ...)
+    rho = vec.reshape((2, 2) * n).transpose(list(range(0, 2 * n, 2)) + list(range(1, 2 * n, 2)))
+    return rho.reshape(2 ** n, 2 ** n)
+
+
+if __name__ == "__main__":
+    import time
+
+    from lindblad_engine import QubitLindbladModel, evolve, parity_energies
+
+    # Accuracy against the exact engine with heterogeneous damping
+    n = 6
+    rng = np.random.default_rng(0)
+    rates = rng.uniform(0.05, 1.0, n)
+    full = QubitLindbladModel(n, parity_energies(n), [(q, DESTROY, r) for q, r in enumerate(rates)])
+    tlist = np.linspace(0, 10, 101)
+    reference = evolve(full, tlist, backend='sparse')
+    for step in (0.1, 0.05, 0.02):
+        run = evolve_mpdo(from_model(full), tlist, dt=step)
+        print(f"{n} qubits, dt = {step}: max |purity - exact| = "
+              f"{np.abs(run['purity'] - reference['purity']).max():.1e}, "
+              f"bond dimension {run['bond_dimension'].max()}")
+
+    # Long chains: ethical rates rescaled to ~0.07 per qubit, with a linear damping gradient
+    for n in (20, 50, 100):
+        model = chain_ethical_model(n, scale=0.1 * n / 2.0 ** n, damping=np.linspace(0.2, 2.0, n))
+        start = time.perf_counter()
+        run = evolve_mpdo(model, tlist, max_bond=32)
+        elapsed = time.perf_counter() - start
+        local = np.einsum('qij,qji->q', run['single_qubit_rdms'], run['single_qubit_rdms']).real
+        print(f"{n:>3} qubits: final purity {run['purity'][-1]:.3e}, single-qubit purity "
+              f"{local.min():.3f}..{local.max():.3f}, bond {run['bond_dimension'].max()}, "
+              f"truncation {run['truncation_error'].sum():.1e} ({elapsed:.1f} s)")
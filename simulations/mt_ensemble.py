@@ -0,0 +1,268 @@
+# Stochastic Ensemble Simulator for Microtubule RhoA Dynamics
+
+"""
+Ensemble version of mt_dynamics_sim.py.
+
+Instead of one deterministic sigmoid scaled by 1.10 (PLV_j boost) and 0.95 (retrocausal
+eraser), every trajectory is a stochastic RhoA activation process on n_molecules
+molecules:
+
+- activation propensity   m_j k_on(t) (N - A),  k_on(t) = max_rate / (1 + exp(-k (t - t0)))
+- deactivation propensity k_off A
+
+with the PLV_j multiplier m_j = 1 + boost * PLV_j / 0.71 (= 1.10 at the PLV_j of
+mt_dynamics_sim.py), optionally drawn per trajectory from a Beta distribution of PLV_j.
+Active RhoA protects the coherence channel: it decoheres with hazard
+decay (1 - A / N), and the first decoherence event defines the coherence time.
+
+Trajectories are advanced with binomial tau-leaping (or the chemical Langevin SDE),
+vectorized across the ensemble, compacted as they decohere, and chunks are spread over
+worker threads with independent seeded generators, so results depend only on the seed.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# PLV_j of mt_dynamics_sim.py, at which the multiplier equals 1 + boost
+PLV_REF = 0.71
+
+# Model parameters (mt_dynamics_sim.py values where the script fixes them)
+DEFAULT_PARAMS = {
+    'PLV_j': PLV_REF,           # Phase-locking value of the coherence channels
+    'boost': 0.10,              # ~10% RhoA rate boost at PLV_REF
+    'retrocausal_diff': 0.05,   # ~5% eraser difference
+    'max_rate': 1.0,            # Sigmoid activation rate
+    'k': 0.5,
+    't0': 5.0,
+    'k_off': 0.5,               # RhoA deactivation rate
+    'decay': 0.1,               # Decoherence hazard without active RhoA
+    'n_molecules': 200,
+}
+
+CONDITIONS = ('baseline', 'modified', 'eraser')
+
+METHODS = ('tau_leap', 'cle')
+
+
+def activation_rate(t, max_rate=1.0, k=0.5, t0=5.0):
+    """Sigmoid RhoA activation rate of mt_dynamics_sim.py"""
+    return max_rate / (1 + np.exp(-k * (t - t0)))
+
+
+def rate_multipliers(n, condition='modified', params=None, plv_concentration=None, rng=None):
+    """
+    Per-trajectory RhoA rate multipliers and PLV_j values.
+
+    Args:
+        n: Number of trajectories
+        condition: 'baseline' (no boost), 'modified' (PLV_j boost) or 'eraser'
+            (boost reduced by retrocausal_diff)
+        params: Overrides of DEFAULT_PARAMS
+        plv_concentration: If given, PLV_j ~ Beta with mean PLV_j and this
+            concentration (alpha + beta); otherwise PLV_j is fixed
+        rng: numpy Generator or seed
+
+    Returns:
+        (multiplier, plv) arrays of length n
+    """
+    if condition not in CONDITIONS:
+        raise ValueError(f"condition must be one of {CONDITIONS}")
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    rng = np.random.default_rng(rng)
+    if plv_concentration is None:
+        plv = np.full(n, p['PLV_j'])
+    else:
+        plv = rng.beta(p['PLV_j'] * plv_concentration, (1 - p['PLV_j']) * plv_concentration, size=n)
+    if condition == 'baseline':
+        return np.ones(n), plv
+    multiplier = 1 + p['boost'] * plv / PLV_REF
+    if condition == 'eraser':
+        multiplier *= 1 - p['retrocausal_diff']
+    return multiplier, plv
+
+
+def _simulate_chunk(multiplier, p, t_max, dt, method, record_steps, rng):
+    """Advance one chunk until every trajectory has decohered or t_max is reached."""
+    n = multiplier.size
+    N = p['n_molecules']
+    n_steps = int(round(t_max / dt))
+    coherence_time = np.full(n, t_max)
+    censored = np.ones(n, dtype=bool)
+    active_sum = np.zeros(len(record_steps))
+    active_sq = np.zeros(len(record_steps))
+    record_index = {step: i for i, step in enumerate(record_steps)}
+    last_record = max(record_steps, default=-1)
+
+    # Working set: trajectories still coherent, plus all of them while records are pending
+    idx = np.arange(n)
+    m = multiplier.copy()
+    a = np.zeros(n)  # active fraction A / N
+    # Decoherence when the integrated hazard crosses an Exp(1) threshold
+    remaining = rng.exponential(size=n)
+    p_off = -np.expm1(-p['k_off'] * dt)
+
+    for step in range(n_steps + 1):
+        if step in record_index:
+            i = record_index[step]
+            active_sum[i] += a.sum()
+            active_sq[i] += (a ** 2).sum()
+        if step > last_record:
+            keep = censored[idx]
+            if not keep.all():
+                idx, m, a, remaining = idx[keep], m[keep], a[keep], remaining[keep]
+        if step == n_steps or idx.size == 0:
+            break
+        t = step * dt
+        hazard = p['decay'] * (1 - a) * dt
+        coherent = censored[idx]
+        remaining -= np.where(coherent, hazard, 0.0)
+        hit = coherent & (remaining <= 0)
+        if hit.any():
+            # Linear interpolation of the crossing time inside the step
+            coherence_time[idx[hit]] = t + (1 + remaining[hit] / hazard[hit]) * dt
+            censored[idx[hit]] = False
+        k_on = m * activation_rate(t + 0.5 * dt, p['max_rate'], p['k'], p['t0'])
+        if method == 'tau_leap':
+            inactive = np.rint((1 - a) * N).astype(np.int64)
+            active = N - inactive
+            on = rng.binomial(inactive, -np.expm1(-k_on * dt))
+            off = rng.binomial(active, p_off)
+            a = (active + on - off) / N
+        else:
+            up, down = k_on * (1 - a), p['k_off'] * a
+            noise = np.sqrt(np.maximum(up + down, 0) * dt / N) * rng.standard_normal(a.size)
+            a = np.clip(a + (up - down) * dt + noise, 0.0, 1.0)
+    return coherence_time, censored, active_sum, active_sq
+
+
+def simulate_ensemble(n_trajectories=10_000, condition='modified', t_max=100.0, dt=0.05,
+                      method='tau_leap', params=None, plv_concentration=None, record_times=None,
+                      seed=None, chunk_size=4096, n_workers=None):
+    """
+    Simulate an ensemble of stochastic RhoA trajectories and their coherence times.
+
+    Args:
+        n_trajectories: Ensemble size
+        condition: 'baseline', 'modified' or 'eraser' (see rate_multipliers)
+        t_max: Simulation horizon; still-coherent trajectories are censored at t_max
+        dt: Leap / SDE step
+        method: 'tau_leap' (binomial leaps, exact propensities per step) or 'cle'
+            (chemical Langevin SDE, faster for large n_molecules)
+        params: Overrides of DEFAULT_PARAMS
+        plv_concentration: Beta concentration of per-trajectory PLV_j (None: fixed)
+        record_times: Times at which the ensemble mean/std of A / N are recorded
+        seed: Seed; chunks use independent spawned streams, so the result does not
+            depend on n_workers
+        chunk_size: Trajectories per vectorized chunk
+        n_workers: Threads (default: os.cpu_count())
+
+    Returns:
+        dict with 'coherence_time', 'censored', 'multiplier', 'plv' (per trajectory),
+        'record_times', 'active_mean' and 'active_std'
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    seq = np.random.SeedSequence(seed)
+    plv_seq, *chunk_seqs = seq.spawn(1 + -(-n_trajectories // chunk_size))
+    multiplier, plv = rate_multipliers(n_trajectories, condition, p, plv_concentration,
+                                       np.random.default_rng(plv_seq))
+
+    record_times = np.atleast_1d(np.asarray([] if record_times is None else record_times, dtype=float))
+    record_steps = [int(round(t / dt)) for t in record_times]
+    starts = range(0, n_trajectories, chunk_size)
+
+    def run(job):
+        start, chunk_seq = job
+        return _simulate_chunk(multiplier[start:start + chunk_size], p, t_max, dt, method,
+                               record_steps, np.random.default_rng(chunk_seq))
+
+    n_workers = n_workers or os.cpu_count() or 1
+    jobs = list(zip(starts, chunk_seqs))
+    if n_workers == 1 or len(jobs) == 1:
+        parts = [run(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            parts = list(pool.map(run, jobs))
+
+    coherence_time = np.concatenate([part[0] for part in parts])
+    censored = np.concatenate([part[1] for part in parts])
+    active_mean = sum(part[2] for part in parts) / n_trajectories
+    active_sq = sum(part[3] for part in parts) / n_trajectories
+    return {
+        'coherence_time': coherence_time,
+        'censored': censored,
+        'multiplier': multiplier,
+        'plv': plv,
+        'record_times': record_times,
+        'active_mean': active_mean,
+        'active_std': np.sqrt(np.maximum(active_sq - active_mean ** 2, 0)),
+    }
+
+
+def coherence_statistics(coherence_time, censored=None):
+    """Summary of a coherence-time sample (censored entries count at t_max)."""
+    coherence_time = np.asarray(coherence_time)
+    q05, q25, median, q75, q95 = np.percentile(coherence_time, [5, 25, 50, 75, 95])
+    return {
+        'n': coherence_time.size,
+        'mean': float(coherence_time.mean()),
+        'std': float(coherence_time.std(ddof=1)) if coherence_time.size > 1 else 0.0,
+        'median': float(median),
+        'q05': float(q05),
+        'q25': float(q25),
+        'q75': float(q75),
+        'q95': float(q95),
+        'censored_fraction': float(np.mean(censored)) if censored is not None else 0.0,
+    }
+
+
+def compare_conditions(n_trajectories=10_000, seed=0, n_bootstrap=1000, **kwargs):
+    """
+    Coherence-time statistics for all conditions and their ratios to baseline.
+
+    All conditions share the seed (common random numbers), and the ratio of mean
+    coherence times gets a paired bootstrap 95% interval.
+
+    Returns:
+        dict condition -> statistics; non-baseline entries also carry 'ratio' and
+        'ratio_ci'
+    """
+    runs = {cond: simulate_ensemble(n_trajectories, cond, seed=seed, **kwargs) for cond in CONDITIONS}
+    rng = np.random.default_rng(seed)
+    resample = rng.integers(0, n_trajectories, size=(n_bootstrap, n_trajectories))
+    base = runs['baseline']['coherence_time']
+    base_means = base[resample].mean(axis=1)
+    result = {}
+    for cond, run in runs.items():
+        stats = coherence_statistics(run['coherence_time'], run['censored'])
+        if cond != 'baseline':
+            stats['ratio'] = stats['mean'] / base.mean()
+            ratios = run['coherence_time'][resample].mean(axis=1) / base_means
+            stats['ratio_ci'] = tuple(np.percentile(ratios, [2.5, 97.5]))
+        result[cond] = stats
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    print("Stochastic RhoA ensemble (PLV_j-modulated tau-leaping)")
+    print("======================================================")
+    start = time.perf_counter()
+    summary = compare_conditions(20_000, seed=1, plv_concentration=50.0)
+    elapsed = time.perf_counter() - start
+    print(f"3 x 20,000 trajectories in {elapsed:.2f} s\n")
+    for cond, stats in summary.items():
+        line = (f"{cond:>9}: mean coherence {stats['mean']:.2f} +- {stats['std']:.2f} "
+                f"(median {stats['median']:.2f}, 90% range [{stats['q05']:.2f}, {stats['q95']:.2f}], "
+                f"censored {stats['censored_fraction']:.3f})")
+        if 'ratio' in stats:
+            line += f"\n{'':>11}ratio to baseline {stats['ratio']:.4f}, 95% CI " \
+                    f"[{stats['ratio_ci'][0]:.4f}, {stats['ratio_ci'][1]:.4f}]"
+        print(line)
+    modified = 1 + DEFAULT_PARAMS['boost']
+    eraser = modified * (1 - DEFAULT_PARAMS['retrocausal_diff'])
+    print(f"\nmt_dynamics_sim.py rate multipliers: modified x{modified:.3f}, eraser x{eraser:.3f}")
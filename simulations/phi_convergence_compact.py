@@ -9,6 +9,9 @@ import numpy as np
 import csv
 import io
 
+from instrumentation import RECORDER, report, stage
+from run_planner import check_budget
+
 def fib(n):
     """Calculate nth Fibonacci number efficiently."""
     if n <= 1: return n
@@ -30,22 +33,29 @@ eta_Yb = 0.92  # Ytterbium coherence factor
 damp_rate = N_r * np.sin(np.pi * np.arange(4)) * np.exp(S_q / phi) * mu_c * eta_Yb
 
 # 2-qubit quantum system
-H = qt.tensor([qt.sigmaz() for _ in range(2)])  # Hamiltonian
-psi0 = qt.tensor([ (qt.basis(2,0) + qt.basis(2,1)).unit() for _ in range(2)])  # Initial state
+with stage('operators', 'operators'):
+    H = qt.tensor([qt.sigmaz() for _ in range(2)])  # Hamiltonian
+    psi0 = qt.tensor([ (qt.basis(2,0) + qt.basis(2,1)).unit() for _ in range(2)])  # Initial state
 
-# Collapse operators with PQRG damping
-c_ops = [np.sqrt(damp_rate[i]) * qt.tensor([qt.destroy(2) if j==i%2 else qt.qeye(2) for j in range(2)]) for i in range(4)]
+    # Collapse operators with PQRG damping
+    c_ops = [np.sqrt(damp_rate[i]) * qt.tensor([qt.destroy(2) if j==i%2 else qt.qeye(2) for j in range(2)]) for i in range(4)]
 
 # Time evolution
 tlist = np.linspace(0, 10, 50)
-result = qt.mesolve(H, psi0, tlist, c_ops=c_ops)
+
+# Refuse the run before mesolve if it would exceed the memory budget (run_planner.py)
+check_budget('qutip', 2, len(tlist), n_jumps=len(c_ops), t_span=tlist[-1] - tlist[0],
+             norm=2 + 2 * np.nansum(np.abs(damp_rate)))
+with stage('mesolve', 'solver', n_times=len(tlist)):
+    result = qt.mesolve(H, psi0, tlist, c_ops=c_ops)
 
 # Compute purity and fidelity for each t
-data = []
-for i, state in enumerate(result.states):
-    purity = (state * state).tr().real
-    fidelity = qt.fidelity(state, psi0)
-    data.append([tlist[i], purity, fidelity])
+with stage('purity_fidelity', 'observables'):
+    data = []
+    for i, state in enumerate(result.states):
+        purity = (state * state).tr().real
+        fidelity = qt.fidelity(state, psi0)
+        data.append([tlist[i], purity, fidelity])
 
 # Output as CSV
 output = io.StringIO()
@@ -55,10 +65,14 @@ writer.writerows(data)
 print(output.getvalue())
 
 # Save to file
-with open('data/purity_t_compact.csv', 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['t', 'purity', 'fidelity'])
-    writer.writerows(data)
+with stage('write_csv', 'io'):
+    with open('data/purity_t_compact.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['t', 'purity', 'fidelity'])
+        writer.writerows(data)
 
 print(f"\nCompact simulation complete. Final purity: {data[-1][1]:.4f} (target: ~0.618)")
-print(f"PQRG parameters: N_r={N_r:.4f}, S_q={S_q:.4f}, phi={phi:.4f}")
\ No newline at end of file
+print(f"PQRG parameters: N_r={N_r:.4f}, S_q={S_q:.4f}, phi={phi:.4f}")
+
+if RECORDER.enabled:
+    report()
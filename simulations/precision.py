@@ -0,0 +1,149 @@
+# Reduced-Precision Mode with Sampled Error Estimation
+
+"""
+Selectable working precision for large sweeps.
+
+    'double'  float64 / complex128 (default everywhere)
+    'single'  float32 / complex64: half the memory and bandwidth per state
+
+Sweeps that only need purity to ~1e-2 (the SUCCESS tolerance of ethical_agi_circuit) run
+in single precision; checked_sweep then re-evaluates a random sample of the points in
+double precision and reports the largest deviation:
+
+    from precision import checked_sweep
+
+    values, report = checked_sweep(t_violation_asymmetry, energies, tol=1e-4)
+    report['max_abs_error'], report['fallback']
+
+If the sampled error exceeds the tolerance, the sweep is repeated in double precision
+(unless fallback=False). A swept function takes (points, precision=...) and returns an
+array whose leading axis matches points.
+"""
+
+import numpy as np
+
+PRECISIONS = {
+    'double': (np.float64, np.complex128),
+    'single': (np.float32, np.complex64),
+}
+
+# SUCCESS tolerance on purity in ethical_agi_circuit
+DEFAULT_TOLERANCE = 1e-2
+
+# Points re-evaluated in double precision per sweep
+DEFAULT_SAMPLE = 16
+
+
+def dtypes(precision):
+    """(real dtype, complex dtype) of a precision name"""
+    try:
+        return PRECISIONS[precision]
+    except KeyError:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {tuple(PRECISIONS)}")
+
+
+def real_dtype(precision):
+    return dtypes(precision)[0]
+
+
+def complex_dtype(precision):
+    return dtypes(precision)[1]
+
+
+def itemsize(precision, complex=True):
+    """Bytes per value (complex or real) at the given precision"""
+    return np.dtype(dtypes(precision)[1 if complex else 0]).itemsize
+
+
+def _take(points, index):
+    if isinstance(points, np.ndarray):
+        return points[index]
+    return [points[i] for i in index]
+
+
+def sampled_error(func, points, values, n_sample=DEFAULT_SAMPLE, seed=None):
+    """
+    Deviation of reduced-precision values from a double-precision reference.
+
+    Args:
+        func: func(points, precision=...) -> array [len(points), ...]
+        points: Swept points (array or sequence)
+        values: func(points, precision=<reduced>) already evaluated
+        n_sample: Points re-evaluated in double precision
+        seed: Seed of the sample
+
+    Returns:
+        dict with 'max_abs_error', 'max_rel_error' and the sampled 'indices'
+    """
+    n = len(points)
+    rng = np.random.default_rng(seed)
+    index = np.sort(rng.choice(n, size=min(n_sample, n), replace=False))
+    reference = np.asarray(func(_take(points, index), precision='double'))
+    diff = np.abs(np.asarray(values)[index].astype(reference.dtype) - reference)
+    scale = np.maximum(np.abs(reference), np.finfo(np.float64).tiny)
+    return {
+        'max_abs_error': float(diff.max()) if diff.size else 0.0,
+        'max_rel_error': float((diff / scale).max()) if diff.size else 0.0,
+        'indices': index,
+    }
+
+
+def checked_sweep(func, points, precision='single', tol=DEFAULT_TOLERANCE,
+                  n_sample=DEFAULT_SAMPLE, seed=None, fallback=True):
+    """
+    Evaluate a sweep at reduced precision with a sampled float64 error check.
+
+    Args:
+        func: func(points, precision=...) -> array [len(points), ...]
+        points: Swept points
+        precision: Working precision of the sweep
+        tol: Largest acceptable absolute error in the sample
+        n_sample: Points re-evaluated in double precision
+        seed: Seed of the sample
+        fallback: Repeat the sweep in double precision if the error exceeds tol
+
+    Returns:
+        (values, report) with report keys 'precision' (of the returned values),
+        'max_abs_error', 'max_rel_error', 'indices', 'tolerance' and 'fallback'
+    """
+    dtypes(precision)
+    values = func(points, precision=precision)
+    if precision == 'double':
+        return values, {'precision': 'double', 'max_abs_error': 0.0, 'max_rel_error': 0.0,
+                        'indices': np.array([], dtype=int), 'tolerance': tol, 'fallback': False}
+    report = sampled_error(func, points, values, n_sample, seed)
+    report.update(precision=precision, tolerance=tol, fallback=False)
+    if report['max_abs_error'] > tol and fallback:
+        values = func(points, precision='double')
+        report.update(precision='double', fallback=True)
+    return values, report
+
+
+if __name__ == "__main__":
+    import time
+
+    from lhc_fibonacci_sim import t_violation_asymmetry
+    from lindblad_engine import ethical_circuit_model, evolve
+    from run_planner import estimate
+
+    energies = np.linspace(0, 60, 4_000_000)
+    for precision in ('double', 'single'):
+        start = time.perf_counter()
+        values, report = checked_sweep(t_violation_asymmetry, energies, precision, tol=1e-4, seed=0)
+        elapsed = time.perf_counter() - start
+        print(f"Asymmetry scan, {energies.size:,} energies, {precision}: {elapsed * 1e3:.0f} ms, "
+              f"{values.nbytes / 2**20:.0f} MB, sampled error {report['max_abs_error']:.1e}")
+
+    tlist = np.linspace(0, 10, 100)
+
+    def purity_sweep(mu_values, precision='double'):
+        return np.array([evolve(ethical_circuit_model(4, mu_c=mu), tlist, backend='sparse',
+                                entropy=False, precision=precision)['purity'] for mu in mu_values])
+
+    mu_values = np.linspace(0.5, 1.0, 16)
+    for precision in ('double', 'single'):
+        _, report = checked_sweep(purity_sweep, mu_values, precision, n_sample=4, seed=0)
+        footprint = estimate('sparse', 10, len(tlist), store_states=True, precision=precision)['memory']
+        print(f"4-qubit purity sweep over mu_c, {precision}: sampled error "
+              f"{report['max_abs_error']:.1e} (tolerance {report['tolerance']:g}); "
+              f"a stored 10-qubit run needs ~{footprint / 2**30:.1f} GB")
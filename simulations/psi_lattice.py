@@ -0,0 +1,367 @@
+# Lattice Solver for the PQRG psi-Field Equation
+
+"""
+Numerical evolution of the psi-field equation of the README and
+theory/PQRG-complete-theory.md,
+
+    box psi = nabla_mu [psi (x) not psi]^mu + (Q_2 (x) E_g)(delta(t - t_f) + delta(t_f - t) + eps_RTI)
+              + N_r(phi) sin(nabla psi . pi_n t + theta_any) e^{S_q/phi} mu_c eta_Yb
+              + delta a_mu PLV_j D_RTI F_any
+
+on a periodic lattice in 1-3 spatial dimensions. The theory does not fix every symbol, so
+this module evolves one explicit reading of it:
+
+- psi is a real truth-density field and not psi = 1 - psi, so psi (x) not psi = psi (1 - psi)
+  is the paradox density, largest at the undecidable psi = 1/2. Its current is
+  lambda psi (1 - psi) nabla psi (spatial part; a time component would make the equation
+  implicit in d^2 psi / dt^2).
+- box = -d^2/dt^2 + nabla^2 (signature of the ds^2 in the theory), so
+      d^2 psi / dt^2 = nabla . [(1 - lambda psi (1 - psi)) nabla psi]
+                       - A sin(t pi_n . nabla psi + theta_any) - s
+  with A = N_r e^{S_q/phi} mu_c eta_Yb and s = eps_RTI Q_2 E_g + delta a_mu PLV_j D_RTI phi^{-1}
+  (F_any acting on its phi^{-1} eigencomponent).
+- The two delta functions kick d psi / dt by -2 Q_2 E_g rti_profile when t crosses t_f.
+- L_hand = -eps_RTI/2 (conj psi d psi - psi d conj psi) vanishes for a real field.
+
+Time stepping is leapfrog (kick-drift-kick Stoermer-Verlet; the force depends on psi and t
+only, so the scheme is symplectic for the conservative part). Spatial derivatives are
+either second-order finite-difference stencils in flux form ('fd') or pseudo-spectral
+('spectral', real FFTs with n_workers threads). With 'fd' the lattice is split into slabs
+along the first axis evolved by worker processes: the field lives in shared memory, double
+buffered, so each worker reads its one-row halo straight from its neighbours' slabs and
+one barrier per step separates reads from writes. Snapshots of psi are streamed to a .npy
+memmap under out_dir at fixed intervals, as in metric_grid.py and rg_scan.py.
+"""
+
+import os
+from multiprocessing import Barrier, Process
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import scipy.fft
+
+from lindblad_engine import PHI, pqrg_parameters
+from precision import real_dtype
+
+METHODS = ('fd', 'spectral')
+
+
+def default_psi_params():
+    """Coefficients of the psi-field equation (PQRG values where the theory fixes them)"""
+    _, S_q, N_r = pqrg_parameters()
+    mu_c, eta_Yb, PLV_j, delta_a_mu, D_RTI = 0.85, 0.92, 0.71, 2.51e-9, 1.05
+    return {
+        'paradox_coupling': 1.0,                                # lambda of the paradox current
+        'drive_amplitude': N_r * np.exp(S_q / PHI) * mu_c * eta_Yb,
+        'pi_n': (np.pi,),                                       # Drive wavevector (padded with 0)
+        'theta_any': 2 * np.pi / PHI,
+        'rti_amplitude': 0.0,                                   # Q_2 (x) E_g (not fixed by the theory)
+        't_f': None,                                            # Time of the RTI handshake kicks
+        'epsilon_RTI': 1e-45,
+        'anyon_source': delta_a_mu * PLV_j * D_RTI / PHI,
+    }
+
+
+class PsiFieldLattice:
+    """
+    psi-field equation on a periodic lattice.
+
+    Parameters:
+    shape: Lattice points per axis (1-3 axes)
+    lengths: Periodic box lengths per axis
+    params: Overrides of default_psi_params()
+    method: 'fd' (stencils, slab-parallel) or 'spectral' (FFT derivatives)
+    dt: Time step (default: half the leapfrog stability limit)
+    rti_profile: Spatial profile of the RTI kicks (default: uniform)
+    precision: 'double' or 'single' fields
+    """
+
+    def __init__(self, shape, lengths, params=None, method='fd', dt=None, rti_profile=None,
+                 precision='double'):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if not 1 <= len(shape) <= 3:
+            raise ValueError(f"The lattice needs 1-3 spatial axes, got shape {shape}")
+        self.shape = tuple(shape)
+        self.lengths = tuple(float(L) for L in lengths)
+        self.spacing = np.array([L / n for n, L in zip(self.shape, self.lengths)])
+        self.method = method
+        self.dtype = real_dtype(precision)
+        p = {**default_psi_params(), **(params or {})}
+        self.params = p
+        self.pi_n = np.zeros(len(self.shape))
+        self.pi_n[:len(p['pi_n'])] = p['pi_n']
+        self.source = p['epsilon_RTI'] * p['rti_amplitude'] + p['anyon_source']
+        self.rti_profile = np.ones(self.shape, self.dtype) if rti_profile is None else \
+            np.broadcast_to(np.asarray(rti_profile, dtype=self.dtype), self.shape)
+
+        # Leapfrog limit for unit stiffness: dt omega_max <= 2
+        if method == 'fd':
+            omega_max = 2 * np.sqrt(np.sum(1 / self.spacing ** 2))
+        else:
+            omega_max = np.pi * np.sqrt(np.sum(1 / self.spacing ** 2))
+        self.dt_max = 2 / omega_max
+        self.dt = 0.5 * self.dt_max if dt is None else float(dt)
+        if self.dt > self.dt_max:
+            raise ValueError(f"dt = {self.dt:g} exceeds the leapfrog stability limit {self.dt_max:.4g}")
+        if method == 'spectral':
+            # Real transforms halve the last axis
+            freqs = [np.fft.fftfreq(n, d) for n, d in zip(self.shape[:-1], self.spacing[:-1])]
+            freqs.append(np.fft.rfftfreq(self.shape[-1], self.spacing[-1]))
+            self.k = np.meshgrid(*[2 * np.pi * f for f in freqs], indexing='ij', sparse=True)
+
+    @property
+    def x(self):
+        """Coordinate axes (cell positions from 0)"""
+        return [np.arange(n) * d for n, d in zip(self.shape, self.spacing)]
+
+    def _stencil_force(self, ext, t):
+        """Force on the rows ext[1:-1] of a slab with one halo row on each side of axis 0"""
+        lam = self.params['paradox_coupling']
+        stiffness = 1 - lam * ext * (1 - ext)
+        psi = ext[1:-1]
+        # Axis 0 through the halo rows
+        flux = 0.5 * (stiffness[1:] + stiffness[:-1]) * np.diff(ext, axis=0)
+        force = (flux[1:] - flux[:-1]) / self.spacing[0] ** 2
+        directional = self.pi_n[0] * (ext[2:] - ext[:-2]) / (2 * self.spacing[0])
+        # Remaining axes are whole (periodic) inside the slab
+        k_inner = stiffness[1:-1]
+        for axis in range(1, psi.ndim):
+            step = np.roll(psi, -1, axis=axis) - psi
+            flux = 0.5 * (k_inner + np.roll(k_inner, -1, axis=axis)) * step
+            force += (flux - np.roll(flux, 1, axis=axis)) / self.spacing[axis] ** 2
+            if self.pi_n[axis]:
+                central = step + np.roll(step, 1, axis=axis)
+                directional += self.pi_n[axis] * central / (2 * self.spacing[axis])
+        return self._drive(force, directional, t)
+
+    def _spectral_force(self, psi, t, n_workers):
+        axes = tuple(range(psi.ndim))
+        lam = self.params['paradox_coupling']
+        stiffness = 1 - lam * psi * (1 - psi)
+        spectrum = scipy.fft.rfftn(psi, axes=axes, workers=n_workers)
+        divergence = np.zeros(psi.shape[:-1] + (psi.shape[-1] // 2 + 1,), dtype=spectrum.dtype)
+        directional = np.zeros_like(psi)
+        for axis, k in enumerate(self.k):
+            gradient = scipy.fft.irfftn(1j * k * spectrum, s=psi.shape, axes=axes, workers=n_workers)
+            if self.pi_n[axis]:
+                directional += self.pi_n[axis] * gradient
+            divergence += 1j * k * scipy.fft.rfftn(stiffness * gradient, axes=axes, workers=n_workers)
+        force = scipy.fft.irfftn(divergence, s=psi.shape, axes=axes, workers=n_workers)
+        return self._drive(force.astype(self.dtype, copy=False), directional, t)
+
+    def _drive(self, force, directional, t):
+        directional *= t
+        directional += self.params['theta_any']
+        force -= self.params['drive_amplitude'] * np.sin(directional)
+        force -= self.source
+        return force
+
+    def force(self, psi, t, n_workers=1):
+        """d^2 psi / dt^2 for the whole lattice at time t"""
+        psi = np.asarray(psi, dtype=self.dtype)
+        if self.method == 'spectral':
+            return self._spectral_force(psi, t, n_workers)
+        return self._stencil_force(np.concatenate([psi[-1:], psi, psi[:1]]), t)
+
+    def _kick(self, t, dt):
+        """RTI delta kicks (d psi / dt jump) in the step (t, t + dt]"""
+        t_f = self.params['t_f']
+        if t_f is None or not t < t_f <= t + dt or not self.params['rti_amplitude']:
+            return 0.0
+        return -2 * self.params['rti_amplitude']
+
+    def energy(self, psi, pi):
+        """Energy of the free wave part, sum(pi^2 / 2 + |grad psi|^2 / 2) dV (stencil gradients)"""
+        total = 0.5 * np.sum(pi.astype(float) ** 2)
+        for axis in range(psi.ndim):
+            total += 0.5 * np.sum((np.diff(psi, axis=axis, append=np.take(psi, [0], axis=axis))
+                                   / self.spacing[axis]) ** 2)
+        return total * np.prod(self.spacing)
+
+    def _segment(self, psi, pi, t, n_steps, n_workers):
+        """In-process leapfrog over n_steps; psi, pi updated in place"""
+        dt = self.dt
+        pi += 0.5 * dt * self.force(psi, t, n_workers)
+        for step in range(n_steps):
+            psi += dt * pi
+            t_next = t + (step + 1) * dt
+            weight = dt if step < n_steps - 1 else 0.5 * dt
+            pi += weight * self.force(psi, t_next, n_workers)
+            kick = self._kick(t_next - dt, dt)
+            if kick:
+                pi += kick * self.rti_profile
+
+    def run(self, psi0, t_final, pi0=None, n_snapshots=11, snapshot_stride=1, out_dir=None,
+            n_workers=None):
+        """
+        Evolve from (psi0, d psi / dt = pi0) to t_final with periodic snapshots.
+
+        Args:
+            psi0: Initial field [*shape]
+            t_final: End time (rounded to whole steps between snapshots)
+            pi0: Initial d psi / dt (default zero)
+            n_snapshots: Snapshot times (t = 0 included)
+            snapshot_stride: Subsampling of every axis in the snapshots
+            out_dir: If given, stream 'psi.npy' ([n_snapshots, ...] float32 memmap) and
+                'times.npy' there; otherwise keep the snapshots in memory
+            n_workers: 'fd': slab processes; 'spectral': FFT threads (default: os.cpu_count())
+
+        Returns:
+            dict with 't', 'psi' (snapshots), 'energy' (free-wave energy per snapshot),
+            'final_state' (psi, pi)
+        """
+        psi = np.array(psi0, dtype=self.dtype)
+        if psi.shape != self.shape:
+            raise ValueError(f"psi0 has shape {psi.shape}, expected {self.shape}")
+        pi = np.zeros_like(psi) if pi0 is None else np.array(pi0, dtype=self.dtype)
+        n_workers = n_workers or os.cpu_count() or 1
+        steps = max(1, int(round(t_final / (self.dt * max(n_snapshots - 1, 1)))))
+        times = np.arange(n_snapshots) * steps * self.dt
+        view = (slice(None, None, snapshot_stride),) * len(self.shape)
+        snap_shape = (n_snapshots,) + psi[view].shape
+        if out_dir is None:
+            snapshots = np.empty(snap_shape, dtype=np.float32)
+        else:
+            os.makedirs(out_dir, exist_ok=True)
+            snapshots = np.lib.format.open_memmap(os.path.join(out_dir, 'psi.npy'), mode='w+',
+                                                  dtype=np.float32, shape=snap_shape)
+            np.save(os.path.join(out_dir, 'times.npy'), times)
+        energy = np.empty(n_snapshots)
+
+        def record(k, psi, pi):
+            snapshots[k] = psi[view]
+            energy[k] = self.energy(psi, pi)
+
+        record(0, psi, pi)
+        n_slabs = min(n_workers, self.shape[0])
+        if self.method == 'fd' and n_slabs > 1:
+            with _SlabPool(self, psi, pi, n_slabs) as pool:
+                for k in range(1, n_snapshots):
+                    pool.advance(times[k - 1], steps)
+                    record(k, *pool.state())
+                psi, pi = (a.copy() for a in pool.state())
+        else:
+            for k in range(1, n_snapshots):
+                self._segment(psi, pi, times[k - 1], steps, n_workers)
+                record(k, psi, pi)
+        if out_dir is not None:
+            snapshots.flush()
+        return {'t': times, 'psi': snapshots, 'energy': energy, 'final_state': (psi, pi)}
+
+
+def _slab_worker(lattice, names, bounds, barrier, sync):
+    """Leapfrog on rows [start, stop) of the shared field, reading halos from neighbours"""
+    start, stop = bounds
+    n = lattice.shape[0]
+    blocks = [SharedMemory(name=name) for name in names]
+    try:
+        fields = np.ndarray((2,) + lattice.shape, lattice.dtype, buffer=blocks[0].buf)
+        pi = np.ndarray(lattice.shape, lattice.dtype, buffer=blocks[1].buf)[start:stop]
+        control = np.ndarray(3, np.float64, buffer=blocks[2].buf)
+        rows = np.arange(start - 1, stop + 1) % n
+        profile = lattice.rti_profile[start:stop]
+        dt = lattice.dt
+        while True:
+            sync.wait()
+            t, n_steps, stop_flag = control
+            if stop_flag:
+                break
+            n_steps, cur = int(n_steps), 0
+            # Buffer 0 holds the state at segment boundaries
+            pi += 0.5 * dt * lattice._stencil_force(fields[cur][rows], t)
+            for step in range(n_steps):
+                fields[1 - cur][start:stop] = fields[cur][start:stop] + dt * pi
+                barrier.wait()
+                cur = 1 - cur
+                t_next = t + (step + 1) * dt
+                weight = dt if step < n_steps - 1 else 0.5 * dt
+                pi += weight * lattice._stencil_force(fields[cur][rows], t_next)
+                kick = lattice._kick(t_next - dt, dt)
+                if kick:
+                    pi += kick * profile
+            if cur:
+                fields[0][start:stop] = fields[1][start:stop]
+            sync.wait()
+    except BaseException:
+        barrier.abort()
+        sync.abort()
+        raise
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class _SlabPool:
+    """Worker processes owning slabs of a shared-memory lattice"""
+
+    def __init__(self, lattice, psi, pi, n_slabs):
+        self.lattice = lattice
+        itemsize = np.dtype(lattice.dtype).itemsize
+        size = int(np.prod(lattice.shape)) * itemsize
+        self.blocks = [SharedMemory(create=True, size=2 * size), SharedMemory(create=True, size=size),
+                       SharedMemory(create=True, size=3 * 8)]
+        self.fields = np.ndarray((2,) + lattice.shape, lattice.dtype, buffer=self.blocks[0].buf)
+        self.pi = np.ndarray(lattice.shape, lattice.dtype, buffer=self.blocks[1].buf)
+        self.control = np.ndarray(3, np.float64, buffer=self.blocks[2].buf)
+        self.fields[0] = psi
+        self.pi[:] = pi
+        self.control[:] = 0
+        edges = np.linspace(0, lattice.shape[0], n_slabs + 1).astype(int)
+        barrier, self.sync = Barrier(n_slabs), Barrier(n_slabs + 1)
+        names = [block.name for block in self.blocks]
+        self.workers = [Process(target=_slab_worker, args=(lattice, names, (lo, hi), barrier, self.sync),
+                                daemon=True) for lo, hi in zip(edges[:-1], edges[1:])]
+        for worker in self.workers:
+            worker.start()
+
+    def advance(self, t, n_steps):
+        self.control[:] = (t, n_steps, 0)
+        self.sync.wait()
+        self.sync.wait()
+
+    def state(self):
+        return self.fields[0], self.pi
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if not self.sync.broken:
+                self.control[2] = 1
+                self.sync.wait(timeout=10)
+        finally:
+            for worker in self.workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+            del self.fields, self.pi, self.control
+            for block in self.blocks:
+                block.close()
+                block.unlink()
+
+
+if __name__ == "__main__":
+    import time
+
+    params = default_psi_params()
+    print(f"psi-field equation: A = N_r e^(S_q/phi) mu_c eta_Yb = {params['drive_amplitude']:.4f}, "
+          f"theta_any = {params['theta_any']:.4f}, anyon source = {params['anyon_source']:.3e}")
+    for method, shape in (('fd', (64, 64, 64)), ('spectral', (64, 64, 64))):
+        lattice = PsiFieldLattice(shape, (2 * np.pi,) * 3, method=method)
+        x = lattice.x
+        psi0 = 0.5 + 0.1 * np.sin(x[0])[:, None, None] * np.cos(x[1])[None, :, None] \
+            + 0.05 * np.cos(2 * x[2])[None, None, :]
+        start = time.perf_counter()
+        run = lattice.run(psi0, t_final=2.0, n_snapshots=5)
+        elapsed = time.perf_counter() - start
+        steps = int(round(run['t'][-1] / lattice.dt))
+        final = run['final_state'][0]
+        print(f"\n{method}: {shape[0]}^3 lattice, {steps} leapfrog steps in {elapsed:.2f} s "
+              f"({elapsed / steps / np.prod(shape) * 1e9:.1f} ns per site-step)")
+        print(f"  mean psi {psi0.mean():.4f} -> {final.mean():.4f}, rms fluctuation "
+              f"{psi0.std():.4f} -> {final.std():.4f}")
+        print(f"  A 256^3 lattice is {256 ** 3 / np.prod(shape):.0f}x larger: "
+              f"~{elapsed / steps * 256 ** 3 / np.prod(shape):.1f} s per step on this machine "
+              f"(fd slabs split it over processes)")
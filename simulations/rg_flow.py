@@ -0,0 +1,276 @@
+# Vectorized PQRG RG-Flow Integrator
+
+"""
+Integrates the Fibonacci-modulated PQRG beta function (beta_eff of
+generate_visuals.create_rg_flow_diagram) for millions of initial couplings at once.
+
+    beta_eff(g) = 3 g^2 / (16 pi^2) + (epsilon_RTI / 2) g + a N_r sin(pi g / phi^{-1})
+
+The flow towards the IR, dg/dt = -beta_eff(g) with t = ln(mu_UV / mu), is solved with
+an embedded Dormand-Prince 5(4) scheme where every coupling carries its own adaptive
+step. Fixed points of beta_eff and their IR stability are located on a dense grid and
+refined with vectorized Newton steps, so basin-of-attraction maps around phi^{-1} take
+seconds.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Golden ratio and inverse
+PHI = (1 + np.sqrt(5)) / 2
+PHI_INV = 1 / PHI
+
+# PQRG parameters
+N_r = 0.641681          # Paradox density threshold
+EPSILON_RTI = 1e-45     # RTI entropy correction
+MODULATION = 0.1        # Fibonacci modulation strength used in create_rg_flow_diagram
+
+# Dormand-Prince 5(4) tableau
+_C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1])
+_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+_B5 = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0])
+_B4 = np.array([5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40])
+_E = _B5 - _B4
+
+
+def beta_eff(g, modulation=MODULATION, epsilon_RTI=EPSILON_RTI):
+    """
+    PQRG effective beta function dg/d(ln mu).
+
+    Args:
+        g: Coupling(s)
+        modulation: Fibonacci modulation strength a (amplitude a * N_r); may be an
+            array broadcasting against g
+        epsilon_RTI: RTI linear term
+
+    Returns:
+        beta_eff(g)
+    """
+    return (3 * g**2) / (16 * np.pi**2) + epsilon_RTI * g / 2 + modulation * N_r * np.sin(np.pi * g / PHI_INV)
+
+
+def beta_eff_prime(g, modulation=MODULATION, epsilon_RTI=EPSILON_RTI):
+    """Derivative d(beta_eff)/dg."""
+    return (6 * g) / (16 * np.pi**2) + epsilon_RTI / 2 + modulation * N_r * (np.pi / PHI_INV) * np.cos(np.pi * g / PHI_INV)
+
+
+def find_fixed_points(g_min=-1.0, g_max=2.0, modulation=MODULATION, n_grid=20001, newton_steps=8):
+    """
+    All zeros of beta_eff in [g_min, g_max] with their IR stability.
+
+    Zeros are bracketed by sign changes on a dense grid, then refined by Newton steps
+    (falling back to the bracket midpoint if Newton leaves the bracket).
+
+    Returns:
+        dict with 'g_star' (sorted zeros), 'slope' (beta_eff'(g*)) and 'ir_stable'
+        (True where the fixed point attracts the flow towards the IR, i.e. slope > 0)
+    """
+    grid = np.linspace(g_min, g_max, n_grid)
+    values = beta_eff(grid, modulation)
+    exact = values == 0
+    brackets = np.flatnonzero((np.sign(values[:-1]) * np.sign(values[1:]) < 0))
+    lo, hi = grid[brackets], grid[brackets + 1]
+    g = 0.5 * (lo + hi)
+    for _ in range(newton_steps):
+        step = beta_eff(g, modulation) / beta_eff_prime(g, modulation)
+        g_new = g - step
+        g = np.where((g_new >= lo) & (g_new <= hi), g_new, 0.5 * (lo + hi))
+    g_star = np.sort(np.concatenate([g, grid[exact]]))
+    slope = beta_eff_prime(g_star, modulation)
+    return {'g_star': g_star, 'slope': slope, 'ir_stable': slope > 0}
+
+
+def integrate_flows(g0, t_eval, modulation=MODULATION, direction='ir', rtol=1e-6, atol=1e-9,
+                    h0=1e-2, max_steps=100_000, g_max=1e6):
+    """
+    Integrate the RG flow for many couplings at once.
+
+    direction='ir' solves dg/dt = -beta_eff(g) with t = ln(mu_UV/mu) (UV -> IR);
+    direction='uv' solves dg/dt = +beta_eff(g) with t = ln(mu/mu_IR) (IR -> UV).
+    Every element has its own adaptive step; only still-active elements are advanced,
+    and the last stage is reused as the next first stage (FSAL).
+
+    Args:
+        g0: Initial couplings at t = t_eval[0] (any shape, flattened)
+        t_eval: Increasing output times
+        modulation: Scalar or per-element modulation strength
+        direction: 'ir' or 'uv'
+        rtol, atol: Local error tolerances
+        h0: Initial step size
+        max_steps: Safety limit on steps per output interval
+        g_max: Couplings beyond |g_max| are marked diverged and frozen
+
+    Returns:
+        dict with 't' (output times), 'g' (array [len(t_eval), N]) and 'diverged' mask
+    """
+    if direction not in ('ir', 'uv'):
+        raise ValueError("direction must be 'ir' or 'uv'")
+    sign = -1.0 if direction == 'ir' else 1.0
+    g = np.array(g0, dtype=float).ravel()
+    t_eval = np.asarray(t_eval, dtype=float)
+    modulation = np.broadcast_to(np.asarray(modulation, dtype=float), g.shape)
+    h = np.full(g.shape, h0)
+    diverged = ~np.isfinite(g)
+    flows = np.empty((t_eval.size, g.size))
+    flows[0] = g
+
+    def rhs(y, mod):
+        return sign * beta_eff(y, mod)
+
+    k_first = rhs(g, modulation)
+
+    for k in range(1, t_eval.size):
+        t_end = t_eval[k]
+        t_done = t_end - 1e-12 * max(1.0, abs(t_end))
+        # Compact working set of still-active couplings
+        idx = np.flatnonzero(~diverged)
+        y, mod, k1, hh = g[idx], modulation[idx], k_first[idx], h[idx]
+        t = np.full(idx.size, t_eval[k - 1])
+        steps = 0
+        while idx.size:
+            steps += 1
+            if steps > max_steps:
+                raise RuntimeError(f"RG flow did not reach t={t_end} within {max_steps} steps")
+            step = np.minimum(hh, t_end - t)
+            ks = [k1]
+            for stage in range(1, 7):
+                dy = sum(a * ks[j] for j, a in enumerate(_A[stage]) if a)
+                ks.append(rhs(y + step * dy, mod))
+            y5 = y + step * sum(b * kv for b, kv in zip(_B5, ks) if b)
+            err = step * sum(e * kv for e, kv in zip(_E, ks) if e)
+            err_norm = np.abs(err) / (atol + rtol * np.maximum(np.abs(y), np.abs(y5)))
+            accept = err_norm <= 1
+
+            y = np.where(accept, y5, y)
+            k1 = np.where(accept, ks[6], k1)
+            t = np.where(accept, t + step, t)
+            hh = step * np.clip(0.9 * np.maximum(err_norm, 1e-10) ** -0.2, 0.2, 5.0)
+
+            bad = ~np.isfinite(y) | (np.abs(y) > g_max)
+            done = bad | (t >= t_done)
+            if done.any():
+                finished = idx[done]
+                g[finished], k_first[finished], h[finished] = y[done], k1[done], hh[done]
+                diverged[finished[bad[done]]] = True
+                keep = ~done
+                idx, y, mod, k1, hh, t = idx[keep], y[keep], mod[keep], k1[keep], hh[keep], t[keep]
+        flows[k] = np.where(diverged, np.nan, g)
+
+    return {'t': t_eval, 'g': flows, 'diverged': diverged}
+
+
+def basin_of_attraction(g0, t_flow=200.0, modulation=MODULATION, direction='ir', method='integrate',
+                        tol=1e-3, chunk_size=250_000, n_workers=None, rtol=1e-4, atol=1e-7, **kwargs):
+    """
+    Classify initial couplings by the fixed point their flow ends at.
+
+    method='integrate' integrates every flow for t_flow and matches the endpoint to a
+    fixed point within tol. method='monotone' uses that a 1-D autonomous flow moves
+    monotonically until the next zero of beta_eff in the direction of motion, so the
+    asymptotic basin follows from a sorted search without integrating (t_flow, tol
+    and the integrator options are then unused; g_final holds the limit point).
+
+    Args:
+        g0: Initial couplings (any shape)
+        t_flow: Flow time |ln(mu_UV/mu_IR)|
+        modulation: Fibonacci modulation strength
+        direction: 'ir' (fixed points with beta' > 0 attract) or 'uv' (beta' < 0 attract)
+        method: 'integrate' or 'monotone'
+        tol: Distance to a fixed point counted as converged
+        chunk_size: Couplings integrated per chunk
+        n_workers: Threads integrating chunks concurrently (default: os.cpu_count())
+        rtol, atol, kwargs: Passed to integrate_flows
+
+    Returns:
+        dict with 'g_final' (final couplings), 'basin' (index into 'fixed_points' or -1),
+        'fixed_points' (output of find_fixed_points) and 'phi_inv_basin' mask for the
+        fixed point nearest phi^{-1}
+    """
+    if method not in ('integrate', 'monotone'):
+        raise ValueError("method must be 'integrate' or 'monotone'")
+    g0 = np.asarray(g0, dtype=float)
+    flat = g0.ravel()
+    # beta_eff > 0 wherever the quadratic term exceeds the modulation amplitude
+    g_bound = np.sqrt(16 * np.pi**2 * abs(modulation) * N_r / 3) + 0.5
+    fixed = find_fixed_points(min(flat.min(), -g_bound) - 0.5, max(flat.max(), g_bound) + 0.5, modulation)
+    g_star = fixed['g_star']
+    phi_index = int(np.abs(g_star - PHI_INV).argmin()) if g_star.size else -1
+
+    if method == 'monotone':
+        sign = -1.0 if direction == 'ir' else 1.0
+        velocity = sign * beta_eff(flat, modulation)
+        above = np.searchsorted(g_star, flat, side='left')   # first zero >= g0
+        below = np.searchsorted(g_star, flat, side='right') - 1  # last zero <= g0
+        basin = np.where(velocity > 0, above, np.where(velocity < 0, below, -1))
+        at_zero = velocity == 0
+        if g_star.size:
+            basin[at_zero] = np.abs(flat[at_zero, None] - g_star[None, :]).argmin(axis=1)
+        basin[(basin < 0) | (basin >= g_star.size)] = -1
+        converged = basin >= 0
+        g_final = np.sign(velocity) * np.inf
+        g_final[converged] = g_star[basin[converged]]
+        return {
+            'g_final': g_final.reshape(g0.shape),
+            'basin': basin.reshape(g0.shape),
+            'fixed_points': fixed,
+            'phi_inv_basin': (basin == phi_index).reshape(g0.shape) if phi_index >= 0 else np.zeros(g0.shape, bool),
+        }
+
+    t_eval = np.array([0.0, t_flow])
+    g_ir = np.empty_like(flat)
+
+    def run(start):
+        chunk = flat[start:start + chunk_size]
+        g_ir[start:start + chunk.size] = integrate_flows(
+            chunk, t_eval, modulation, direction, rtol=rtol, atol=atol, **kwargs)['g'][-1]
+
+    starts = range(0, flat.size, chunk_size)
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1 or len(starts) == 1:
+        for start in starts:
+            run(start)
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            list(pool.map(run, starts))
+
+    basin = np.full(flat.shape, -1)
+    if g_star.size:
+        finite = np.isfinite(g_ir)
+        nearest = np.abs(g_ir[finite, None] - g_star[None, :]).argmin(axis=1)
+        close = np.abs(g_ir[finite] - g_star[nearest]) < tol
+        basin[np.flatnonzero(finite)[close]] = nearest[close]
+    return {
+        'g_final': g_ir.reshape(g0.shape),
+        'basin': basin.reshape(g0.shape),
+        'fixed_points': fixed,
+        'phi_inv_basin': (basin == phi_index).reshape(g0.shape) if phi_index >= 0 else np.zeros(g0.shape, bool),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    fixed = find_fixed_points()
+    print("Fixed points of beta_eff in [-1, 2]:")
+    for g_star, slope, stable in zip(fixed['g_star'], fixed['slope'], fixed['ir_stable']):
+        print(f"  g* = {g_star:+.6f}  beta' = {slope:+.4f}  {'IR-stable' if stable else 'IR-unstable'}")
+
+    g0 = np.linspace(-0.5, 1.8, 1_000_000)
+    for direction, method in [('ir', 'integrate'), ('uv', 'integrate'), ('uv', 'monotone')]:
+        start = time.perf_counter()
+        result = basin_of_attraction(g0, direction=direction, method=method)
+        elapsed = time.perf_counter() - start
+        print(f"\n{direction.upper()} basin map ({method}) for {g0.size:,} initial couplings in {elapsed:.2f} s")
+        print(f"  Fraction flowing to the fixed point nearest phi^-1 ({PHI_INV:.4f}): "
+              f"{result['phi_inv_basin'].mean():.3f}")
+        print(f"  Unconverged/diverged fraction: {(result['basin'] < 0).mean():.3f}")
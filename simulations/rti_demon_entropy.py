@@ -3,6 +3,8 @@ import numpy as np
 import sympy as sp
 from sympy import conjugate, diff, integrate, symbols
 
+import density_kernels
+
 # Boltzmann constant (J/K) for entropy scaling
 k_B = 1.380649e-23
 
@@ -32,22 +34,22 @@ c_ops = [np.sqrt(rate) * qt.sigmam()]
 tlist = np.linspace(0, 10, 50)
 result = qt.mesolve(H, psi0, tlist, c_ops=c_ops)
 
-# Compute von Neumann entropy S = -Tr(rho log rho) before/after (in nats)
+# Compute von Neumann entropy S = -Tr(rho log rho) over the whole trajectory (in nats)
 def von_neumann_entropy(rho):
-    eigenvalues = rho.eigenenergies()
-    eigenvalues = eigenvalues[eigenvalues > 0]  # Avoid log(0)
-    return -np.sum(eigenvalues * np.log(eigenvalues))
+    return float(density_kernels.von_neumann_entropy(rho)[0])
 
+S_t = density_kernels.von_neumann_entropy(result.states)  # one batched eigvalsh call
 S_initial = von_neumann_entropy(qt.ket2dm(psi0))
-S_final = von_neumann_entropy(result.states[-1])
+S_final = S_t[-1]
 delta_S = S_final - S_initial
 print(f"Initial Entropy: {S_initial:.3f} nats")
 print(f"Final Entropy: {S_final:.3f} nats")
 print(f"Delta Entropy (cost via localization): {delta_S:.3f} nats ≈ ln(2) ≈ 0.693")
 
 # Check unitarity preservation: Trace rho == 1 throughout
-traces = [state.tr() for state in result.states]
-print(f"Trace (unitarity check): Min {min(traces):.3f}, Max {max(traces):.3f} (preserved ≈1)")
+traces = np.trace(density_kernels.as_density_stack(result.states), axis1=1, axis2=2).real
+print(f"Trace (unitarity check): Min {traces.min():.3f}, Max {traces.max():.3f} (preserved ≈1)")
+print(f"Max entropy along trajectory: {S_t.max():.3f} nats at t = {tlist[S_t.argmax()]:.2f}")
 
 # Interpretation: Entropy increase ~ln(2) quantifies localization cost per arXiv 2503.18186,
 # integrating RTI L_hand while preserving unitarity in mesolve—foils Demon thermodynamically.
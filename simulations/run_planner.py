@@ -0,0 +1,335 @@
+# Memory and Runtime Planner for the Lindblad Solvers
+
+"""
+Estimates the memory footprint and runtime of a master-equation run before it starts,
+picks the cheapest backend that fits, and refuses runs that would not fit.
+
+    from run_planner import plan_evolution, check_budget, ResourceBudgetError
+
+    plan = plan_evolution(n_qubits=8, n_times=100, n_jumps=8, t_span=10, norm=60)
+    plan['backend'], plan['memory'], plan['runtime']
+
+    check_budget('qutip', n_qubits=4, n_times=50, n_jumps=16)   # raises if too large
+
+Backends (see lindblad_engine.py; 'qutip' is qt.mesolve as used by the scripts):
+
+    backend      memory                                     runtime
+    dense        ~6 d^4 complex (expm scratch, propagator)  ~d^6 per distinct step
+    sparse       CSR Liouvillian, nnz ~ d^2 (1 + 2.25 J)    matvecs x nnz
+    structured   ~12 d^2 complex, nothing of size d^4       matvecs x J d^2, Python overhead
+    trajectory   K d (J + 4) complex                        n_times x K d x bisection
+    symmetric    N = C(n + 3, 3) coefficients, all states   matvecs (or BDF steps) x nnz
+    mpdo         ~17 n 4 chi^2 complex (bond growth 4x)     Strang steps x n (4 chi)^3
+    qutip        CSR Liouvillian + all states d^2 n_times   ODE steps x nnz
+
+with d = 2^n, J jump channels, K trajectories and chi = max_bond; precision='single'
+(complex64) halves the state and operator sizes. The matvec count of expm_multiply grows
+with norm x t_span; driven runs (lindblad_engine.RateDrive) are planned with the norm at
+the largest rate multipliers, without the per-bin call overhead, and the dense backend is
+charged one expm per distinct bin (n_propagators). Figures are
+order-of-magnitude: good enough to rank backends and to stop a 14-qubit dense run before
+it takes the node down, not to predict seconds.
+
+The budget is PQRG_MEMORY_BUDGET (bytes, or with a K/M/G/T suffix, e.g. "8G"), otherwise
+half of the currently available memory. A run over budget is first reduced by dropping
+stored states and by chunking the output block of expm_multiply; if it still does not fit
+on any allowed backend, ResourceBudgetError is raised. PQRG_MAX_RUNTIME (seconds) sets an
+optional runtime limit the same way.
+"""
+
+import os
+
+import numpy as np
+
+from precision import itemsize
+
+# Bytes per complex128 value (the output blocks of expm_multiply are always complex128)
+COMPLEX = 16
+
+# Effective throughput (operations per second) of the kernels behind each backend
+DENSE_FLOPS = 2e10        # LAPACK/BLAS on d^2 x d^2 matrices
+SPARSE_OPS = 4e8          # CSR matvec entries
+STRUCTURED_OPS = 6e7      # elementwise and local einsum work on d x d arrays
+STRUCTURED_CALL = 2e-5    # Python overhead per local operator application
+TRAJECTORY_OPS = 1e8      # elementwise work on [K, d] kets
+QUTIP_OPS = 5e7           # CSR matvec entries inside the ODE right-hand side
+PER_OUTPUT = 1e-3         # Python and observable overhead per output time
+
+# Fraction of the available memory used when PQRG_MEMORY_BUDGET is unset
+DEFAULT_BUDGET_FRACTION = 0.5
+
+# Backends that solve the master equation exactly; trajectories are statistical and only
+# chosen when none of these fits
+EXACT_BACKENDS = ('dense', 'sparse', 'structured', 'symmetric')
+# 'symmetric' is only planned when the caller has detected permutation symmetry; 'mpdo'
+# (truncated, see mpdo_lindblad.py) is never planned, only checked with check_budget
+PLANNED_BACKENDS = ('dense', 'sparse', 'structured', 'trajectory')
+
+# BDF passes over the symmetric Liouvillian for stiff runs (calibrated on n = 30-50)
+SYMMETRIC_BDF_PASSES = 5e4
+
+# Python overhead per site and Strang step of the MPDO backend, and its SVD/QR flop factor
+MPDO_CALL = 2e-4
+MPDO_FLOPS_FACTOR = 50
+
+_SUFFIXES = {'k': 2 ** 10, 'm': 2 ** 20, 'g': 2 ** 30, 't': 2 ** 40}
+
+
+class ResourceBudgetError(MemoryError):
+    """A run would exceed the memory (or runtime) budget; raised before it starts"""
+
+
+def parse_bytes(text):
+    """'8G', '512m', '1.5T' or a plain number of bytes -> int"""
+    text = str(text).strip().lower().rstrip('b')
+    if text and text[-1] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(float(text))
+
+
+def available_memory():
+    """Available physical memory in bytes (None where it cannot be determined)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def memory_budget():
+    """Bytes a single run may use: PQRG_MEMORY_BUDGET, else half the available memory"""
+    configured = os.environ.get('PQRG_MEMORY_BUDGET')
+    if configured:
+        return parse_bytes(configured)
+    available = available_memory()
+    return None if available is None else int(DEFAULT_BUDGET_FRACTION * available)
+
+
+def runtime_budget():
+    """Seconds a single run may take (PQRG_MAX_RUNTIME), None for no limit"""
+    configured = os.environ.get('PQRG_MAX_RUNTIME')
+    return float(configured) if configured else None
+
+
+def _matvec_count(norm, t_span, n_times):
+    # expm_multiply takes about ||A|| t matrix-vector products (Taylor degree x steps),
+    # plus a few per output point
+    return int(np.ceil(norm * t_span)) + 4 * n_times + 20
+
+
+def estimate(backend, n_qubits, n_times, n_jumps=None, t_span=10.0, norm=None,
+             store_states=False, n_trajectories=256, time_chunk=None, precision='double',
+             max_bond=None, n_propagators=1):
+    """
+    Memory (bytes) and runtime (seconds) estimate of one run.
+
+    Args:
+        backend: 'dense', 'sparse', 'structured', 'trajectory', 'symmetric', 'mpdo' or 'qutip'
+        n_qubits: Number of qubits
+        n_times: Length of tlist
+        n_jumps: Collapse operators (default n_qubits)
+        t_span: tlist[-1] - tlist[0]
+        norm: Bound on the Liouvillian norm (default 2 n_qubits + n_jumps)
+        store_states: All density matrices (or kets) are kept
+        n_trajectories: Ensemble size for 'trajectory'
+        time_chunk: Output times per expm_multiply call (sparse/structured, default all)
+        precision: 'double' or 'single' (complex64 halves states and operators)
+        max_bond: Bond dimension limit of 'mpdo' (default mpdo_lindblad.DEFAULT_MAX_BOND)
+        n_propagators: Distinct propagators built by 'dense' (a driven run needs one per bin)
+
+    Returns:
+        dict with 'backend', 'memory', 'runtime' and the inputs that shaped them
+    """
+    d = 2 ** n_qubits
+    J = n_qubits if n_jumps is None else n_jumps
+    norm = 2.0 * n_qubits + J if norm is None else norm
+    value = itemsize(precision)
+    state = value * d * d
+    block = COMPLEX * d * d
+    overhead = n_times * PER_OUTPUT
+    stored = state * n_times if store_states else 0
+    chunk = n_times if time_chunk is None else min(time_chunk, n_times)
+
+    if backend == 'dense':
+        # L, expm scratch (Pade terms and squarings) and one cached propagator
+        memory = 6 * value * float(d) ** 4 + stored
+        squarings = max(0, np.log2(max(norm * t_span / max(n_times - 1, n_propagators, 1), 1)))
+        runtime = n_propagators * (12 + squarings) * 2 * float(d) ** 6 / DENSE_FLOPS \
+            + n_times * 8 * float(d) ** 4 / DENSE_FLOPS + overhead
+    elif backend in ('sparse', 'qutip'):
+        nnz = d * d * (1 + 2.25 * J)
+        # Values and column indices; kron temporaries roughly triple the peak
+        matrix = 3 * nnz * (value + 8)
+        if backend == 'sparse':
+            memory = matrix + 6 * state + chunk * block + stored
+            runtime = _matvec_count(norm, t_span, n_times) * nnz / SPARSE_OPS + overhead
+        else:
+            # mesolve keeps every state plus the ODE integrator workspace
+            memory = matrix + (12 + n_times) * state
+            steps = max(n_times, 2 * norm * t_span)
+            runtime = 6 * steps * nnz / QUTIP_OPS + overhead
+    elif backend == 'structured':
+        memory = 12 * state + chunk * block + stored
+        matvecs = _matvec_count(norm, t_span, n_times)
+        runtime = matvecs * (J * 10 * d * d / STRUCTURED_OPS + 5 * J * STRUCTURED_CALL) + overhead
+    elif backend == 'trajectory':
+        K = n_trajectories
+        kets = value * K * d
+        m = min(K, d)
+        memory = kets * (J + 4) + value * m * m + (kets * n_times if store_states else 0)
+        # Bisection on [K, d] kets plus the ensemble rho or Gram matrix (m x m) per output time
+        runtime = n_times * (20 * K * d / TRAJECTORY_OPS + (8 * K * d * m + 10 * m ** 3) / DENSE_FLOPS
+                             + PER_OUTPUT)
+    elif backend == 'symmetric':
+        from symmetric_lindblad import STIFF_LIMIT
+
+        N = (n_qubits + 1) * (n_qubits + 2) * (n_qubits + 3) // 6
+        nnz = 5 * N
+        # Every output state is kept (coefficient vectors are small), plus solver scratch
+        memory = 3 * nnz * (value + 8) + (n_times + 20) * COMPLEX * N
+        if norm * t_span > STIFF_LIMIT:
+            runtime = SYMMETRIC_BDF_PASSES * nnz / SPARSE_OPS + overhead
+        else:
+            runtime = _matvec_count(norm, t_span, n_times) * nnz / SPARSE_OPS + overhead
+    elif backend == 'mpdo':
+        from mpdo_lindblad import DEFAULT_DT, DEFAULT_MAX_BOND
+
+        chi = DEFAULT_MAX_BOND if max_bond is None else max_bond
+        mps = value * n_qubits * 4 * chi ** 2
+        # The bond-4 Hamiltonian MPO grows every tensor 16-fold before compression
+        memory = 17 * mps + (n_times * mps if store_states else 0)
+        steps = max(n_times - 1, int(np.ceil(t_span / DEFAULT_DT)))
+        runtime = steps * n_qubits * (MPDO_CALL + MPDO_FLOPS_FACTOR * (4.0 * chi) ** 3 / DENSE_FLOPS) \
+            + overhead
+    else:
+        raise ValueError(f"Unknown backend '{backend}'")
+    return {'backend': backend, 'memory': int(memory), 'runtime': float(runtime),
+            'store_states': store_states, 'time_chunk': chunk}
+
+
+def _format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if n < 1024 or unit == 'TB':
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def _fit(backend, budget, max_runtime, store_states, **kw):
+    """Best estimate of one backend within the budget (None if it cannot fit)"""
+    options = [store_states, False] if store_states else [False]
+    for keep in options:
+        est = estimate(backend, store_states=keep, **kw)
+        if budget is not None and est['memory'] > budget and backend in ('sparse', 'structured'):
+            # Chunk the output block until it fits (at least two times per call)
+            per_time = COMPLEX * 4 ** kw['n_qubits']
+            spare = (budget - estimate(backend, store_states=keep, time_chunk=0, **kw)['memory'])
+            if spare >= 2 * per_time:
+                est = estimate(backend, store_states=keep, time_chunk=int(spare // per_time), **kw)
+        if budget is not None and est['memory'] > budget:
+            continue
+        if max_runtime is not None and est['runtime'] > max_runtime:
+            return None
+        return est
+    return None
+
+
+def plan_evolution(n_qubits, n_times, n_jumps=None, t_span=10.0, norm=None, store_states=False,
+                   budget=None, n_trajectories=256, backends=PLANNED_BACKENDS, max_runtime=None,
+                   precision='double', n_propagators=1):
+    """
+    Choose the backend for a run, or refuse it.
+
+    Exact backends are ranked by estimated runtime; 'trajectory' is only used when no exact
+    backend fits. A run that does not fit with store_states=True is retried without stored
+    states, and sparse/structured runs are chunked in time.
+
+    Args:
+        budget: Memory budget in bytes (default memory_budget())
+        backends: Backends allowed
+        max_runtime: Runtime limit in seconds (default runtime_budget())
+        Other arguments as in estimate()
+
+    Returns:
+        dict with 'backend', 'memory', 'runtime', 'store_states', 'time_chunk' and
+        'estimates' (unconstrained estimate of every allowed backend)
+
+    Raises:
+        ResourceBudgetError: No allowed backend fits
+    """
+    budget = memory_budget() if budget is None else budget
+    max_runtime = runtime_budget() if max_runtime is None else max_runtime
+    kw = dict(n_qubits=n_qubits, n_times=n_times, n_jumps=n_jumps, t_span=t_span, norm=norm,
+              n_trajectories=n_trajectories, precision=precision, n_propagators=n_propagators)
+    estimates = {b: estimate(b, store_states=store_states, **kw) for b in backends}
+    feasible = [est for est in (_fit(b, budget, max_runtime, store_states, **kw) for b in backends)
+                if est is not None]
+    exact = [est for est in feasible if est['backend'] in EXACT_BACKENDS]
+    pool = exact or feasible
+    if not pool:
+        smallest = min(estimates.values(), key=lambda est: est['memory'])
+        raise ResourceBudgetError(
+            f"{n_qubits}-qubit run with {n_times} output times does not fit: smallest estimate "
+            f"{_format_bytes(smallest['memory'])} ({smallest['backend']}, "
+            f"{smallest['runtime']:.3g} s), budget {_format_bytes(budget or 0)}"
+            + (f", runtime limit {max_runtime:g} s" if max_runtime is not None else ""))
+    best = dict(min(pool, key=lambda est: est['runtime']))
+    best['estimates'] = estimates
+    return best
+
+
+def check_budget(backend, n_qubits, n_times, budget=None, max_runtime=None, **kw):
+    """
+    Estimate for a fixed backend; raises ResourceBudgetError if it does not fit.
+
+    Used before qt.mesolve runs, which cannot be chunked.
+    """
+    budget = memory_budget() if budget is None else budget
+    max_runtime = runtime_budget() if max_runtime is None else max_runtime
+    est = estimate(backend, n_qubits, n_times, **kw)
+    if budget is not None and est['memory'] > budget:
+        raise ResourceBudgetError(
+            f"{backend} run of {n_qubits} qubits needs ~{_format_bytes(est['memory'])}, "
+            f"budget {_format_bytes(budget)}")
+    if max_runtime is not None and est['runtime'] > max_runtime:
+        raise ResourceBudgetError(
+            f"{backend} run of {n_qubits} qubits needs ~{est['runtime']:.3g} s, "
+            f"limit {max_runtime:g} s")
+    return est
+
+
+def max_qubits(backend, n_times, budget=None, limit=30, **kw):
+    """Largest qubit count whose run fits the budget on the given backend (0 if none)"""
+    budget = memory_budget() if budget is None else budget
+    best = 0
+    for n in range(1, limit + 1):
+        if budget is not None and estimate(backend, n, n_times, **kw)['memory'] > budget:
+            break
+        best = n
+    return best
+
+
+if __name__ == "__main__":
+    budget = memory_budget()
+    print(f"Memory budget: {_format_bytes(budget) if budget else 'unlimited'}")
+    print(f"{'qubits':>6} {'backend':>11} {'memory':>10} {'runtime [s]':>12}  chosen")
+    for n in (2, 4, 6, 8, 10, 12, 14, 16):
+        try:
+            plan = plan_evolution(n, 100, n_jumps=n, t_span=10, norm=2 + 20 * n)
+        except ResourceBudgetError as e:
+            print(f"{n:>6} refused: {e}")
+            continue
+        for name, est in plan['estimates'].items():
+            mark = ''
+            if name == plan['backend']:
+                # The chosen run, after dropping stored states or chunking in time
+                est = plan
+                mark = '<-' if plan['time_chunk'] == 100 else f"<- time_chunk {plan['time_chunk']}"
+            print(f"{n:>6} {name:>11} {_format_bytes(est['memory']):>10} {est['runtime']:>12.3g}  {mark}")
+    for backend in ('dense', 'sparse', 'structured', 'qutip'):
+        print(f"Largest {backend} run in budget: {max_qubits(backend, 100)} qubits")
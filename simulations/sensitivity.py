@@ -0,0 +1,332 @@
+# Adjoint Rate Sensitivities and Parameter Fitting for the Lindblad Engine
+
+"""
+Derivatives of purity, von Neumann entropy and fidelity with respect to the jump rates of
+a lindblad_engine model, and through them with respect to the PQRG parameters mu_c,
+eta_Yb, PLV_j and N_r of the ethical circuit.
+
+With L = L_H + sum_j gamma_j D_j and an observable O(rho(T)) the adjoint identity is
+
+    dO / dgamma_j = Re int_0^T lambda(s)^H D_j rho(s) ds,   lambda(s) = e^{L^H (T - s)} dO/drho(T)
+
+so one forward run (with checkpoints) and one backward run of the adjoint state give the
+gradient for every rate at once, instead of one perturbed run per rate and parameter.
+Several observables share the backward run as columns of lambda, and costs that sum over
+output times (least-squares fits) add their terms to lambda as it passes each time. The
+integral uses GAUSS_NODES Gauss-Legendre nodes on substeps of length <= 1 / ||L||.
+
+All four PQRG parameters multiply every ethical rate, so x dO/dx is the same for each of
+them and data constrain only their product: fit_ethical_parameters therefore frees one
+parameter by default.
+"""
+
+import os
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse as sps
+
+from lindblad_engine import _observables, _taylor_step, ethical_circuit_model, evolve, pqrg_parameters
+from model_fit import load_curves
+from run_planner import ResourceBudgetError, plan_evolution
+
+SENSITIVITY_BACKENDS = ('dense', 'sparse')
+
+OBSERVABLES = ('purity', 'entropy', 'fidelity')
+
+# Rate-multiplying parameters of ethical_circuit_model
+ETHICAL_PARAMS = ('mu_c', 'eta_Yb', 'PLV_j', 'N_r')
+
+# Quadrature nodes per substep (order 2 GAUSS_NODES)
+GAUSS_NODES = 3
+
+DEFAULT_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'purity_t.csv')
+
+
+def _propagators(model, backend):
+    """forward(v, h) = e^{hL} v and backward(w, h) = e^{hL^H} w on [d^2] or [d^2, m] arrays"""
+    if backend == 'dense':
+        L = model.liouvillian(sparse=False)
+        cache = {}
+
+        def propagator(h, adjoint):
+            key = (round(h, 12), adjoint)
+            if key not in cache:
+                P = scipy.linalg.expm(L * h)
+                cache[key[0], False], cache[key[0], True] = P, P.conj().T.copy()
+            return cache[key]
+
+        return (lambda v, h: propagator(h, False) @ v), (lambda w, h: propagator(h, True) @ w)
+    L = model.liouvillian(sparse=True)
+    L_adj = L.conj().T.tocsr()
+    norm = model.norm_bound()
+    return ((lambda v, h: _taylor_step(L.dot, norm, v, h)),
+            (lambda w, h: _taylor_step(L_adj.dot, norm, w, h)))
+
+
+def _substeps(tlist, h_max):
+    """Number and length of the substeps of every output interval"""
+    spans = np.diff(tlist)
+    counts = np.maximum(1, np.ceil(spans / h_max - 1e-9).astype(int))
+    return counts, spans / counts
+
+
+def _observable_gradients(model, rho, names):
+    """Observables of rho [d, d] and their gradients g ([d^2, m]) with dO = Re(g^H dvec(rho))"""
+    rho = 0.5 * (rho + rho.conj().T)
+    values = {key: value[0] for key, value in _observables(model, rho[None], 'entropy' in names).items()}
+    columns = []
+    for name in names:
+        if name == 'purity':
+            g = 2 * rho
+        elif name == 'fidelity':
+            psi0 = model.psi0
+            g = np.outer(psi0, psi0.conj()) / (2 * max(values['fidelity'], np.finfo(float).tiny))
+        elif name == 'entropy':
+            # dS = -tr(log(rho) drho); trace-preserving perturbations drop the identity term
+            w, U = np.linalg.eigh(rho)
+            g = -(U * np.log(np.maximum(w, np.finfo(float).tiny))) @ U.conj().T
+        else:
+            raise ValueError(f"Unknown observable '{name}', expected one of {OBSERVABLES}")
+        columns.append(g.ravel())
+    return values, np.stack(columns, axis=1)
+
+
+def _adjoint(model, tlist, rho0, backend, dt, memory_budget, cotangents):
+    """
+    Forward run with checkpoints, then the backward adjoint run.
+
+    cotangents(k, rho) -> gradient [d^2, m] of the cost with respect to vec(rho(t_k)), or
+    None where the cost does not depend on t_k.
+
+    Returns:
+        (states [T, d, d] at tlist, rate gradients [m, J], backend)
+    """
+    d = model.dim
+    tlist = np.asarray(tlist, dtype=float)
+    h_max = 1.0 / model.norm_bound() if dt is None else dt
+    counts, lengths = _substeps(tlist, h_max)
+    # All checkpoints are kept: plan them as stored states of a run on the substep grid
+    plan = plan_evolution(model.n_qubits, int(counts.sum()) + 1, n_jumps=len(model.jumps),
+                          t_span=tlist[-1] - tlist[0], norm=model.norm_bound(), store_states=True,
+                          budget=memory_budget,
+                          backends=SENSITIVITY_BACKENDS if backend == 'auto' else (backend,))
+    if not plan['store_states']:
+        raise ResourceBudgetError(f"{counts.sum()} adjoint checkpoints of {model.n_qubits} qubits "
+                                  f"do not fit the memory budget")
+    backend = plan['backend']
+    forward, backward = _propagators(model, backend)
+    _, dissipators = model.liouvillian_terms()
+    stacked = sps.vstack(dissipators, format='csr')
+    nodes, weights = np.polynomial.legendre.leggauss(GAUSS_NODES)
+    nodes, weights = (nodes + 1) / 2, weights / 2
+
+    v = np.asarray(model.rho0 if rho0 is None else rho0, dtype=complex).ravel()
+    states = np.empty((len(tlist), d, d), dtype=complex)
+    states[0] = v.reshape(d, d)
+    checkpoints = []
+    for k in range(1, len(tlist)):
+        starts = np.empty((counts[k - 1], d * d), dtype=complex)
+        for s in range(counts[k - 1]):
+            starts[s] = v
+            v = forward(v, lengths[k - 1])
+        checkpoints.append(starts)
+        states[k] = v.reshape(d, d)
+
+    lam = None
+    gradient = 0.0
+    for k in range(len(tlist) - 1, -1, -1):
+        source = cotangents(k, states[k])
+        if source is not None:
+            lam = source if lam is None else lam + source
+        if k == 0 or lam is None:
+            continue
+        h = lengths[k - 1]
+        starts = checkpoints[k - 1].T
+        n_sub, m = starts.shape[1], lam.shape[1]
+        # Adjoint state at the end of every substep; the quadrature nodes are then batched
+        ends = np.empty((d * d, n_sub, m), dtype=complex)
+        for s in range(n_sub - 1, -1, -1):
+            ends[:, s] = lam
+            lam = backward(lam, h)
+        for c, w in zip(nodes, weights):
+            v_nodes = forward(starts, c * h)
+            lam_nodes = backward(ends.reshape(d * d, -1), (1 - c) * h).reshape(d * d, n_sub, m)
+            projected = (stacked @ v_nodes).reshape(len(dissipators), d * d, n_sub)
+            gradient = gradient + (w * h) * np.einsum('asm,jas->mj', lam_nodes.conj(), projected).real
+    if lam is None:
+        gradient = np.zeros((0, len(model.jumps)))
+    return states, np.atleast_2d(gradient), backend
+
+
+def evolve_sensitivity(model, tlist, rho0=None, observables=OBSERVABLES, backend='auto', dt=None,
+                       memory_budget=None):
+    """
+    Observables at tlist and their derivatives at tlist[-1] with respect to every jump rate.
+
+    Args:
+        model: QubitLindbladModel
+        tlist: Output times
+        rho0: Initial density matrix (default |psi0><psi0|)
+        observables: Subset of OBSERVABLES to differentiate
+        backend: 'dense', 'sparse' or 'auto' (run_planner.plan_evolution chooses)
+        dt: Longest substep (default 1 / model.norm_bound())
+        memory_budget: Bytes available; the forward checkpoints must fit
+
+    Returns:
+        dict with 't', 'purity', 'fidelity', 'entropy', 'final_state', 'backend', and
+        'rate_gradients': {observable: [J] derivatives with respect to model.jumps[j]'s rate}
+
+    Raises:
+        ResourceBudgetError: The checkpoints do not fit the memory budget
+    """
+    tlist = np.asarray(tlist, dtype=float)
+    last = len(tlist) - 1
+    final = {}
+
+    def cotangents(k, rho):
+        if k != last:
+            return None
+        values, g = _observable_gradients(model, rho, observables)
+        final.update(values)
+        return g
+
+    states, gradient, backend = _adjoint(model, tlist, rho0, backend, dt, memory_budget, cotangents)
+    obs = _observables(model, states, True)
+    return {'t': tlist, **obs, 'final_state': states[-1], 'backend': backend,
+            'rate_gradients': dict(zip(observables, gradient))}
+
+
+def ethical_sensitivity(n_qubits, tlist, mu_c=0.85, eta_Yb=0.92, PLV_j=0.71, N_r=None, scale=10.0,
+                        damping=None, **kwargs):
+    """
+    evolve_sensitivity of ethical_circuit_model, with the rate gradients contracted to the
+    PQRG parameters: dO/dx = sum_j gamma_j dO/dgamma_j / x for x in ETHICAL_PARAMS.
+
+    Returns:
+        The evolve_sensitivity dict plus 'gradients': {observable: {parameter: dO/dx}}
+        and 'params'
+    """
+    N_r = pqrg_parameters()[2] if N_r is None else N_r
+    params = dict(mu_c=mu_c, eta_Yb=eta_Yb, PLV_j=PLV_j, N_r=N_r)
+    model = ethical_circuit_model(n_qubits, mu_c, eta_Yb, PLV_j, scale, damping, N_r=N_r)
+    result = evolve_sensitivity(model, tlist, **kwargs)
+    rates = np.array([rate for _, _, rate in model.jumps])
+    result['gradients'] = {name: {key: float(grad @ rates) / value for key, value in params.items()}
+                           for name, grad in result['rate_gradients'].items()}
+    result['params'] = params
+    return result
+
+
+def load_purity_data(path=DEFAULT_DATA):
+    """(t, {'purity': ..., 'fidelity': ...}) from data/purity_t.csv"""
+    return load_curves(path)
+
+
+def fit_ethical_parameters(t, purity, n_qubits=4, free=('mu_c',), fidelity=None, scale=1.0,
+                           damping=None, backend='auto', dt=None, initial_scan=13, max_iter=100,
+                           tol=1e-10, **params):
+    """
+    Least-squares fit of ethical_circuit_model parameters to a purity (and fidelity) curve
+    with adjoint gradients.
+
+    The cost sum_k (P(t_k) - y_k)^2 [+ (F(t_k) - f_k)^2] is minimized over the log of the
+    free parameters by L-BFGS-B; each cost evaluation is one forward and one backward run.
+    Purity is not monotone in the rates (faster damping re-purifies towards |0...0>), so
+    the start is the best of a coarse log-spaced scan of the rate scale. t[0] must be the
+    initial time of the data (psi0 = |+>^n).
+
+    Args:
+        t, purity: Data (e.g. load_purity_data())
+        n_qubits: Circuit size (phi_convergence.py wrote purity_t.csv for 4 qubits)
+        free: Names from ETHICAL_PARAMS to fit; all of them multiply every rate, so more
+            than one only adds flat directions
+        fidelity: Optional fidelity data on the same times
+        scale: Rate scale of ethical_circuit_model (1.0 in phi_convergence.py, 10 in the demo)
+        damping, backend, dt: As in ethical_sensitivity
+        initial_scan: Forward runs with the free parameters' product scaled by
+            10^-3 ... 10^3 that pick the starting point (0: start from **params)
+        max_iter, tol: L-BFGS-B iterations and relative cost tolerance
+        **params: Starting values of ETHICAL_PARAMS (defaults as in ethical_circuit_model)
+
+    Returns:
+        dict with 'params' (all four), 'cost', 'rms', 'purity' and 'fidelity' (fitted
+        curves), 'n_evaluations', 'success' and 'message'
+    """
+    from scipy.optimize import minimize
+
+    unknown = set(free) | set(params)
+    if not unknown <= set(ETHICAL_PARAMS):
+        raise ValueError(f"Unknown parameters {sorted(unknown - set(ETHICAL_PARAMS))}, "
+                         f"expected names from {ETHICAL_PARAMS}")
+    values = dict(mu_c=0.85, eta_Yb=0.92, PLV_j=0.71, N_r=pqrg_parameters()[2])
+    values.update(params)
+    t = np.asarray(t, dtype=float)
+    targets = {'purity': np.asarray(purity, dtype=float)}
+    if fidelity is not None:
+        targets['fidelity'] = np.asarray(fidelity, dtype=float)
+    names = tuple(targets)
+    evaluations = []
+
+    def cost(log_x):
+        current = dict(values, **dict(zip(free, np.exp(log_x))))
+        model = model_at(current)
+        total = [0.0]
+
+        def cotangents(k, rho):
+            observed, g = _observable_gradients(model, rho, names)
+            residual = np.array([observed[name] - targets[name][k] for name in names])
+            total[0] += residual @ residual
+            return (g @ (2 * residual))[:, None]
+
+        _, gradient, _ = _adjoint(model, t, None, backend, dt, None, cotangents)
+        rates = np.array([rate for _, _, rate in model.jumps])
+        # Every rate is proportional to every parameter: d/dlog x = sum_j gamma_j d/dgamma_j
+        evaluations.append(current)
+        return total[0], np.full(len(free), gradient[0] @ rates)
+
+    def model_at(current):
+        return ethical_circuit_model(n_qubits, current['mu_c'], current['eta_Yb'], current['PLV_j'],
+                                     scale, damping, N_r=current['N_r'])
+
+    def residuals(current):
+        run = evolve(model_at(current), t, backend=backend)
+        return np.concatenate([run[name] - targets[name] for name in names])
+
+    x0 = np.log([values[name] for name in free])
+    if initial_scan and free:
+        # Spread the scale evenly over the free parameters
+        shifts = np.log(np.geomspace(1e-3, 1e3, initial_scan)) / len(free)
+        costs = [np.sum(residuals(dict(values, **dict(zip(free, np.exp(x0 + shift))))) ** 2)
+                 for shift in shifts]
+        x0 = x0 + shifts[int(np.argmin(costs))]
+    result = minimize(cost, x0, jac=True, method='L-BFGS-B',
+                      options={'maxiter': max_iter, 'ftol': tol})
+    values.update(dict(zip(free, np.exp(result.x))))
+    curves = evolve(model_at(values), t, backend=backend)
+    residual = curves['purity'] - targets['purity']
+    return {'params': values, 'cost': float(result.fun),
+            'rms': float(np.sqrt(np.mean(residual ** 2))),
+            'purity': curves['purity'], 'fidelity': curves['fidelity'],
+            'n_evaluations': len(evaluations), 'success': bool(result.success),
+            'message': str(result.message)}
+
+
+if __name__ == "__main__":
+    import time
+
+    tlist = np.linspace(0, 2, 21)
+    start = time.perf_counter()
+    run = ethical_sensitivity(3, tlist, scale=1.0)
+    adjoint_time = time.perf_counter() - start
+    print(f"3-qubit ethical circuit, t = {tlist[-1]:g} (adjoint in {adjoint_time:.2f} s):")
+    for name in OBSERVABLES:
+        grads = ', '.join(f"d/d{key} = {value:+.4f}" for key, value in run['gradients'][name].items())
+        print(f"  {name:>8} = {run[name][-1]:.4f}: {grads}")
+
+    t, columns = load_purity_data()
+    start = time.perf_counter()
+    fit = fit_ethical_parameters(t, columns['purity'])
+    print(f"\nFit of mu_c to data/purity_t.csv (4 qubits, scale 1): mu_c = {fit['params']['mu_c']:.4g}, "
+          f"RMS residual {fit['rms']:.3f}, {fit['n_evaluations']} adjoint evaluations "
+          f"in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,351 @@
+# Permutation-Symmetric Lindblad Backend
+
+"""
+Master-equation evolution of identical qubits in the permutation-invariant subspace.
+
+When every qubit has the same jump operators and rates, H depends only on the Hamming
+weight (sigma_z x ... x sigma_z does), and the initial state is a symmetric product
+|phi>^n, the density matrix stays permutation invariant. It is then a combination of
+
+    T(k) = average over site assignments of e_00^{k00} e_01^{k01} e_10^{k10} e_11^{k11}
+
+with e_ab = |a><b| on one site and k00 + k01 + k10 + k11 = n: C(n + 3, 3) coefficients
+instead of 4^n (23,426 at n = 50). In this basis
+
+- a single-site superoperator D applied to every site moves one site from type s to
+  type t with coefficient D[t, s] k_s (a sparse matrix, at most 16 terms per column)
+- H contributes -i (E(k10 + k11) - E(k01 + k11)) on the diagonal
+- Tr rho = sum of x_k over k01 = k10 = 0, Tr rho^2 = sum_k x_k x_{k^T} / multinomial(k)
+
+so purity, fidelity and single-qubit states need nothing of size 2^n. The von Neumann
+entropy needs the Dicke-block spectrum and is not computed; the Renyi-2 entropy
+-log Tr rho^2 (a lower bound) is reported instead.
+
+symmetric_ethical_model builds the ethical_agi_circuit model directly from closed-form
+merged rates, so 30-50 qubit circuits never allocate a 2^n array. Its per-qubit rates
+are only uniform up to a spread that vanishes quickly with n (3e-1 at n = 2, 3e-10 at
+n = 20): the model is accepted when the relative spread is below rtol and then uses the
+mean rate. The merged rates grow like 2^n / n, so large circuits are very stiff; such
+runs are integrated with BDF on the sparse Liouvillian instead of expm_multiply.
+"""
+
+import numpy as np
+import scipy.sparse as sps
+from scipy.integrate import solve_ivp
+from scipy.sparse.linalg import expm_multiply
+from scipy.special import gammaln
+
+from lindblad_engine import DESTROY, PHI, pqrg_parameters
+from precision import complex_dtype
+
+# Relative spread of per-qubit rates accepted as symmetric
+DEFAULT_RTOL = 1e-6
+
+# Above this norm x t_span, expm_multiply needs too many products and BDF is used
+STIFF_LIMIT = 1e5
+
+# Single-site basis order: e_00, e_01, e_10, e_11
+_SITE_BASIS = [np.outer(np.eye(2)[a], np.eye(2)[b]) for a in (0, 1) for b in (0, 1)]
+
+
+class SymmetryError(ValueError):
+    """The model is not permutation symmetric (within tolerance)"""
+
+
+def _count_products(counts, c):
+    """prod_ab c_ab^k_ab per count vector (with 0^0 = 1), computed in log space"""
+    with np.errstate(divide='ignore'):
+        log_c = np.log(c.astype(complex))
+    zero = np.abs(c) == 0
+    log_c[zero] = 0
+    values = np.exp((counts * log_c).sum(axis=1))
+    return np.where((counts[:, zero] > 0).any(axis=1), 0, values) if zero.any() else values
+
+
+def site_superoperator(A, rate=1.0):
+    """4 x 4 matrix of rate D[A] on the single-site basis (e_00, e_01, e_10, e_11)"""
+    A = np.asarray(A, dtype=complex)
+    M = A.conj().T @ A
+    D = np.empty((4, 4), dtype=complex)
+    for s, e in enumerate(_SITE_BASIS):
+        image = A @ e @ A.conj().T - 0.5 * (M @ e + e @ M)
+        D[:, s] = image.ravel()
+    return rate * D
+
+
+class SymmetricLindbladModel:
+    """
+    n identical qubits with a weight-dependent Hamiltonian and identical local jumps.
+
+    Parameters:
+    n_qubits: Number of qubits
+    weight_energies: E(w) for Hamming weight w = 0..n (parity: (-1)^w)
+    jumps: Iterable of (2x2 operator, rate) applied to every qubit
+    phi: Single-qubit initial state (default |+>); psi0 = phi^n
+    """
+
+    def __init__(self, n_qubits, weight_energies, jumps, phi=None):
+        self.n_qubits = n = n_qubits
+        self.weight_energies = np.asarray(weight_energies, dtype=float)
+        if self.weight_energies.shape != (n + 1,):
+            raise ValueError(f"weight_energies must have length {n + 1}")
+        jumps = list(jumps)
+        if any(rate < 0 for _, rate in jumps):
+            raise ValueError("Jump rates must be non-negative")
+        self.jumps = [(np.asarray(A, dtype=complex), float(rate)) for A, rate in jumps if rate > 0]
+        phi = np.full(2, 2 ** -0.5, dtype=complex) if phi is None else np.asarray(phi, dtype=complex)
+        self.phi = phi / np.linalg.norm(phi)
+
+        # Count vectors k = (k00, k01, k10, k11) and their lookup table
+        k01, k10, k11 = np.meshgrid(*(np.arange(n + 1),) * 3, indexing='ij')
+        keep = k01 + k10 + k11 <= n
+        counts = np.stack([n - (k01 + k10 + k11)[keep], k01[keep], k10[keep], k11[keep]], axis=1)
+        self.counts = counts
+        self.dim = len(counts)
+        self._index = np.full((n + 1,) * 3, -1, dtype=np.int64)
+        self._index[counts[:, 1], counts[:, 2], counts[:, 3]] = np.arange(self.dim)
+        self._log_multinomial = gammaln(n + 1) - gammaln(counts + 1).sum(axis=1)
+
+    def index(self, counts):
+        """Positions of count vectors [..., 4] in the coefficient vector"""
+        counts = np.asarray(counts)
+        return self._index[counts[..., 1], counts[..., 2], counts[..., 3]]
+
+    @property
+    def x0(self):
+        """Coefficients of (|phi><phi|)^n: x_k = multinomial(k) prod_ab (phi_a phi_b*)^k_ab"""
+        c = np.outer(self.phi, self.phi.conj()).ravel()
+        return np.exp(self._log_multinomial) * _count_products(self.counts, c)
+
+    def liouvillian(self, dtype=complex):
+        """Sparse Liouvillian on the coefficient vector x"""
+        E = self.weight_energies
+        k = self.counts
+        diag = -1j * (E[k[:, 2] + k[:, 3]] - E[k[:, 1] + k[:, 3]])
+        rows, cols, vals = [np.arange(self.dim)], [np.arange(self.dim)], [diag]
+        D = sum((site_superoperator(A, rate) for A, rate in self.jumps), np.zeros((4, 4), complex))
+        for s in range(4):
+            has = k[:, s] > 0
+            for t in range(4):
+                if D[t, s] == 0:
+                    continue
+                src = np.flatnonzero(has)
+                if t == s:
+                    rows.append(src)
+                    cols.append(src)
+                    vals.append(D[s, s] * k[src, s])
+                    continue
+                target = k[src].copy()
+                target[:, s] -= 1
+                target[:, t] += 1
+                rows.append(self.index(target))
+                cols.append(src)
+                vals.append(D[t, s] * k[src, s])
+        L = sps.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                           shape=(self.dim, self.dim))
+        return L.astype(dtype)
+
+    def norm_bound(self):
+        """Upper bound on the norm of the Liouvillian"""
+        spread = np.ptp(self.weight_energies)
+        return spread + sum(2 * rate * self.n_qubits * np.linalg.norm(A, 2) ** 2
+                            for A, rate in self.jumps)
+
+    # Observables --------------------------------------------------------------------
+
+    def trace(self, x):
+        """Tr rho for coefficient vectors [..., dim]"""
+        diagonal = (self.counts[:, 1] == 0) & (self.counts[:, 2] == 0)
+        return x[..., diagonal].sum(axis=-1).real
+
+    def purity(self, x):
+        """Tr rho^2 = sum_k x_k x_{k^T} / multinomial(k)"""
+        transpose = self.index(self.counts[:, [0, 2, 1, 3]])
+        weight = np.exp(-self._log_multinomial)
+        return np.einsum('...k,...k,k->...', x, x[..., transpose], weight).real
+
+    def fidelity(self, x):
+        """sqrt(<psi0|rho|psi0>) with <phi|e_ab|phi> = phi_a* phi_b per site"""
+        overlap = _count_products(self.counts, np.outer(self.phi.conj(), self.phi).ravel())
+        return np.sqrt(np.maximum((x @ overlap).real, 0))
+
+    def single_qubit_rdm(self, x):
+        """Reduced state of any one qubit, [..., 2, 2]"""
+        k = self.counts
+        out = np.zeros(x.shape[:-1] + (4,), dtype=complex)
+        for s in range(4):
+            rest = k.copy()
+            rest[:, s] -= 1
+            valid = (k[:, s] > 0) & (rest[:, 1] == 0) & (rest[:, 2] == 0)
+            out[..., s] = (x[..., valid] * k[valid, s] / self.n_qubits).sum(axis=-1)
+        return out.reshape(x.shape[:-1] + (2, 2))
+
+
+def ethical_circuit_rates(n_qubits, mu_c=0.85, eta_Yb=0.92, PLV_j=0.71, scale=10.0):
+    """
+    Merged per-qubit rates of ethical_agi_circuit without enumerating 2^n terms.
+
+    Qubit q collects gamma_i for i = q, q + n, ... < 2^n; the sum of sin(pi i / 2^n) over
+    that arithmetic progression has the closed form
+    sin(theta (q + (m - 1) n / 2)) sin(m n theta / 2) / sin(n theta / 2), theta = pi / 2^n.
+    """
+    _, S_q, N_r = pqrg_parameters()
+    n = n_qubits
+    theta = np.pi / 2.0 ** n
+    q = np.arange(n, dtype=float)
+    m = np.ceil((2.0 ** n - q) / n)
+    half = n * theta / 2
+    sums = np.sin(theta * q + (m - 1) * half) * np.sin(m * half) / np.sin(half)
+    return scale * N_r * np.exp(S_q / PHI) * mu_c * eta_Yb * PLV_j * sums
+
+
+def check_uniform(rates, rtol=DEFAULT_RTOL):
+    """Mean rate if the relative spread of rates is within rtol, else SymmetryError"""
+    rates = np.asarray(rates, dtype=float)
+    mean = rates.mean()
+    spread = np.ptp(rates) / mean if mean > 0 else np.ptp(rates)
+    if spread > rtol:
+        raise SymmetryError(f"Per-qubit rates differ by {spread:.2e} (relative) > rtol = {rtol:g}; "
+                            f"the dynamics is not permutation symmetric")
+    return mean
+
+
+def symmetric_ethical_model(n_qubits, mu_c=0.85, eta_Yb=0.92, PLV_j=0.71, scale=10.0,
+                            rtol=DEFAULT_RTOL, damping=None):
+    """
+    ethical_agi_circuit model in the permutation-invariant basis (SymmetryError if not).
+
+    damping: Optional per-qubit rate multipliers; only uniform ones keep the symmetry
+    """
+    rates = ethical_circuit_rates(n_qubits, mu_c, eta_Yb, PLV_j, scale)
+    if damping is not None:
+        rates = rates * np.broadcast_to(np.asarray(damping, dtype=float), rates.shape)
+    rate = check_uniform(rates, rtol)
+    parity = (-1.0) ** np.arange(n_qubits + 1)
+    return SymmetricLindbladModel(n_qubits, parity, [(DESTROY, rate)])
+
+
+def from_model(model, rtol=DEFAULT_RTOL):
+    """
+    Symmetric form of a lindblad_engine.QubitLindbladModel.
+
+    Raises:
+        SymmetryError: Energies depend on more than the Hamming weight, qubits have
+            different jumps, or psi0 is not a symmetric product state
+    """
+    n = model.n_qubits
+    weight = np.array([bin(i).count('1') for i in range(model.dim)])
+    weight_energies = np.zeros(n + 1)
+    weight_energies[weight] = model.energies
+    if not np.allclose(weight_energies[weight], model.energies):
+        raise SymmetryError("Energies are not a function of the Hamming weight")
+
+    per_qubit = [{} for _ in range(n)]
+    for qubit, A, rate in model.jumps:
+        per_qubit[qubit][A.tobytes()] = (A, rate)
+    jumps = []
+    for key, (A, _) in per_qubit[0].items():
+        rates = [per_qubit[q].get(key, (A, 0.0))[1] for q in range(n)]
+        jumps.append((A, check_uniform(rates, rtol)))
+    if any(set(p) != set(per_qubit[0]) for p in per_qubit):
+        raise SymmetryError("Qubits have different jump operators")
+
+    # psi0 must be phi^n: take phi from the first qubit and compare
+    block = model.psi0.reshape(2, -1)
+    phi = block[:, np.argmax(np.abs(block).sum(axis=0))]
+    phi = phi / np.linalg.norm(phi)
+    product = np.ones(1, dtype=complex)
+    for _ in range(n):
+        product = np.kron(product, phi)
+    if abs(abs(np.vdot(product, model.psi0)) - 1) > 1e-10:
+        raise SymmetryError("psi0 is not a symmetric product state")
+    return SymmetricLindbladModel(n, weight_energies, jumps, phi)
+
+
+def evolve_symmetric(model, tlist, store_states=False, precision='double', method='auto',
+                     rtol=1e-8, atol=1e-12):
+    """
+    Evolve a SymmetricLindbladModel and record observables at tlist.
+
+    Args:
+        method: 'expm' (expm_multiply), 'bdf' (stiff ODE solver with the sparse
+            Liouvillian as Jacobian) or 'auto' (BDF when norm x t_span > STIFF_LIMIT)
+        rtol, atol: BDF tolerances
+
+    Returns:
+        dict with 't', 'purity', 'fidelity', 'renyi2_entropy', 'single_qubit_rdm'
+        (final, [2, 2]), 'final_state' (coefficient vector), optional 'states' and
+        'backend' = 'symmetric'
+    """
+    tlist = np.asarray(tlist, dtype=float)
+    cdtype = complex_dtype(precision)
+    L = model.liouvillian(cdtype)
+    x0 = model.x0.astype(cdtype)
+    steps = np.diff(tlist)
+    if method == 'auto':
+        method = 'bdf' if model.norm_bound() * (tlist[-1] - tlist[0]) > STIFF_LIMIT else 'expm'
+    if method == 'bdf':
+        solution = solve_ivp(lambda t, x: L @ x, (tlist[0], tlist[-1]), x0, method='BDF',
+                             t_eval=tlist, jac=L, rtol=rtol, atol=atol)
+        if not solution.success:
+            raise RuntimeError(f"BDF integration failed: {solution.message}")
+        states = solution.y.T.astype(cdtype, copy=False)
+    elif method != 'expm':
+        raise ValueError(f"Unknown method '{method}', expected 'expm', 'bdf' or 'auto'")
+    elif steps.size and np.allclose(steps, steps[0], rtol=1e-10, atol=0):
+        states = expm_multiply(L, x0, start=0.0, stop=tlist[-1] - tlist[0], num=len(tlist),
+                               endpoint=True, traceA=L.diagonal().sum())
+    else:
+        states = [x0]
+        for h in steps:
+            states.append(expm_multiply(h * L, states[-1], traceA=h * L.diagonal().sum()))
+        states = np.array(states)
+    purity = model.purity(states)
+    result = {
+        't': tlist,
+        'purity': purity,
+        'fidelity': model.fidelity(states),
+        'renyi2_entropy': -np.log(purity),
+        'single_qubit_rdm': model.single_qubit_rdm(states[-1]),
+        'final_state': states[-1],
+        'backend': 'symmetric',
+    }
+    if store_states:
+        result['states'] = states
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    from lindblad_engine import evolve, parity_energies, QubitLindbladModel
+
+    # Exact check against the full engine for uniform rates
+    n = 4
+    full = QubitLindbladModel(n, parity_energies(n), [(q, DESTROY, 0.7) for q in range(n)])
+    tlist = np.linspace(0, 10, 100)
+    reference = evolve(full, tlist, backend='sparse')
+    reduced = evolve_symmetric(from_model(full), tlist)
+    print(f"{n} uniform qubits: max |purity - full| = "
+          f"{np.abs(reduced['purity'] - reference['purity']).max():.1e}, "
+          f"dim {from_model(full).dim} vs {4 ** n}")
+
+    for n in (2, 8, 20):
+        spread = np.ptp(ethical_circuit_rates(n)) / ethical_circuit_rates(n).mean()
+        print(f"ethical_agi_circuit rates, {n:>2} qubits: relative spread {spread:.1e}")
+
+    for n in (30, 40, 50):
+        start = time.perf_counter()
+        model = symmetric_ethical_model(n)
+        run = evolve_symmetric(model, tlist)
+        elapsed = time.perf_counter() - start
+        print(f"ethical_agi_circuit, {n} qubits (dim {model.dim:,}): final purity "
+              f"{run['purity'][-1]:.4f}, trace {model.trace(run['final_state']):.6f} ({elapsed:.1f} s)")
+
+    # Weak uniform damping keeps 50 qubits mixed over the whole run
+    model = SymmetricLindbladModel(50, (-1.0) ** np.arange(51), [(DESTROY, 0.02)])
+    start = time.perf_counter()
+    run = evolve_symmetric(model, tlist)
+    print(f"50 qubits, rate 0.02: min purity {run['purity'].min():.3e}, single-qubit purity "
+          f"{np.trace(run['single_qubit_rdm'] @ run['single_qubit_rdm']).real:.4f} "
+          f"({time.perf_counter() - start:.1f} s)")
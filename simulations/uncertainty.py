@@ -0,0 +1,263 @@
+# Monte Carlo Uncertainty Propagation for the alpha Derivation
+
+"""
+Error bars for the closed-form numbers of validate_theory.py.
+
+validate_alpha_calculation and validate_consciousness_density evaluate rho_hand, f, alpha
+and Delta alpha / alpha from point values. Here the inputs are distributions (THEORY_INPUTS:
+the quoted uncertainty where the sources give one, an explicit assumption otherwise), drawn
+in chunks of chunk_size and pushed through vectorized versions of the same formulas
+(alpha_model, density_model, decoherence_model).
+
+Per output, propagate returns the mean and standard deviation (chunk moments merged with
+the pairwise update of Chan et al.), quantiles (chunk quantiles averaged with chunk
+weights; with chunks of >= 10^5 draws the averaging bias is far below the Monte Carlo
+error) and Sobol indices of every non-fixed input: first order (Saltelli 2010) and total
+(Jansen 1999) of ln|output| by default, estimated on the first n_sobol draws by
+re-evaluating the model with one input at a time taken from an independent sample. Chunk k draws from
+SeedSequence(seed, spawn_key=(k,)) and chunks run on worker threads (NumPy releases the
+GIL in the array kernels) and are merged in order, so results do not depend on n_workers.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PHI = (1 + np.sqrt(5)) / 2
+
+# Supported input distributions and their parameters
+DISTRIBUTIONS = {
+    'fixed': ('value',),
+    'normal': ('mean', 'std'),
+    'lognormal': ('median', 'sigma_log'),
+    'uniform': ('low', 'high'),
+    'loguniform': ('low', 'high'),
+    'beta': ('mean', 'concentration'),   # alpha + beta, as in mt_ensemble.rate_multipliers
+}
+
+# Inputs of validate_theory.py
+THEORY_INPUTS = {
+    'delta_a_mu': ('normal', 2.51e-9, 0.59e-9),     # Fermilab 2025: 2.51(59) x 10^-9
+    'PLV_j': ('beta', 0.71, 50.0),                  # mt_ensemble.py PLV_j spread
+    'epsilon_RTI': ('lognormal', 1e-45, np.log(2)),  # Order-of-magnitude value: factor 2 (1 sigma)
+    'k_B': ('uniform', 1.375e-23, 1.385e-23),       # The 1.38e-23 literal, rounded to 3 digits
+    'S_q': ('fixed', 1.79776),                      # Exact Fibonacci sum
+    'PLV_j_target': ('beta', 0.618, 50.0),          # GCASP coherence target
+    'N_participants': ('fixed', 51),
+    'V_chamber': ('fixed', 100.0),                  # m^3
+    'tau_base': ('lognormal', 1e-13, np.log(2)),    # Tegmark's order-of-magnitude estimate
+}
+
+# THEORY_INPUTS used by each model
+MODEL_INPUTS = {
+    'alpha': ('delta_a_mu', 'PLV_j', 'epsilon_RTI', 'k_B', 'S_q'),
+    'density': ('epsilon_RTI', 'k_B', 'PLV_j_target', 'N_participants', 'V_chamber'),
+    'decoherence': ('tau_base', 'PLV_j'),
+}
+
+DEFAULT_QUANTILES = (0.025, 0.16, 0.5, 0.84, 0.975)
+
+
+def theory_inputs(model_name):
+    """THEORY_INPUTS restricted to the inputs of one model ('alpha', 'density', 'decoherence')"""
+    return {name: THEORY_INPUTS[name] for name in MODEL_INPUTS[model_name]}
+
+
+def sample_inputs(inputs, n, rng):
+    """Draw n values of every input spec; fixed inputs stay scalars"""
+    rng = np.random.default_rng(rng)
+    draws = {}
+    for name, (kind, *args) in inputs.items():
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{kind}' for {name}, "
+                             f"expected one of {tuple(DISTRIBUTIONS)}")
+        if len(args) != len(DISTRIBUTIONS[kind]):
+            raise ValueError(f"{name}: '{kind}' takes {DISTRIBUTIONS[kind]}, got {args}")
+        if kind == 'fixed':
+            draws[name] = float(args[0])
+        elif kind == 'normal':
+            draws[name] = rng.normal(args[0], args[1], n)
+        elif kind == 'lognormal':
+            draws[name] = args[0] * np.exp(args[1] * rng.standard_normal(n))
+        elif kind == 'uniform':
+            draws[name] = rng.uniform(args[0], args[1], n)
+        elif kind == 'loguniform':
+            draws[name] = np.exp(rng.uniform(np.log(args[0]), np.log(args[1]), n))
+        else:
+            draws[name] = rng.beta(args[0] * args[1], (1 - args[0]) * args[1], n)
+    return draws
+
+
+def alpha_model(x):
+    """rho_hand, f and 1/alpha of validate_alpha_calculation"""
+    rho_hand = x['epsilon_RTI'] / (x['k_B'] * np.log(2))
+    f = (1 / (x['delta_a_mu'] / x['PLV_j'])) * (1 / rho_hand) * (x['S_q'] / PHI)
+    alpha = f / PHI ** 3
+    return {'rho_hand': rho_hand, 'f': f, 'alpha_inverse': 1 / alpha}
+
+
+def density_model(x):
+    """Delta alpha / alpha and Delta f / f of validate_consciousness_density"""
+    rho_hand = x['epsilon_RTI'] / (x['k_B'] * np.log(2))
+    shift = rho_hand * x['N_participants'] * x['V_chamber'] * x['PLV_j_target'] / PHI ** 3
+    return {'delta_alpha_over_alpha': shift, 'freq_shift': 2 * shift}
+
+
+def decoherence_model(x):
+    """tau_decoherence of validate_pqrg_predictions"""
+    return {'tau_decoherence': x['tau_base'] / x['PLV_j']}
+
+
+class _Moments:
+    """Count, mean and second central moment, merged pairwise"""
+
+    def __init__(self, values=None):
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        if values is not None and len(values):
+            self.count = len(values)
+            self.mean = float(values.mean())
+            self.m2 = float(((values - self.mean) ** 2).sum())
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+
+
+SOBOL_SCALES = ('log', 'linear')
+
+
+def _sobol_transform(values, scale, n):
+    values = np.broadcast_to(values, (n,))
+    if scale == 'log':
+        with np.errstate(divide='ignore'):
+            return np.log(np.abs(values))
+    return values
+
+
+def _chunk_stats(model, inputs, varied, n, sobol, quantiles, center, scale, seed_seq):
+    """Moments, quantiles and Sobol sums of one chunk"""
+    rng = np.random.default_rng(seed_seq)
+    a = sample_inputs(inputs, n, rng)
+    fa = model(a)
+    stats = {}
+    for name, values in fa.items():
+        values = np.broadcast_to(values, (n,))
+        stats[name] = {'moments': _Moments(values), 'quantiles': np.quantile(values, quantiles)}
+    if not sobol:
+        return stats
+    b = sample_inputs(inputs, n, rng)
+    fb = model(b)
+    mixed = [model({**a, key: b[key]}) for key in varied]
+    for name in fa:
+        c = center[name]
+        ya, yb = (_sobol_transform(f[name], scale, n) - c for f in (fa, fb))
+        fab = [_sobol_transform(f[name], scale, n) - c for f in mixed]
+        stats[name].update(sobol_n=n,
+                           sobol_first=np.array([np.sum(yb * (y - ya)) for y in fab]),
+                           sobol_total=np.array([0.5 * np.sum((ya - y) ** 2) for y in fab]),
+                           sobol_var=_Moments(np.concatenate([ya, yb])))
+    return stats
+
+
+def propagate(model, inputs=None, n_samples=10 ** 7, chunk_size=10 ** 6, n_sobol=10 ** 6,
+              sobol_scale='log', quantiles=DEFAULT_QUANTILES, seed=0, n_workers=None):
+    """
+    Monte Carlo propagation of input distributions through a vectorized model.
+
+    Args:
+        model: Function of a dict of input arrays returning a dict of output arrays
+        inputs: {name: (distribution, *parameters)} (default: THEORY_INPUTS)
+        n_samples: Total draws (rounded up to whole chunks)
+        chunk_size: Draws per chunk
+        n_sobol: Draws used for the Sobol indices (0 disables them); the model runs
+            (2 + number of varied inputs) times on these
+        sobol_scale: 'log' (indices of ln|output|: products of inputs become sums and
+            heavy tails such as 1 / delta_a_mu stay finite) or 'linear'
+        quantiles: Probabilities of the reported quantiles
+        seed: Seed; chunk k uses SeedSequence(seed, spawn_key=(k,))
+        n_workers: Threads (default: os.cpu_count())
+
+    Returns:
+        dict output -> {'mean', 'std', 'quantiles' ({p: value}), 'sobol_first',
+        'sobol_total' ({input: index})}, plus 'n_samples'
+    """
+    if sobol_scale not in SOBOL_SCALES:
+        raise ValueError(f"sobol_scale must be one of {SOBOL_SCALES}")
+    inputs = THEORY_INPUTS if inputs is None else inputs
+    quantiles = tuple(quantiles)
+    varied = [name for name, spec in inputs.items() if spec[0] != 'fixed']
+    n_chunks = -(-n_samples // chunk_size)
+    n_sobol_chunks = -(-n_sobol // chunk_size) if n_sobol else 0
+    # Pilot means centre the Sobol products (keeps the sums well conditioned)
+    pilot = model(sample_inputs(inputs, 10_000, np.random.SeedSequence(seed, spawn_key=(n_chunks,))))
+    center = {name: float(np.mean(_sobol_transform(values, sobol_scale, 10_000)))
+              for name, values in pilot.items()}
+
+    def run(k):
+        return _chunk_stats(model, inputs, varied, chunk_size, k < n_sobol_chunks, quantiles, center,
+                            sobol_scale, np.random.SeedSequence(seed, spawn_key=(k,)))
+
+    n_workers = min(n_workers or os.cpu_count() or 1, n_chunks)
+    if n_workers == 1:
+        parts = [run(k) for k in range(n_chunks)]
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            parts = list(pool.map(run, range(n_chunks)))
+
+    result = {'n_samples': n_chunks * chunk_size}
+    for name in parts[0]:
+        moments = _Moments()
+        for part in parts:
+            moments.merge(part[name]['moments'])
+        levels = np.mean([part[name]['quantiles'] for part in parts], axis=0)
+        summary = {
+            'mean': moments.mean,
+            'std': np.sqrt(moments.m2 / max(moments.count - 1, 1)),
+            'quantiles': dict(zip(quantiles, levels)),
+        }
+        if n_sobol_chunks:
+            sobol = parts[:n_sobol_chunks]
+            count = sum(part[name]['sobol_n'] for part in sobol)
+            variance = _Moments()
+            for part in sobol:
+                variance.merge(part[name]['sobol_var'])
+            variance = variance.m2 / variance.count
+            first = sum(part[name]['sobol_first'] for part in sobol) / count
+            total = sum(part[name]['sobol_total'] for part in sobol) / count
+            scale = 1 / variance if variance > 0 else 0.0
+            summary['sobol_first'] = dict(zip(varied, first * scale))
+            summary['sobol_total'] = dict(zip(varied, total * scale))
+        result[name] = summary
+    return result
+
+
+def format_interval(summary, low=0.16, high=0.84):
+    """'median [low, high]' of a propagate summary (68% interval by default)"""
+    q = summary['quantiles']
+    return f"{q[0.5]:.3g} [{q[low]:.3g}, {q[high]:.3g}]"
+
+
+if __name__ == "__main__":
+    import time
+
+    for label, key, model in (('alpha derivation', 'alpha', alpha_model),
+                              ('consciousness density', 'density', density_model),
+                              ('decoherence time', 'decoherence', decoherence_model)):
+        start = time.perf_counter()
+        result = propagate(model, theory_inputs(key), n_samples=10 ** 7)
+        elapsed = time.perf_counter() - start
+        print(f"\n{label}: {result['n_samples']:,} draws in {elapsed:.2f} s")
+        for name, summary in result.items():
+            if name == 'n_samples':
+                continue
+            print(f"  {name:>24}: {format_interval(summary)} (68%), mean {summary['mean']:.3g} "
+                  f"+- {summary['std']:.2g}")
+            ranked = sorted(summary['sobol_total'].items(), key=lambda item: -item[1])
+            print(" " * 28 + "total Sobol: " +
+                  ", ".join(f"{key} {value:.2f}" for key, value in ranked if value > 0.005))
@@ -0,0 +1,78 @@
+"""
+Pytest checks for the parameter continuation driver.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import continuation as co  # noqa: E402
+import lindblad_engine as le  # noqa: E402
+
+DEPHASE = np.diag([1.0, -1.0]).astype(complex)
+TILTED = np.array([[0.3, 1.0], [0.2, -0.3]], dtype=complex)
+
+
+def pumped_model(point, n=3):
+    """Decay, dephasing and a tilted jump: a mixed steady state with coherences"""
+    decay, dephasing = point
+    jumps = ([(q, le.DESTROY, decay * (1 + 0.3 * q)) for q in range(n)]
+             + [(q, DEPHASE, dephasing) for q in range(n)]
+             + [(q, TILTED, 0.4) for q in range(n)])
+    return le.QubitLindbladModel(n, 0.8 * le.parity_energies(n), jumps)
+
+
+def direct_steady_state(model):
+    d = model.dim
+    L = model.liouvillian(sparse=False)
+    L[0] = 0
+    L[0, np.arange(d) * (d + 1)] = 1
+    rhs = np.zeros(d * d)
+    rhs[0] = 1
+    return np.linalg.solve(L, rhs).reshape(d, d)
+
+
+def test_sweep_matches_independent_solves():
+    points, shape = co.parameter_grid(np.linspace(0.2, 2.0, 20), np.linspace(0.05, 1.0, 12))
+    run = co.continuation_sweep(pumped_model, points, shape)
+    assert run['factorizations'] < len(points) // 10
+    assert run['iterations'].max() <= 30 and not run['branch'].any()
+    for i in range(0, len(points), 23):
+        rho = direct_steady_state(pumped_model(points[i]))
+        assert np.isclose(run['purity'][i], np.trace(rho @ rho).real, atol=1e-9)
+        assert np.isclose(run['entropy'][i], le.von_neumann_entropy(rho[None])[0], atol=1e-8)
+
+    final = co.continuation_sweep(pumped_model, points[:6], mode='evolve', tlist=[0.0, 1.5])
+    reference = le.evolve(pumped_model(points[4]), [0.0, 1.5], backend='dense')
+    assert np.isclose(final['purity'][4], reference['purity'][-1], atol=1e-8)
+    with pytest.raises(ValueError):
+        co.continuation_sweep(pumped_model, points, mode='evolve')
+
+
+def test_serpentine_and_nearest_neighbour_paths():
+    points, shape = co.parameter_grid(np.arange(4), np.arange(3), np.arange(2))
+    order = co.path_order(points, shape)
+    assert sorted(order) == list(range(len(points)))
+    assert np.all(np.abs(np.diff(points[order], axis=0)).sum(axis=1) == 1)
+    scattered = np.random.default_rng(0).permutation(np.linspace(0, 1, 20))
+    order = co.path_order(scattered)
+    # Greedy nearest neighbour: at most one backtrack over the interval
+    assert np.abs(np.diff(scattered[order])).sum() < 2.0
+    assert np.abs(np.diff(scattered)).sum() > 4.0
+
+
+def test_branch_change_is_flagged():
+    # The decay rate jumps twentyfold at 1.0
+    def factory(point):
+        return pumped_model([point[0] * (1 if point[0] < 1 else 20), 0.3])
+
+    run = co.continuation_sweep(factory, np.linspace(0.5, 1.5, 21))
+    assert list(np.nonzero(run['branch'])[0]) == [10]
+    with pytest.raises(ValueError):
+        co.continuation_sweep(lambda p: le.QubitLindbladModel(2, le.parity_energies(2), []), [[0.0], [1.0]])
@@ -0,0 +1,53 @@
+"""
+Pytest checks for the batched density-matrix kernels.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import density_kernels  # noqa: E402
+
+
+def random_states(T, d, rng):
+    G = rng.standard_normal((T, d, d)) + 1j * rng.standard_normal((T, d, d))
+    rho = G @ np.conj(np.transpose(G, (0, 2, 1)))
+    return rho / np.trace(rho, axis1=1, axis2=2).real[:, None, None]
+
+
+def test_kernels_match_dense_reference():
+    rho = random_states(50, 8, np.random.default_rng(0))
+    reference_purity = np.trace(rho @ rho, axis1=1, axis2=2).real
+    assert np.allclose(density_kernels.purity(rho), reference_purity)
+    lam = np.linalg.eigvalsh(rho)
+    reference_entropy = -(lam * np.log(lam)).sum(axis=1)
+    assert np.allclose(density_kernels.von_neumann_entropy(rho, chunk_size=7), reference_entropy)
+    assert np.all(density_kernels.von_neumann_entropy(rho, method='renyi2') <= reference_entropy + 1e-12)
+    assert np.allclose(density_kernels.renyi_entropy(rho, 3),
+                       np.log((lam ** 3).sum(axis=1)) / -2)
+
+
+def test_pure_and_maximally_mixed_limits():
+    kets = np.eye(4)[:2] + 1j * np.eye(4)[2:]
+    assert np.allclose(density_kernels.purity(kets / np.sqrt(2)), 1.0)
+    assert np.allclose(density_kernels.von_neumann_entropy(kets / np.sqrt(2)), 0.0, atol=1e-12)
+    mixed = np.eye(4) / 4
+    assert density_kernels.von_neumann_entropy(mixed, base=2)[0] == pytest.approx(2.0)
+    assert density_kernels.linear_entropy(mixed)[0] == pytest.approx(0.75)
+    # Four kets of dimension 4 are also [4, 4]: say so with kets=True
+    square = np.eye(4)
+    assert np.allclose(density_kernels.purity(square, kets=True), 1.0)
+    assert np.allclose(density_kernels.von_neumann_entropy(square, kets=True), 0.0)
+    assert density_kernels.eigenvalues(square, kets=True).shape == (4, 4)
+    assert density_kernels.purity(square / 4)[0] == pytest.approx(0.25)
+
+
+def test_qutip_state_lists():
+    qt = pytest.importorskip('qutip')
+    states = [qt.rand_dm(4, seed=s) for s in range(5)] + [qt.basis(4, 1)]
+    entropies = density_kernels.von_neumann_entropy(states)
+    assert np.allclose(entropies, [qt.entropy_vn(qt.ket2dm(s) if s.isket else s) for s in states])
@@ -0,0 +1,48 @@
+"""
+Pytest checks for the lambdify-and-cache derivation registry.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import derivation_cache as dc  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    dc._COMPILED.clear()
+    yield str(tmp_path)
+    dc._COMPILED.clear()
+
+
+def test_ds2_kernel_matches_symbolic(cache_dir):
+    ds2 = dc.compile_derivation('ds2', cache_dir=cache_dir)
+    values = dict(zip(dc.DS2_ARGS, np.linspace(0.1, 1.5, len(dc.DS2_ARGS))))
+    expected = float(ds2.expr.subs({s: values[str(s)] for s in ds2.args}))
+    assert ds2(*values.values()) == pytest.approx(expected, rel=1e-12)
+
+
+def test_kernel_is_pickled_and_reloaded(cache_dir):
+    first = dc.compile_derivation('ds2_base', cache_dir=cache_dir)
+    assert any(f.startswith('ds2_base-') for f in os.listdir(cache_dir))
+
+    dc._COMPILED.clear()
+    reloaded = dc.compile_derivation('ds2_base', cache_dir=cache_dir)
+    assert reloaded is not first
+    assert reloaded.source == first.source
+    args = np.arange(1, len(dc.DS2_ARGS) + 1, dtype=float)
+    assert reloaded(*args) == first(*args)
+
+
+def test_constants_broadcast_and_keep_float32(cache_dir):
+    anyon = dc.compile_derivation('ds2_anyon', cache_dir=cache_dir)
+    t = np.zeros(5, dtype=np.float32)
+    out = anyon(*([t] * len(dc.DS2_ARGS)))
+    assert out.shape == (5,)
+    assert out.dtype == np.float32
+    assert dc.compile_derivation('F_any_det', cache_dir=cache_dir)() == pytest.approx(-1.0)
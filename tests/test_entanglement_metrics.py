@@ -0,0 +1,66 @@
+"""
+Pytest checks for the reduced-density-matrix and entanglement metrics.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import entanglement_metrics as em  # noqa: E402
+
+
+def random_kets(T, n, rng):
+    psi = rng.standard_normal((T, 2 ** n)) + 1j * rng.standard_normal((T, 2 ** n))
+    return psi / np.linalg.norm(psi, axis=1, keepdims=True)
+
+
+def test_ket_and_density_paths_agree_with_qutip():
+    qt = pytest.importorskip('qutip')
+    n = 4
+    kets = random_kets(3, n, np.random.default_rng(0))
+    rho = np.einsum('ti,tj->tij', kets, kets.conj())
+    two_ket, pairs = em.two_qubit_rdms(kets)
+    two_rho, _ = em.two_qubit_rdms(rho)
+    assert np.allclose(two_ket, two_rho)
+    assert np.allclose(em.single_qubit_rdms(kets), em.single_qubit_rdms(rho))
+    state = qt.Qobj(kets[1].reshape(-1, 1), dims=[[2] * n, [1] * n])
+    for k, (i, j) in enumerate(pairs):
+        assert np.allclose(two_ket[1, k], state.ptrace([i, j]).full())
+    assert np.allclose(em.single_qubit_rdms(kets)[1, 2], state.ptrace(2).full())
+
+
+def test_bell_and_product_metrics():
+    bell = np.zeros((1, 8), dtype=complex)
+    bell[0, [0b000, 0b101]] = 1 / np.sqrt(2)  # qubits 0 and 2 entangled, qubit 1 in |0>
+    metrics = em.local_metrics(bell)
+    k = metrics['pairs'].index((0, 2))
+    assert np.allclose(metrics['purity_1q'][0], [0.5, 1.0, 0.5])
+    assert metrics['concurrence'][0, k] == pytest.approx(1.0)
+    assert metrics['mutual_information'][0, k] == pytest.approx(2 * np.log(2))
+    others = [m for m, p in enumerate(metrics['pairs']) if p != (0, 2)]
+    assert np.allclose(metrics['concurrence'][0, others], 0.0, atol=1e-7)
+
+
+def test_chunked_threads_match_single_pass():
+    kets = random_kets(40, 5, np.random.default_rng(1))
+    serial = em.local_metrics(kets, chunk_size=40, n_workers=1)
+    threaded = em.local_metrics(kets, chunk_size=7, n_workers=4)
+    for key in ('purity_1q', 'entropy_1q', 'mutual_information', 'concurrence'):
+        assert np.allclose(serial[key], threaded[key])
+
+
+def test_single_density_matrix_and_square_ket_stacks():
+    rho = np.eye(4) / 4
+    assert em.single_qubit_rdms(rho).shape == (1, 2, 2, 2)
+    assert np.allclose(em.single_qubit_rdms(rho)[0], np.eye(2) / 2)
+    assert np.allclose(em.local_metrics(rho)['purity_1q'], 0.5)
+    # Four 2-qubit kets are also [4, 4]: say so with kets=True
+    kets = random_kets(4, 2, np.random.default_rng(1))
+    rho_t = np.einsum('ti,tj->tij', kets, kets.conj())
+    assert np.allclose(em.single_qubit_rdms(kets, kets=True), em.single_qubit_rdms(rho_t))
+    metrics = em.local_metrics(kets, chunk_size=2, kets=True)
+    assert np.allclose(metrics['concurrence'], em.local_metrics(rho_t)['concurrence'])
@@ -0,0 +1,175 @@
+"""
+Pytest checks for the asyncio ethical halt service.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'applications'))
+
+import ethical_halt_service as ehs  # noqa: E402
+
+# Row 0 is confident, row 1 uniform over 4 outcomes (ln 4 > 1.111)
+LOGITS = np.array([[10.0, 0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 0.0]], dtype=np.float32)
+
+
+def _serve(tmp_path, test, **kwargs):
+    """Run test(service, path) against a service on a tmp Unix socket, then close it"""
+    path = str(tmp_path / 'halt.sock')
+
+    async def main():
+        service = await ehs.HaltService(**kwargs).start(unix_path=path)
+        try:
+            return await test(service, path)
+        finally:
+            await asyncio.wait_for(service.close(), 5)
+
+    return asyncio.run(main())
+
+
+async def _http(path, request):
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(request)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return head.split(b'\r\n')[0].decode(), json.loads(body)
+
+
+def _post_check(body):
+    payload = json.dumps(body).encode()
+    return (b'POST /check HTTP/1.1\r\nContent-Type: application/json\r\n'
+            + f'Content-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+
+
+def test_binary_and_json_replies(tmp_path):
+    async def test(service, path):
+        client = await ehs.HaltClient.connect(unix_path=path)
+        entropies, halt = await client.check(LOGITS.astype(np.float16))
+        assert halt.tolist() == [False, True]
+        assert np.isclose(entropies[1], np.log(4), atol=1e-3)
+        # Probabilities on the same connection
+        _, halt = await client.check(np.array([[0.5, 0.5]]), from_logits=False)
+        assert halt.tolist() == [False]
+        await client.close()
+
+        entropies, halt = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: ehs.check_sync(LOGITS, unix_path=path))
+        assert halt.tolist() == [False, True]
+
+        status, body = await _http(path, _post_check({'logits': LOGITS.tolist()}))
+        assert status.endswith('200 OK') and body['halt'] == [False, True]
+
+    _serve(tmp_path, test)
+
+
+@pytest.mark.parametrize('request_body', [{'probabilities': []}, {'logits': 1.5},
+                                          {'logits': [[[0.0]]]}, [1, 2]],
+                         ids=['missing-key', 'scalar-logits', '3d-logits', 'non-object'])
+def test_malformed_json_gets_400(tmp_path, request_body):
+    async def test(service, path):
+        status, body = await _http(path, _post_check(request_body))
+        assert status.endswith('400 Bad Request') and 'error' in body
+        # The service keeps answering
+        status, body = await _http(path, _post_check({'logits': LOGITS[1].tolist()}))
+        assert status.endswith('200 OK') and body['halt'] == [True]
+
+    _serve(tmp_path, test)
+
+
+def test_protocol_errors_get_an_error_frame(tmp_path):
+    async def test(service, path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(ehs.REQUEST_HEADER.pack(ehs.MAGIC, 7, 1, 1, 4))
+        header = await reader.readexactly(ehs.RESPONSE_HEADER.size)
+        body = await reader.readexactly(ehs._body_size(header))
+        with pytest.raises(RuntimeError, match='unknown dtype'):
+            ehs._decode_response(header, body)
+        assert await reader.read() == b''   # then the connection is dropped
+        writer.close()
+
+    _serve(tmp_path, test)
+
+
+def test_concurrent_clients_are_batched(tmp_path):
+    n_clients = 16
+
+    async def one(path, i):
+        client = await ehs.HaltClient.connect(unix_path=path)
+        result = await client.check(np.roll(LOGITS, i % 4, axis=1))
+        await client.close()
+        return result
+
+    async def test(service, path):
+        results = await asyncio.gather(*[one(path, i) for i in range(n_clients)])
+        assert all(halt.tolist() == [False, True] for _, halt in results)
+        assert service.n_rows == 2 * n_clients
+        assert service.n_batches < n_clients
+
+    _serve(tmp_path, test, max_delay=0.05)
+
+
+def test_overload_is_rejected(tmp_path, monkeypatch):
+    # Every batch runs in the executor, held until the gate opens
+    monkeypatch.setattr(ehs, 'INLINE_ELEMENTS', 0)
+    gate = threading.Event()
+
+    async def test(service, path):
+        check = service.monitor.check
+        service.monitor.check = lambda batch, from_logits: (gate.wait(5), check(batch, from_logits))[1]
+        clients = [await ehs.HaltClient.connect(unix_path=path) for _ in range(3)]
+        first = asyncio.ensure_future(clients[0].check(LOGITS))
+        while service.n_batches == 0:           # taken by the (blocked) batcher
+            await asyncio.sleep(1e-3)
+        second = asyncio.ensure_future(clients[1].check(LOGITS))
+        while service._queue.qsize() == 0:      # fills the one queue slot
+            await asyncio.sleep(1e-3)
+        with pytest.raises(OverflowError):
+            await clients[2].check(LOGITS)
+        assert service.rejected == 1
+        gate.set()
+        for result in await asyncio.gather(first, second):
+            assert result[1].tolist() == [False, True]
+        for client in clients:
+            await client.close()
+
+    try:
+        _serve(tmp_path, test, max_queue=1, admission_timeout=1e-3)
+    finally:
+        gate.set()
+
+
+def test_latency_histogram_and_stats(tmp_path):
+    histogram = ehs.LatencyHistogram()
+    for _ in range(998):
+        histogram.record(10e-6)
+    histogram.record(1e-3)
+    histogram.record(1e-3)
+    summary = histogram.summary()
+    assert summary['count'] == 1000
+    assert summary['p50_us'] == 16 and summary['p999_us'] == 1024
+    assert summary['buckets_us'] == {'<16': 998, '<1024': 2}
+
+    async def test(service, path):
+        client = await ehs.HaltClient.connect(unix_path=path)
+        for _ in range(5):
+            await client.check(LOGITS)
+        # An idle connection left open must not hold up close()
+        await ehs.HaltClient.connect(unix_path=path)
+        status, stats = await _http(path, b'GET /stats HTTP/1.1\r\n\r\n')
+        assert status.endswith('200 OK')
+        assert stats['checked'] == 10 and stats['halted'] == 5
+        latency = stats['latency']
+        assert latency['count'] == 5
+        assert sum(latency['buckets_us'].values()) == 5
+        assert 0 < latency['p50_us'] <= latency['p99_us'] <= latency['p999_us']
+        return service
+
+    service = _serve(tmp_path, test)
+    assert not service._handlers
@@ -0,0 +1,65 @@
+"""
+Pytest checks for the batch entropy / ethical halt monitor.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'applications'))
+
+import ethical_monitor as em  # noqa: E402
+
+
+def _reference_entropy(logits):
+    z = logits.astype(np.float64)
+    z = z - z.max(axis=1, keepdims=True)
+    log_p = z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+    return -(np.exp(log_p) * log_p).sum(axis=1)
+
+
+def test_threshold_matches_pqrg_value():
+    assert em.ENTROPY_THRESHOLD == pytest.approx(1.111, abs=1e-3)
+
+
+@pytest.mark.parametrize('dtype', [np.float16, np.float32, np.float64])
+def test_logit_entropy_is_stable(dtype):
+    logits = (np.random.default_rng(0).standard_normal((3000, 17)) * 40).astype(dtype)
+    entropies = em.batch_entropy(logits, n_workers=3)
+    assert entropies.dtype == np.float32
+    assert np.allclose(entropies, _reference_entropy(logits), atol=1e-4)
+
+
+def test_probability_inputs_with_zeros():
+    p = np.array([[0.5, 0.5, 0.0], [1.0, 0.0, 0.0]], dtype=np.float32)
+    assert np.allclose(em.batch_entropy(p, from_logits=False), [np.log(2), 0.0])
+
+
+def test_monitor_flags_high_entropy_rows():
+    halted = []
+    monitor = em.EthicalHaltMonitor(on_halt=lambda idx, ent: halted.extend(idx), n_workers=1)
+    logits = np.array([[10.0, 0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 0.0]], dtype=np.float32)
+    _, halt = monitor.check(logits)
+    assert halt.tolist() == [False, True]  # uniform over 4 outcomes: ln 4 > 1.111
+    assert halted == [1]
+    assert monitor.stats()['halted'] == 1
+
+
+def test_masked_and_nan_logits():
+    logits = np.array([[0.0, 0.0, -np.inf, -np.inf],
+                       [0.0, 0.0, 0.0, -np.inf],
+                       [np.nan] * 4,
+                       [-np.inf] * 4], dtype=np.float32)
+    entropies = em.batch_entropy(logits)
+    assert np.allclose(entropies[:2], [np.log(2), np.log(3)])
+    assert np.isnan(entropies[2:]).all()
+    _, halt = em.EthicalHaltMonitor(n_workers=1).check(logits)
+    assert halt.tolist() == [False, False, True, True]  # ln 3 < 1.111 < ln 4
+
+
+def test_nan_probabilities_halt():
+    p = np.array([[0.5, 0.5, 0.0], [np.nan] * 3], dtype=np.float32)
+    _, halt = em.EthicalHaltMonitor(from_logits=False, n_workers=1).check(p)
+    assert halt.tolist() == [False, True]
@@ -0,0 +1,48 @@
+"""
+Pytest checks for the Fibonacci anyon F-symbol / braid-group engine.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import fibonacci_anyons as fa  # noqa: E402
+
+
+def test_pentagon_and_hexagon_hold():
+    assert fa.check_pentagon() < 1e-12
+    assert fa.check_hexagon() < 1e-12
+
+
+@pytest.mark.parametrize('n_anyons', [3, 4, 5])
+def test_generators_satisfy_braid_relations(n_anyons):
+    gens = fa.braid_generators(n_anyons)
+    for i in range(n_anyons - 2):
+        lhs = gens[i] @ gens[i + 1] @ gens[i]
+        rhs = gens[i + 1] @ gens[i] @ gens[i + 1]
+        assert np.allclose(lhs, rhs)
+    for i in range(n_anyons - 3):
+        assert np.allclose(gens[i] @ gens[i + 2], gens[i + 2] @ gens[i])
+
+
+def test_compose_matches_sequential_product():
+    word = fa.random_braid_word(1000, n_anyons=4, rng=1)
+    compiler = fa.BraidCompiler(n_anyons=4, block_size=64)
+    gens = fa.braid_generators(4)
+    expected = np.eye(gens.shape[1], dtype=complex)
+    for letter in word:
+        g = gens[abs(letter) - 1]
+        expected = (g if letter > 0 else g.conj().T) @ expected
+    assert np.allclose(compiler.compose(word), expected)
+
+
+def test_repeated_subwords_hit_cache():
+    compiler = fa.BraidCompiler(n_anyons=3, block_size=16)
+    word = np.tile(fa.random_braid_word(16, rng=2), 100)
+    compiler.compose(word)
+    assert compiler.misses == 1
+    assert compiler.hits == 99
@@ -0,0 +1,76 @@
+"""
+Pytest checks for the split-step GPE solver and the sonic-horizon configuration.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import gpe_horizon as gh  # noqa: E402
+
+
+def test_stationary_flow_and_norm():
+    horizon = gh.SonicHorizon(1024, 256.0, step_width=2.0)
+    assert horizon.c_down < horizon.v < horizon.c_up
+    solver = horizon.solver(dt=0.03)
+    ref = horizon.stationary_state()
+    assert np.abs(solver.evolve(ref, 300) - ref).max() < 1e-10
+    # Without the sponge the evolution is unitary
+    solver.damping = None
+    psi0 = ref + gh.seeded_noise(horizon.shape, 0.05, rng=1)
+    psi = solver.evolve(psi0, 300)
+    assert np.isclose(np.sum(np.abs(psi) ** 2), np.sum(np.abs(psi0) ** 2), rtol=1e-10)
+    with pytest.raises(ValueError):
+        horizon.solver(dt=1.0)
+    with pytest.raises(ValueError):
+        gh.SonicHorizon(1024, 256.0, v=1.2)
+
+
+def test_bogoliubov_dispersion():
+    L, g, eps = 64.0, 1.0, 1e-4
+    x = np.arange(256) * L / 256
+    k = 2 * np.pi * 4 / L
+    solver = gh.SplitStepGPE((256,), (L,), np.zeros(256), g, mu=g, dt=0.01)
+    omega = np.sqrt(0.5 * k ** 2 * (0.5 * k ** 2 + 2 * g))
+    run = solver.run(1 + eps * np.cos(k * x), t_final=10.0, n_snapshots=51)
+    expected = 1 + 2 * eps * np.cos(omega * run['t'])
+    assert np.allclose(run['density'][:, 0], expected, atol=2e-6)
+
+
+def test_batched_2d_run_streams_snapshots(tmp_path):
+    horizon = gh.SonicHorizon(128, 64.0, step_width=2.0, n_transverse=8, width=8.0)
+    solver = horizon.solver(dt=0.05, n_workers=2)
+    psi0 = horizon.stationary_state() + gh.seeded_noise((2,) + horizon.shape, 0.01, rng=0)
+    path = str(tmp_path / 'density.npy')
+    run = solver.run(psi0, t_final=2.0, n_snapshots=5, stride=2, out_path=path)
+    assert run['density'].shape == (5, 2, 64)
+    assert np.allclose(np.load(path), run['density'])
+    single = solver.evolve(psi0[1], int(round(run['t'][-1] / solver.dt)))
+    assert np.allclose(run['final_state'][1], single, atol=1e-12)
+
+
+def test_horizon_temperature_and_correlations():
+    horizon = gh.SonicHorizon(4096, 512.0, v=0.75, step_width=3.0)
+    x_h, kappa = horizon.horizon()
+    assert np.isclose(np.interp(x_h, horizon.x, horizon.sound_speed), horizon.v, atol=1e-4)
+    slope = np.gradient(horizon.sound_speed, horizon.x)
+    assert np.isclose(np.interp(x_h, horizon.x, np.abs(slope)), kappa, rtol=1e-3)
+    T, T_kelvin = horizon.hawking_temperature(healing_length=1e-6)
+    units = gh.physical_units(1e-6)
+    assert np.isclose(T_kelvin, gh.HBAR * kappa / (2 * np.pi * gh.K_B * units['time']))
+
+    # Columns 0-9 fluctuate together, the rest independently
+    rng = np.random.default_rng(3)
+    common = rng.standard_normal((20000, 1))
+    samples = 1 + 0.1 * np.hstack([np.repeat(common, 10, axis=1), rng.standard_normal((20000, 10))])
+    bins, g2 = gh.density_correlations(samples, np.arange(20.0), n_bins=4)
+    assert np.allclose(bins, [2.5, 7.5, 12.5, 17.5])
+    assert np.isclose(g2[0, 1], 0.01, rtol=0.05) and abs(g2[2, 3]) < 1e-3
+    with pytest.raises(ValueError):
+        gh.density_correlations(samples, np.arange(20.0), n_bins=40)
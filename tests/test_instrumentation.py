@@ -0,0 +1,62 @@
+"""
+Pytest checks for the opt-in stage instrumentation.
+"""
+
+import json
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import instrumentation  # noqa: E402
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = instrumentation.Recorder()
+    with recorder.stage('setup', 'setup'):
+        pass
+    assert recorder.records == []
+
+
+def test_nested_stages_and_peak_memory(tmp_path):
+    recorder = instrumentation.Recorder(enabled=True, memory=True)
+
+    @recorder.timed('allocate', category='observables')
+    def allocate(n):
+        return np.ones(n).sum()
+
+    with recorder.stage('outer', 'solver', n=1):
+        allocate(1_000_000)  # 8 MB
+        with recorder.stage('inner', 'io'):
+            pass
+    recorder.disable()
+
+    by_name = {r['name']: r for r in recorder.records}
+    assert by_name['inner']['depth'] == 1 and by_name['outer']['depth'] == 0
+    assert by_name['allocate']['peak_bytes'] >= 8_000_000
+    assert by_name['outer']['peak_bytes'] >= by_name['allocate']['peak_bytes']
+    assert by_name['outer']['wall'] >= by_name['inner']['wall']
+
+    recorder.to_json(tmp_path / 'run.json')
+    recorder.to_chrome_trace(tmp_path / 'run.trace.json')
+    summary = json.loads((tmp_path / 'run.json').read_text())['summary']
+    assert summary['allocate']['calls'] == 1
+    events = json.loads((tmp_path / 'run.trace.json').read_text())['traceEvents']
+    assert {e['ph'] for e in events} == {'X'}
+    assert next(e for e in events if e['name'] == 'outer')['args']['n'] == 1
+
+
+def test_disable_leaves_foreign_tracemalloc_running():
+    tracemalloc.start()
+    try:
+        recorder = instrumentation.Recorder(enabled=True, memory=True)
+        recorder.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    recorder = instrumentation.Recorder(enabled=True, memory=True)
+    recorder.disable()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,232 @@
+"""
+Pytest checks for the Lindblad engine backends and the resource planner.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import lindblad_engine as le  # noqa: E402
+import run_planner as rp  # noqa: E402
+
+SIGMA_X = np.array([[0, 1], [1, 0]], dtype=complex)
+DEPHASE = np.diag([1.0, -1.0]).astype(complex)
+
+
+def mixed_model(n=3):
+    """Decay and dephasing on every qubit from a tilted product state"""
+    rng = np.random.default_rng(1)
+    jumps = [(q, le.DESTROY, 0.3 + 0.1 * q) for q in range(n)] + [(q, DEPHASE, 0.2) for q in range(n)]
+    psi0 = np.ones(1, dtype=complex)
+    for _ in range(n):
+        psi0 = np.kron(psi0, np.array([np.cos(0.4), np.sin(0.4)]))
+    return le.QubitLindbladModel(n, le.parity_energies(n) + 0.3 * rng.standard_normal(2 ** n), jumps, psi0)
+
+
+def test_exact_backends_agree_with_qutip():
+    qt = pytest.importorskip('qutip')
+    n = 3
+    model = mixed_model(n)
+    tlist = np.linspace(0, 2, 21)
+    H = qt.Qobj(np.diag(model.energies), dims=[[2] * n, [2] * n])
+    c_ops = [np.sqrt(rate) * qt.Qobj(model.full_operator(q, A).toarray(), dims=[[2] * n, [2] * n])
+             for q, A, rate in model.jumps]
+    psi0 = qt.Qobj(model.psi0.reshape(-1, 1), dims=[[2] * n, [1] * n])
+    ref = qt.mesolve(H, psi0, tlist, c_ops=c_ops, options={'atol': 1e-10, 'rtol': 1e-10})
+    ref_purity = np.array([(s * s).tr().real for s in ref.states])
+    for backend in ('dense', 'sparse', 'structured'):
+        run = le.evolve(model, tlist, backend=backend, store_states=True)
+        assert np.allclose(run['purity'], ref_purity, atol=1e-6)
+        assert np.allclose(run['final_state'], ref.states[-1].full(), atol=1e-6)
+        assert run['states'].shape == (len(tlist), 2 ** n, 2 ** n)
+
+
+def test_trajectories_match_density_matrix():
+    model = mixed_model(2)
+    tlist = np.linspace(0, 2, 11)
+    exact = le.evolve(model, tlist, backend='dense', entropy=True)
+    traj = le.evolve(model, tlist, backend='trajectory', n_trajectories=2000, seed=3, entropy=True)
+    assert traj['final_state'].shape == (2000, 4)
+    assert np.abs(traj['purity'] - exact['purity']).max() < 0.03
+    assert np.abs(traj['fidelity'] - exact['fidelity']).max() < 0.03
+    assert np.abs(traj['entropy'] - exact['entropy']).max() < 0.05
+
+
+def test_trajectories_without_diagonal_effective_hamiltonian():
+    tilted = np.array([[1, 1], [0, 0]], dtype=complex) / np.sqrt(2)
+    model = le.QubitLindbladModel(1, le.parity_energies(1), [(0, tilted, 0.5)])
+    assert model.diagonal_effective_hamiltonian() is None
+    tlist = np.linspace(0, 1, 6)
+    exact = le.evolve(model, tlist, backend='dense')
+    traj = le.evolve(model, tlist, backend='trajectory', n_trajectories=1500, seed=0)
+    assert np.abs(traj['fidelity'] - exact['fidelity']).max() < 0.03
+
+
+def test_duplicate_jumps_are_merged():
+    model = le.ethical_circuit_model(3)
+    assert len(model.jumps) == 3
+    assert np.allclose(model.apply(model.rho0), model.liouvillian(sparse=False).dot(model.rho0.ravel()).reshape(8, 8))
+
+
+def test_chunked_output_matches_single_block():
+    model = mixed_model(2)
+    tlist = np.linspace(0, 3, 40)
+    whole = le.evolve(model, tlist, backend='sparse')
+    d2 = rp.COMPLEX * model.dim ** 2
+    base = rp.estimate('sparse', 2, len(tlist), n_jumps=len(model.jumps), t_span=3,
+                       norm=model.norm_bound(), time_chunk=0)['memory']
+    chunked = le.evolve(model, tlist, backend='sparse', memory_budget=base + 7 * d2)
+    assert np.allclose(whole['purity'], chunked['purity'], atol=1e-10)
+    assert np.allclose(whole['final_state'], chunked['final_state'], atol=1e-10)
+
+
+def test_planner_prefers_cheap_exact_backends_and_refuses_oversized_runs():
+    small = rp.plan_evolution(2, 100, n_jumps=2, budget=2 ** 30)
+    assert small['backend'] in rp.EXACT_BACKENDS
+    large = rp.plan_evolution(14, 100, n_jumps=14, budget=2 * 2 ** 30)
+    assert large['backend'] == 'trajectory'
+    assert large['memory'] <= 2 * 2 ** 30
+    with pytest.raises(rp.ResourceBudgetError):
+        rp.plan_evolution(20, 100, budget=2 ** 30)
+    with pytest.raises(rp.ResourceBudgetError):
+        rp.check_budget('qutip', 12, 100, budget=2 ** 30)
+    with pytest.raises(rp.ResourceBudgetError):
+        le.evolve(le.ethical_circuit_model(4), np.linspace(0, 1, 5), backend='dense', memory_budget=10_000)
+    # Dropping stored states is tried before refusing
+    plan = rp.plan_evolution(7, 100, store_states=True, budget=2 ** 25, backends=('sparse',))
+    assert plan['store_states'] is False
+
+
+@pytest.fixture
+def propagator_caches(monkeypatch):
+    """Dense propagator caches created during a test, with their peak size"""
+    caches = []
+
+    class Recording(le._PropagatorCache):
+        def __init__(self, limit):
+            super().__init__(limit)
+            self.peak = 0
+            caches.append(self)
+
+        def get(self, key, build):
+            value = super().get(key, build)
+            self.peak = max(self.peak, len(self))
+            return value
+
+    monkeypatch.setattr(le, '_PropagatorCache', Recording)
+    return caches
+
+
+def test_dense_propagator_cache_stays_in_budget(propagator_caches):
+    caches = propagator_caches
+    model = le.ethical_circuit_model(3)
+    tlist = np.array([0, *np.geomspace(1e-3, 10, 30)])
+    planned = rp.estimate('dense', 3, len(tlist), n_jumps=len(model.jumps), t_span=10.0,
+                          norm=model.norm_bound())['memory']
+    # Room for two propagators beyond the planned one
+    budget = planned + 2.5 * 16 * model.dim ** 4
+    dense = le.evolve(model, tlist, backend='dense', memory_budget=budget)
+    sparse = le.evolve(model, tlist, backend='sparse')
+    assert np.allclose(dense['purity'], sparse['purity'], atol=1e-10)
+    assert caches[0].limit == 2 and caches[0].peak == 2 and caches[0].n_built == 30
+
+
+def test_budget_configuration(monkeypatch):
+    assert rp.parse_bytes('8G') == 8 * 2 ** 30
+    assert rp.parse_bytes('512mb') == 512 * 2 ** 20
+    assert rp.parse_bytes('1000') == 1000
+    monkeypatch.setenv('PQRG_MEMORY_BUDGET', '1.5G')
+    assert rp.memory_budget() == int(1.5 * 2 ** 30)
+    monkeypatch.setenv('PQRG_MAX_RUNTIME', '1e-9')
+    with pytest.raises(rp.ResourceBudgetError):
+        rp.plan_evolution(4, 100)
+
+
+def test_constant_and_periodic_drives():
+    model = mixed_model(2)
+    tlist = np.linspace(0, 3, 13)
+    drive = le.RateDrive(np.full((12, len(model.jumps)), 0.5), dt=0.3)
+    static = le.evolve(model.scaled([0.5] * len(model.jumps)), tlist, backend='dense')
+    for backend in le.DRIVEN_BACKENDS:
+        run = le.evolve(model, tlist, backend=backend, drive=drive)
+        assert np.allclose(run['purity'], static['purity'], atol=1e-10)
+    assert sum(h for _, h in drive.segments(0.1, 1.0)) == pytest.approx(0.9)
+    with pytest.raises(ValueError):
+        le.evolve(model, tlist, backend='trajectory', drive=drive)
+
+    # One sampled period repeated gives the same run as sampling the whole span
+    periodic_model, periodic = le.driven_ethical_model(2, 20, dt=0.05, scale=0.1)
+    assert periodic.periodic and periodic.n_bins == 160
+    func = lambda t: le.driven_ethical_rates(2, t, scale=0.1)  # noqa: E731
+    full = le.RateDrive.sample(func, 20, periodic.dt)
+    tlist = np.linspace(0, 20, 41)
+    a = le.evolve(periodic_model, tlist, backend='dense', drive=periodic)
+    b = le.evolve(periodic_model, tlist, backend='sparse', drive=full)
+    assert np.allclose(a['purity'], b['purity'], atol=1e-10)
+
+
+def test_dense_drive_builds_one_propagator_per_bin(propagator_caches):
+    model, drive = le.driven_ethical_model(2, 20, dt=0.05, scale=0.1)
+    assert drive.periodic
+    # Output times off the bin grid: the partial pieces must not get propagators of their own
+    tlist = np.linspace(0, 20, 37)
+    dense = le.evolve(model, tlist, backend='dense', drive=drive)
+    sparse = le.evolve(model, tlist, backend='sparse', drive=drive)
+    assert np.allclose(dense['purity'], sparse['purity'], atol=1e-10)
+    assert propagator_caches[0].n_built == drive.n_bins
+    # Each distinct bin costs a dense run one expm
+    one = rp.estimate('dense', 5, len(tlist), t_span=20)['runtime']
+    assert rp.estimate('dense', 5, len(tlist), t_span=20, n_propagators=160)['runtime'] > 100 * one
+
+
+def test_driven_rates_match_qutip():
+    qt = pytest.importorskip('qutip')
+    n = 2
+    tlist = np.linspace(0, 6, 31)
+    model, drive = le.driven_ethical_model(n, tlist[-1], dt=0.005, scale=0.1)
+    run = le.evolve(model, tlist, backend='sparse', drive=drive)
+    grid = np.linspace(0, tlist[-1], 3001)
+    rates = le.driven_ethical_rates(n, grid, scale=0.1)
+    c_ops = [qt.QobjEvo([qt.tensor([qt.destroy(2) if j == q else qt.qeye(2) for j in range(n)]),
+                         np.sqrt(rates[:, q])], tlist=grid) for q in range(n)]
+    H = qt.tensor([qt.sigmaz()] * n)
+    psi0 = qt.tensor([(qt.basis(2, 0) + qt.basis(2, 1)).unit()] * n)
+    ref = qt.mesolve(H, psi0, tlist, c_ops=c_ops, options={'atol': 1e-10, 'rtol': 1e-8})
+    ref_purity = np.array([(s * s).tr().real for s in ref.states])
+    assert np.abs(run['purity'] - ref_purity).max() < 1e-4
+
+
+def test_adaptive_run_stops_once_settled():
+    model = le.ethical_circuit_model(3, scale=1.0)
+    run = le.evolve_adaptive(model, 50, backend='sparse', tol=1e-2, window=1.0)
+    assert run['converged'] and run['t_converged'] < 50 and run['t'][-1] == run['t_converged']
+    # Outputs are exact states at the chosen times, and dense where purity moves
+    exact = le.evolve(model, run['t'], backend='dense')
+    assert np.allclose(run['purity'], exact['purity'], atol=1e-10)
+    steps = np.diff(run['t'])
+    assert steps.min() < steps.max() / 8
+    tail = run['t'] >= run['t'][-1] - 1.0
+    assert np.abs(run['purity'][tail] - run['purity'][-1]).max() <= 1e-2
+    # An unreachable target runs to t_max
+    missed = le.evolve_adaptive(model, 5, backend='dense', target=1 / le.PHI)
+    assert not missed['converged'] and missed['t'][-1] == pytest.approx(5)
+
+
+def test_adaptive_dense_cache_is_capped(propagator_caches):
+    model = le.ethical_circuit_model(2, scale=1.0)
+    reference = le.evolve_adaptive(model, 5, backend='sparse')
+    le.evolve_adaptive(model, 5, backend='dense', levels=4)
+    assert propagator_caches[-1].limit == 5   # levels + the truncated last step
+    planned = rp.estimate('dense', 2, 11, n_jumps=len(model.jumps), t_span=5,
+                          norm=model.norm_bound())['memory']
+    tight = le.evolve_adaptive(model, 5, backend='dense',
+                               memory_budget=planned + 1.5 * 16 * model.dim ** 4)
+    assert propagator_caches[-1].peak == 1
+    assert np.array_equal(tight['t'], reference['t'])
+    assert np.allclose(tight['purity'], reference['purity'], atol=1e-10)
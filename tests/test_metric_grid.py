@@ -0,0 +1,69 @@
+"""
+Pytest checks for the chunked metric-grid evaluator.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sympy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import derivation_cache as dc  # noqa: E402
+import metric_grid as mg  # noqa: E402
+
+T = np.linspace(0, 10, 7)
+R = np.linspace(0.1, 10, 5)
+OMEGA = np.linspace(0, 2 * np.pi, 6)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dc, 'DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
+    dc._COMPILED.clear()
+    yield
+    dc._COMPILED.clear()
+
+
+def test_grid_matches_symbolic_expression():
+    params = {'beta_any': 0.3, 'collapse_rate': 0.2}
+    terms = mg.evaluate_metric_grid(T, R, OMEGA, params=params, components=True, n_workers=1)
+    assert set(terms) == {'ds2', *mg.COMPONENTS}
+    assert np.allclose(sum(terms[c] for c in mg.COMPONENTS), terms['ds2'], rtol=1e-12)
+
+    kernel = dc.compile_derivation('ds2')
+    values = {**mg.DEFAULT_METRIC_PARAMS, **params}
+    for i, j, k in [(0, 0, 0), (3, 2, 1), (6, 4, 5)]:
+        point = {**values, 't': T[i], 'r': R[j], 'Omega': OMEGA[k]}
+        expected = float(kernel.expr.subs({s: point[str(s)] for s in kernel.args}))
+        assert terms['ds2'][i, j, k] == pytest.approx(expected, rel=1e-10)
+    with pytest.raises(KeyError):
+        mg.evaluate_metric_grid(T, R, OMEGA, params={'not_a_param': 1.0})
+
+
+def test_float32_tracks_float64():
+    double = mg.evaluate_metric_grid(T, R, OMEGA, dtype=np.float64, n_workers=1)
+    single = mg.evaluate_metric_grid(T, R, OMEGA, dtype=np.float32, n_workers=1)
+    assert double.dtype == np.float64 and single.dtype == np.float32
+    assert np.allclose(single, double, rtol=1e-5, atol=1e-5 * np.abs(double).max())
+    with pytest.raises(ValueError):
+        mg.evaluate_metric_grid(T, R, OMEGA, dtype=np.float16)
+
+
+def test_memmap_chunks_and_workers_agree(tmp_path):
+    reference = mg.evaluate_metric_grid(T, R, OMEGA, components=True, n_workers=1)
+    # 70 points per chunk is 2 of the 30-point t rows, so the last chunk is a single row
+    chunked = mg.evaluate_metric_grid(T, R, OMEGA, components=True, chunk_points=70, n_workers=3)
+    out_dir = str(tmp_path / 'grid')
+    mapped = mg.evaluate_metric_grid(T, R, OMEGA, components=True, out_dir=out_dir,
+                                     chunk_points=70, n_workers=2)
+    assert len(mg._chunk_bounds(T.size, R.size * OMEGA.size, 70)) == 4
+    for name, values in reference.items():
+        assert np.array_equal(chunked[name], values)
+        assert isinstance(mapped[name], np.memmap)
+        assert np.array_equal(mapped[name], values)
+        stored = 'ds2' if name == 'ds2' else f'ds2_{name}'
+        assert np.array_equal(np.load(os.path.join(out_dir, f'{stored}.npy')), values)
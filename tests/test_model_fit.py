@@ -0,0 +1,78 @@
+"""
+Pytest checks for the batched PQRG model fitter.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import model_fit  # noqa: E402
+
+
+@pytest.mark.parametrize('model', ['sigmoid', 'exp_relax', 'rhoa', 'coherence_boost'])
+def test_analytic_jacobians_match_finite_differences(model):
+    t = np.linspace(0, 10, 30)
+    theta = np.array([[1.2, 0.6, 4.5, 1.1, 0.05][:len(model_fit.MODEL_PARAMS[model])]])
+    _, jac = model_fit.MODELS[model](t, theta)
+    eps = 1e-6
+    for i in range(theta.shape[1]):
+        step = np.zeros_like(theta)
+        step[0, i] = eps
+        numeric = (model_fit.MODELS[model](t, theta + step)[0]
+                   - model_fit.MODELS[model](t, theta - step)[0]) / (2 * eps)
+        assert np.allclose(jac[0, :, i], numeric[0], atol=1e-7)
+
+
+def test_recovers_script_parameters_with_calibrated_errors():
+    rng = np.random.default_rng(2)
+    t = np.linspace(0, 10, 100)
+    true = np.array([1.0, 0.5, 5.0, 1.10, 0.05])
+    baseline, modified, eraser = np.split(model_fit.rhoa_model(t, true[None])[0], 3, axis=1)
+    channels, clean = model_fit.stack_channels('rhoa', eraser=eraser, baseline=baseline,
+                                               modified=modified)
+    assert channels == model_fit.MODEL_CHANNELS['rhoa']
+    y = clean + 0.01 * rng.standard_normal((2000, clean.shape[1]))
+    fit = model_fit.fit_curves('rhoa', t, y, chunk_size=500, n_workers=2)
+    assert fit['converged'].all()
+    assert np.allclose(np.median(fit['params'], axis=0), true, atol=2e-3)
+    pulls = (fit['params'] - true) / fit['stderr']
+    assert np.allclose(pulls.std(axis=0), 1.0, atol=0.1)
+
+
+def test_exp_relax_finds_phi_fixed_point():
+    t = np.linspace(0, 10, 50)
+    phi_inv = (np.sqrt(5) - 1) / 2
+    y = phi_inv + (1 - phi_inv) * np.exp(-0.5 * t)
+    fit = model_fit.fit_curves('exp_relax', t, y, n_workers=1)
+    assert np.allclose(fit['params'][0], [phi_inv, 1.0, 0.5], atol=1e-8)
+
+
+def test_coherence_boost_channels_from_csv_header():
+    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+    t, channels, y = model_fit.load_channels(os.path.join(data_dir, 'mt_dynamics_data.csv'), 'rhoa')
+    assert channels == ('baseline', 'modified') and y.shape == (1, 2 * t.size)
+    # Without an eraser channel retrocausal_diff is not determined
+    fit = model_fit.fit_curves('rhoa', t, y, n_workers=1, channels=channels)
+    assert fit['identified'][0].tolist() == [True, True, True, True, False]
+    assert np.isinf(fit['stderr'][0, 4]) and np.isfinite(fit['stderr'][0, :4]).all()
+
+    t, channels, y = model_fit.load_channels(os.path.join(data_dir, 'yB_coherence_boost.csv'),
+                                             'coherence_boost')
+    assert channels == ('baseline', 'boosted')
+    fit = model_fit.fit_curves('coherence_boost', t, y, n_workers=1, channels=channels)
+    assert np.allclose(fit['params'][0, [0, 1, 3]], [0.999999999, 0.999999999, 1e-9], atol=1e-12)
+    # Flat curves leave the relaxation rate free
+    assert fit['identified'][0].tolist() == [True, True, False, True]
+    assert np.isinf(fit['stderr'][0, 2])
+
+    # Decaying synthetic curves pin down all four parameters
+    true = np.array([0.618, 1.0, 0.5, 0.1])
+    clean = model_fit.coherence_boost_model(t, true[None])[0]
+    fit = model_fit.fit_curves('coherence_boost', t, clean, n_workers=1)
+    assert np.allclose(fit['params'][0], true, atol=1e-8) and fit['identified'].all()
+    with pytest.raises(ValueError):
+        model_fit.fit_curves('coherence_boost', t, clean, channels=('baseline',))
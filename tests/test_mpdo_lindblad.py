@@ -0,0 +1,84 @@
+"""
+Pytest checks for the matrix-product density-operator (MPDO) backend.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import lindblad_engine as le  # noqa: E402
+import mpdo_lindblad as ml  # noqa: E402
+import run_planner as rp  # noqa: E402
+
+DEPHASE = np.diag([1.0, -1.0]).astype(complex)
+
+
+def heterogeneous_model(n):
+    """Different decay and dephasing rates per qubit from a tilted product state"""
+    phis = [np.array([np.cos(0.2 + 0.1 * q), np.exp(0.3j * q) * np.sin(0.2 + 0.1 * q)]) for q in range(n)]
+    psi0 = np.ones(1, dtype=complex)
+    for phi in phis:
+        psi0 = np.kron(psi0, phi)
+    jumps = [(q, le.DESTROY, 0.2 + 0.3 * q) for q in range(n)] + [(q, DEPHASE, 0.05 * q) for q in range(n)]
+    return le.QubitLindbladModel(n, 0.8 * le.parity_energies(n), jumps, psi0)
+
+
+def test_mpdo_matches_exact_evolution():
+    n = 4
+    full = heterogeneous_model(n)
+    tlist = np.linspace(0, 3, 16)
+    reference = le.evolve(full, tlist, backend='dense', store_states=True)
+    model = ml.from_model(full)
+    assert np.isclose(model.coupling, 0.8)
+    run = ml.evolve_mpdo(model, tlist, dt=0.005)
+    assert np.abs(run['purity'] - reference['purity']).max() < 1e-4
+    assert np.abs(run['fidelity'] - reference['fidelity']).max() < 1e-4
+    assert np.allclose(ml.to_dense(run['final_state']), reference['states'][-1], atol=1e-4)
+    rho = reference['states'][-1].reshape((2,) * 2 * n)
+    first = np.einsum('abcdebcd->ae', rho)
+    assert np.allclose(run['single_qubit_rdms'][0], first, atol=1e-4)
+    assert np.all(run['truncation_error'] < 1e-10)
+
+
+def test_truncation_is_bounded_and_reported():
+    model = ml.ChainLindbladModel(12, [(q, le.DESTROY, 0.05 + 0.05 * q) for q in range(12)])
+    tlist = np.linspace(0, 4, 5)
+    loose = ml.evolve_mpdo(model, tlist, max_bond=2)
+    tight = ml.evolve_mpdo(model, tlist, max_bond=64)
+    assert loose['bond_dimension'].max() <= 2
+    assert loose['truncation_error'][1:].max() > 1e-6
+    assert tight['truncation_error'].max() < 1e-8
+    assert np.isclose(ml.mpdo_trace(loose['final_state']), 1.0)
+    assert np.allclose(np.trace(tight['single_qubit_rdms'], axis1=1, axis2=2), 1.0)
+    assert (rp.estimate('mpdo', 50, 100, max_bond=16)['memory']
+            < rp.estimate('mpdo', 50, 100, max_bond=64)['memory'])
+
+
+def test_chain_ethical_rates_and_structure_checks():
+    n = 5
+    damping = np.linspace(0.5, 1.5, n)
+    chain = ml.chain_ethical_model(n, damping=damping)
+    full = le.ethical_circuit_model(n, damping=damping)
+    assert np.allclose(chain.rates(), [rate for _, _, rate in sorted(full.jumps, key=lambda j: j[0])])
+    with pytest.raises(ValueError):
+        ml.from_model(le.QubitLindbladModel(2, np.array([1.0, 0.5, -1.0, 0.0]), []))
+    with pytest.raises(ValueError):
+        ml.from_model(le.QubitLindbladModel(2, le.parity_energies(2), [],
+                                            psi0=np.array([1, 0, 0, 1]) / np.sqrt(2)))
+
+
+def test_long_heterogeneous_chain():
+    n = 40
+    model = ml.chain_ethical_model(n, scale=0.1 * n / 2.0 ** n, damping=np.linspace(0.2, 2.0, n))
+    run = ml.evolve_mpdo(model, np.linspace(0, 1, 3), max_bond=16)
+    local = np.einsum('qij,qji->q', run['single_qubit_rdms'], run['single_qubit_rdms']).real
+    assert run['bond_dimension'].max() <= 16
+    assert np.all(run['purity'] <= 1 + 1e-9) and run['purity'][-1] < run['purity'][0]
+    # Weakly damped qubits stay purer
+    assert local[0] > local[-1]
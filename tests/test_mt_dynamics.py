@@ -0,0 +1,52 @@
+"""
+Pytest checks for the stochastic microtubule RhoA ensemble.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import mt_ensemble  # noqa: E402
+
+
+def test_multipliers_reproduce_script_factors():
+    modified, _ = mt_ensemble.rate_multipliers(4, 'modified')
+    eraser, _ = mt_ensemble.rate_multipliers(4, 'eraser')
+    assert np.allclose(modified, 1.10)
+    assert np.allclose(eraser, 1.10 * 0.95)
+    _, plv = mt_ensemble.rate_multipliers(20000, plv_concentration=50.0, rng=0)
+    assert plv.mean() == pytest.approx(mt_ensemble.PLV_REF, abs=0.01)
+
+
+def test_coherence_without_activation_is_exponential():
+    params = {'max_rate': 0.0}
+    run = mt_ensemble.simulate_ensemble(20000, params=params, t_max=200.0, dt=0.1, seed=3)
+    assert run['coherence_time'].mean() == pytest.approx(1 / mt_ensemble.DEFAULT_PARAMS['decay'], rel=0.03)
+
+
+@pytest.mark.parametrize('method', mt_ensemble.METHODS)
+def test_mean_activation_follows_rate_equation(method):
+    params = {'n_molecules': 1000}
+    times = [2.0, 6.0, 10.0]
+    run = mt_ensemble.simulate_ensemble(2000, 'baseline', t_max=10.0, dt=0.01, method=method,
+                                        params=params, record_times=times, seed=1)
+    # Forward-Euler reference of da/dt = k_on(t) (1 - a) - k_off a
+    a, dt, reference = 0.0, 1e-3, []
+    for step in range(10001):
+        if any(abs(step * dt - t) < dt / 2 for t in times):
+            reference.append(a)
+        a += (mt_ensemble.activation_rate(step * dt) * (1 - a) - 0.5 * a) * dt
+    assert np.allclose(run['active_mean'], reference, atol=0.01)
+
+
+def test_seeded_runs_independent_of_workers():
+    kwargs = dict(n_trajectories=3000, t_max=20.0, seed=7, chunk_size=1000)
+    one = mt_ensemble.simulate_ensemble(n_workers=1, **kwargs)
+    many = mt_ensemble.simulate_ensemble(n_workers=3, **kwargs)
+    assert np.array_equal(one['coherence_time'], many['coherence_time'])
+    summary = mt_ensemble.compare_conditions(3000, seed=7, t_max=50.0, n_bootstrap=200)
+    assert summary['modified']['ratio_ci'][0] > 1.0
@@ -0,0 +1,45 @@
+"""
+Pytest checks for the stable partition-function module.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'applications'))
+
+import partition_function as pf  # noqa: E402
+
+
+def test_matches_logsumexp_over_chunks(monkeypatch):
+    special = pytest.importorskip('scipy.special')
+    monkeypatch.setattr(pf, 'CHUNK_ELEMENTS', 1000)
+    rng = np.random.default_rng(0)
+    energies = rng.normal(0, 5, 12345)
+    degeneracies = rng.integers(1, 4, energies.size)
+    T = np.array([[0.05, 0.5], [5.0, 50.0]])
+    log_z = pf.log_partition_function(energies, T, degeneracies, k_B=1.0)
+    reference = [special.logsumexp(-energies / t, b=degeneracies) for t in T.ravel()]
+    assert log_z.shape == T.shape
+    assert np.allclose(log_z.ravel(), reference, rtol=1e-12)
+
+
+def test_two_level_thermodynamics():
+    spectrum = pf.ThermalSpectrum([0.0, 1.0], k_B=1.0)
+    T = 0.7
+    z = 1 + np.exp(-1 / T)
+    obs = spectrum.observables(T)
+    assert obs['log_z'] == pytest.approx(np.log(z))
+    assert obs['mean_energy'] == pytest.approx(np.exp(-1 / T) / z)
+    assert spectrum.free_energy(T) == pytest.approx(-T * np.log(z))
+    assert obs['heat_capacity'] == pytest.approx(np.exp(-1 / T) / (T * z) ** 2)
+
+
+def test_no_underflow_or_overflow_in_si_units():
+    energies = np.linspace(-1, 1, 16)  # joules at T = 1 K: beta E ~ 7e22
+    log_z = pf.log_partition_function(energies, 1.0)
+    assert np.isfinite(log_z)
+    assert log_z == pytest.approx(1 / pf.K_B)
+    assert pf.ethical_entropy(energies, 1.0) == pytest.approx(-1.0)
@@ -0,0 +1,74 @@
+"""
+Pytest checks for the reduced-precision mode.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import density_kernels as dk  # noqa: E402
+import precision as pr  # noqa: E402
+
+
+def test_checked_sweep_reports_error_and_falls_back():
+    points = np.linspace(0, 1, 50)
+
+    def func(x, precision='double'):
+        x = np.asarray(x, dtype=pr.real_dtype(precision))
+        # Error of 1e-3 injected in single precision
+        return x ** 2 + (1e-3 if precision == 'single' else 0.0)
+
+    values, report = pr.checked_sweep(func, points, tol=1e-2, n_sample=8, seed=0)
+    assert values.dtype == np.float32
+    assert report['precision'] == 'single' and not report['fallback']
+    assert np.isclose(report['max_abs_error'], 1e-3, rtol=1e-3)
+    assert len(report['indices']) == 8
+
+    values, report = pr.checked_sweep(func, points, tol=1e-4, n_sample=8, seed=0)
+    assert report['fallback'] and report['precision'] == 'double'
+    assert values.dtype == np.float64
+    with pytest.raises(ValueError):
+        pr.checked_sweep(func, points, precision='half')
+
+
+def test_kernels_stay_in_single_precision():
+    rng = np.random.default_rng(0)
+    kets = rng.standard_normal((4, 8)) + 1j * rng.standard_normal((4, 8))
+    kets /= np.linalg.norm(kets, axis=1, keepdims=True)
+    single = kets.astype(np.complex64)
+    assert dk.purity(single).dtype == np.float32
+    assert dk.von_neumann_entropy(single).dtype == np.float32
+    assert np.allclose(dk.von_neumann_entropy(single), dk.von_neumann_entropy(kets), atol=1e-5)
+
+
+def test_single_precision_evolution_matches_double():
+    pytest.importorskip('scipy')
+    import lindblad_engine as le
+    import run_planner as rp
+
+    model = le.ethical_circuit_model(3)
+    tlist = np.linspace(0, 2, 21)
+    for backend in ('dense', 'sparse', 'structured'):
+        double = le.evolve(model, tlist, backend=backend, store_states=True)
+        single = le.evolve(model, tlist, backend=backend, store_states=True, precision='single')
+        assert single['states'].dtype == np.complex64
+        assert np.abs(single['purity'] - double['purity']).max() < 1e-4
+    traj = le.evolve(model, tlist, backend='trajectory', precision='single', seed=0)
+    assert traj['final_state'].dtype == np.complex64
+    assert (rp.estimate('dense', 5, 10, precision='single')['memory']
+            < rp.estimate('dense', 5, 10)['memory'])
+
+
+def test_asymmetry_scan_in_single_precision():
+    pytest.importorskip('matplotlib')
+    pytest.importorskip('scipy')
+    from lhc_fibonacci_sim import t_violation_asymmetry
+
+    energies = np.linspace(0, 2, 1001)
+    values, report = pr.checked_sweep(t_violation_asymmetry, energies, tol=1e-5, seed=1)
+    assert values.dtype == np.float32 and not report['fallback']
+    assert np.allclose(values, t_violation_asymmetry(energies), atol=1e-5)
@@ -0,0 +1,60 @@
+"""
+Pytest checks for the psi-field lattice solver.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import psi_lattice as pl  # noqa: E402
+
+FREE = {'paradox_coupling': 0.0, 'drive_amplitude': 0.0, 'anyon_source': 0.0}
+
+
+@pytest.mark.parametrize('method', pl.METHODS)
+def test_free_standing_wave(method):
+    lattice = pl.PsiFieldLattice((64, 8), (2 * np.pi, 1.0), params=FREE, method=method)
+    x = lattice.x[0]
+    psi0 = np.cos(3 * x)[:, None] * np.ones(8)
+    run = lattice.run(psi0, t_final=5.0, n_snapshots=6)
+    # Stencil dispersion 2 sin(k dx / 2) / dx (spectral: k), then the exact leapfrog phase
+    dx, dt = lattice.spacing[0], lattice.dt
+    omega = 3.0 if method == 'spectral' else 2 * np.sin(1.5 * dx) / dx
+    omega = 2 / dt * np.arcsin(omega * dt / 2)
+    expected = np.cos(3 * x)[None, :] * np.cos(omega * run['t'])[:, None]
+    assert np.allclose(run['psi'][:, :, 0], expected, atol=1e-5)
+    assert np.ptp(run['energy']) / run['energy'][0] < 1e-2
+    with pytest.raises(ValueError):
+        pl.PsiFieldLattice((64,), (2 * np.pi,), method=method, dt=lattice.dt_max * 1.5)
+
+
+def test_methods_agree_and_rti_kick():
+    x = np.arange(128) * 2 * np.pi / 128
+    psi0 = 0.5 + 0.1 * np.sin(x)
+    finals = [pl.PsiFieldLattice((128,), (2 * np.pi,), method=method, dt=0.005).run(
+        psi0, 2.0, n_snapshots=2)['final_state'][0] for method in pl.METHODS]
+    assert np.allclose(finals[0], finals[1], atol=1e-3)
+    # The flux-form divergence keeps the mean of d psi / dt: only kicks and sources move it
+    params = {**FREE, 'paradox_coupling': 1.0, 'rti_amplitude': 0.3, 't_f': 0.5, 'anyon_source': 0.1}
+    lattice = pl.PsiFieldLattice((128,), (2 * np.pi,), params=params)
+    run = lattice.run(psi0, 1.0, n_snapshots=2)
+    assert np.isclose(run['final_state'][1].mean(), -0.6 - 0.1 * run['t'][-1])
+
+
+def test_slab_processes_match_single_process(tmp_path):
+    params = {'rti_amplitude': 0.3, 't_f': 0.5, 'pi_n': (1.0, 2.0)}
+    lattice = pl.PsiFieldLattice((30, 16), (6.0, 3.0), params=params)
+    psi0 = 0.5 + 0.1 * np.random.default_rng(0).standard_normal(lattice.shape)
+    single = lattice.run(psi0, 1.0, n_snapshots=4, n_workers=1)
+    slabs = lattice.run(psi0, 1.0, n_snapshots=4, n_workers=3, snapshot_stride=2, out_dir=str(tmp_path))
+    assert np.array_equal(single['final_state'][0], slabs['final_state'][0])
+    assert np.array_equal(single['final_state'][1], slabs['final_state'][1])
+    stored = np.load(str(tmp_path / 'psi.npy'))
+    assert stored.shape == (4, 15, 8)
+    assert np.allclose(stored, single['psi'][:, ::2, ::2])
@@ -0,0 +1,58 @@
+"""
+Pytest checks for the vectorized PQRG RG-flow integrator.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import rg_flow  # noqa: E402
+import rg_scan  # noqa: E402
+
+
+def test_fixed_points_are_zeros_of_beta_eff():
+    fixed = rg_flow.find_fixed_points()
+    assert np.allclose(rg_flow.beta_eff(fixed['g_star']), 0, atol=1e-12)
+    assert np.any(np.isclose(fixed['g_star'], 0.0, atol=1e-12))
+    # The non-trivial zero next to phi^{-1} repels the IR flow
+    near_phi = fixed['g_star'][np.abs(fixed['g_star'] - rg_flow.PHI_INV).argmin()]
+    assert abs(near_phi - rg_flow.PHI_INV) < 0.05
+    assert not fixed['ir_stable'][np.abs(fixed['g_star'] - rg_flow.PHI_INV).argmin()]
+
+
+def test_flows_match_scalar_reference():
+    scipy_integrate = pytest.importorskip('scipy.integrate')
+    g0 = np.array([-0.3, 0.1, 0.5, 0.9, 1.3])
+    t_eval = np.linspace(0, 20, 5)
+    flows = rg_flow.integrate_flows(g0, t_eval)['g']
+    for i, g in enumerate(g0):
+        ref = scipy_integrate.solve_ivp(lambda t, y: -rg_flow.beta_eff(y), (0, 20), [g],
+                                        t_eval=t_eval, rtol=1e-10, atol=1e-12)
+        assert np.allclose(flows[:, i], ref.y[0], atol=1e-6)
+
+
+@pytest.mark.parametrize('direction', ['ir', 'uv'])
+def test_monotone_basins_agree_with_integration(direction):
+    g0 = np.linspace(-0.5, 1.8, 2001)
+    integrated = rg_flow.basin_of_attraction(g0, direction=direction)
+    monotone = rg_flow.basin_of_attraction(g0, direction=direction, method='monotone')
+    assert np.array_equal(integrated['basin'], monotone['basin'])
+
+
+def test_map_scan_periods_and_phi_fixed_point(tmp_path):
+    r = np.array([rg_flow.PHI**2, 3.2, 3.5, 4.0])
+    scan = rg_scan.scan_logistic_map(r, x0=0.3, n_keep=4096, out_dir=str(tmp_path))
+    assert scan['period'][:3].tolist() == [1, 2, 4]
+    assert scan['periodic_point'][0] == pytest.approx(rg_flow.PHI_INV, abs=1e-10)
+    assert scan['lyapunov'][3] == pytest.approx(np.log(2), abs=0.05)
+    assert np.load(tmp_path / 'bifurcation.npy').shape == (4, 4096)
+
+
+def test_beta_zero_scan_matches_single_modulation():
+    zeros = rg_scan.scan_beta_zeros([rg_flow.MODULATION])
+    single = rg_flow.find_fixed_points(-2.5, 2.5)
+    assert np.allclose(np.sort(zeros['g_star']), single['g_star'], atol=1e-9)
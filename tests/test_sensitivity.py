@@ -0,0 +1,67 @@
+"""
+Pytest checks for the adjoint rate sensitivities and the parameter fit.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import lindblad_engine as le  # noqa: E402
+import sensitivity as se  # noqa: E402
+
+DEPHASE = np.diag([1.0, -1.0]).astype(complex)
+
+
+def finite_difference(model, tlist, name, j, eps=1e-6):
+    rates = np.array([rate for _, _, rate in model.jumps])
+    step = np.zeros(len(rates))
+    step[j] = eps / rates[j]
+    up = le.evolve(model.scaled(1 + step), tlist, backend='dense', entropy=True)[name][-1]
+    down = le.evolve(model.scaled(1 - step), tlist, backend='dense', entropy=True)[name][-1]
+    return (up - down) / (2 * eps)
+
+
+def test_rate_gradients_match_finite_differences():
+    n = 3
+    jumps = [(q, le.DESTROY, 0.3 + 0.2 * q) for q in range(n)] + [(1, DEPHASE, 0.4)]
+    model = le.QubitLindbladModel(n, 0.8 * le.parity_energies(n), jumps)
+    tlist = np.linspace(0, 2, 5)
+    for backend in ('dense', 'sparse'):
+        run = se.evolve_sensitivity(model, tlist, backend=backend)
+        assert run['backend'] == backend
+        for name in se.OBSERVABLES:
+            expected = [finite_difference(model, tlist, name, j) for j in range(len(jumps))]
+            assert np.allclose(run['rate_gradients'][name], expected, rtol=1e-5, atol=1e-8)
+
+
+def test_ethical_parameter_gradients():
+    tlist = np.linspace(0, 1, 3)
+    run = se.ethical_sensitivity(3, tlist, mu_c=0.5, observables=('purity',))
+    grads = run['gradients']['purity']
+    eps = 1e-6
+    up, down = (le.evolve(le.ethical_circuit_model(3, mu_c=0.5 + s), tlist, backend='dense')['purity'][-1]
+                for s in (eps, -eps))
+    assert np.isclose(grads['mu_c'], (up - down) / (2 * eps), rtol=1e-5)
+    # Every parameter multiplies every rate
+    scaled = [grads[key] * run['params'][key] for key in se.ETHICAL_PARAMS]
+    assert np.allclose(scaled, scaled[0])
+    with pytest.raises(ValueError):
+        se.evolve_sensitivity(le.ethical_circuit_model(2), tlist, observables=('coherence',))
+
+
+def test_fit_recovers_rate_scale():
+    t = np.linspace(0, 3, 16)
+    truth = le.evolve(le.ethical_circuit_model(3, mu_c=0.3, scale=1.0), t, backend='dense')
+    fit = se.fit_ethical_parameters(t, truth['purity'], n_qubits=3, fidelity=truth['fidelity'])
+    assert fit['success'] and np.isclose(fit['params']['mu_c'], 0.3, rtol=1e-4)
+    assert fit['rms'] < 1e-6
+    t, columns = se.load_purity_data()
+    assert len(t) == len(columns['purity']) and np.isclose(columns['purity'][0], 1.0)
+    with pytest.raises(ValueError):
+        se.fit_ethical_parameters(t, columns['purity'], free=('sigma',))
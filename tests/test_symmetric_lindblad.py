@@ -0,0 +1,78 @@
+"""
+Pytest checks for the permutation-symmetric Lindblad backend.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import lindblad_engine as le  # noqa: E402
+import symmetric_lindblad as sl  # noqa: E402
+
+DEPHASE = np.diag([1.0, -1.0]).astype(complex)
+
+
+def uniform_model(n, phi):
+    psi0 = np.ones(1, dtype=complex)
+    for _ in range(n):
+        psi0 = np.kron(psi0, phi)
+    jumps = [(q, le.DESTROY, 0.4) for q in range(n)] + [(q, DEPHASE, 0.1) for q in range(n)]
+    return le.QubitLindbladModel(n, 0.7 * le.parity_energies(n), jumps, psi0)
+
+
+def test_symmetric_basis_matches_full_evolution():
+    n = 3
+    phi = np.array([np.cos(0.3), np.exp(0.4j) * np.sin(0.3)])
+    full = uniform_model(n, phi)
+    tlist = np.linspace(0, 3, 31)
+    reference = le.evolve(full, tlist, backend='dense', store_states=True)
+    model = sl.from_model(full)
+    assert model.dim == 20
+    for method in ('expm', 'bdf'):
+        run = sl.evolve_symmetric(model, tlist, method=method)
+        assert np.allclose(run['purity'], reference['purity'], atol=1e-7)
+        assert np.allclose(run['fidelity'], reference['fidelity'], atol=1e-7)
+        assert np.allclose(model.trace(run['final_state']), 1.0)
+    rdm = reference['states'][-1].reshape(2, 4, 2, 4).trace(axis1=1, axis2=3)
+    assert np.allclose(run['single_qubit_rdm'], rdm, atol=1e-7)
+    # 'auto' detects the symmetry and picks the reduced backend
+    assert le.evolve(full, tlist)['backend'] == 'symmetric'
+
+
+def test_closed_form_ethical_rates():
+    _, S_q, N_r = le.pqrg_parameters()
+    n = 5
+    i = np.arange(2 ** n)
+    gamma = 10 * N_r * np.sin(np.pi * i / 2 ** n) * np.exp(S_q / le.PHI) * 0.85 * 0.92 * 0.71
+    assert np.allclose(sl.ethical_circuit_rates(n), [gamma[q::n].sum() for q in range(n)])
+
+
+def test_symmetry_detection_rejects_asymmetric_models():
+    with pytest.raises(sl.SymmetryError):
+        sl.symmetric_ethical_model(4)
+    with pytest.raises(sl.SymmetryError):
+        le.evolve(le.ethical_circuit_model(3), np.linspace(0, 1, 3), backend='symmetric')
+    skewed = le.QubitLindbladModel(2, le.parity_energies(2), [(0, le.DESTROY, 0.5)])
+    with pytest.raises(sl.SymmetryError):
+        sl.from_model(skewed)
+    entangled = le.QubitLindbladModel(2, le.parity_energies(2), [(q, le.DESTROY, 0.5) for q in range(2)],
+                                      psi0=np.array([1, 0, 0, 1]) / np.sqrt(2))
+    with pytest.raises(sl.SymmetryError):
+        sl.from_model(entangled)
+
+
+def test_large_symmetric_circuit_stays_physical():
+    model = sl.SymmetricLindbladModel(24, (-1.0) ** np.arange(25), [(le.DESTROY, 0.05)])
+    run = sl.evolve_symmetric(model, np.linspace(0, 10, 21))
+    assert np.isclose(model.trace(run['final_state']), 1.0)
+    assert np.all(run['purity'] <= 1 + 1e-9) and run['purity'].min() < 0.1
+    # Stiff ethical rates go through BDF
+    stiff = sl.symmetric_ethical_model(14)
+    run = sl.evolve_symmetric(stiff, np.linspace(0, 1, 5))
+    assert np.isclose(run['purity'][-1], 1.0, atol=1e-6)
@@ -0,0 +1,56 @@
+"""
+Pytest checks for the truncated-Wigner ensemble runner.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import gpe_horizon as gh  # noqa: E402
+import truncated_wigner as tw  # noqa: E402
+
+
+def test_accumulator_matches_covariance():
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal((300, 2, 5)) + np.arange(5)
+    acc = tw.CorrelationAccumulator((2, 5))
+    for part in np.split(samples, [7, 100, 211]):
+        acc.update(part)
+    assert acc.count == 300
+    assert np.allclose(acc.mean, samples.mean(axis=0))
+    for t in range(2):
+        assert np.allclose(acc.covariance[t], np.cov(samples[:, t].T, bias=True))
+
+
+def test_vacuum_statistics():
+    horizon = gh.SonicHorizon(256, 64.0, step_width=2.0)
+    kw = dict(t_final=0.03, n_snapshots=1, n_bins=16, n_healing=10.0, batch_size=500, n_workers=1)
+    coherent = tw.wigner_ensemble(horizon, 2000, vacuum='particle', **kw)
+    assert np.allclose(coherent['density'], 1, atol=0.02)
+    assert np.abs(coherent['g2']).max() < 5e-3
+    # Bogoliubov vacuum: depleted condensate with antibunched density
+    vacuum = tw.wigner_ensemble(horizon, 2000, **kw)
+    assert vacuum['density'].mean() > 1.01
+    assert np.diag(vacuum['g2'][0]).mean() < -5e-3
+    with pytest.raises(ValueError):
+        tw.wigner_noise(horizon, 2, vacuum='thermal')
+
+
+def test_ensemble_resumes_from_checkpoint(tmp_path):
+    horizon = gh.SonicHorizon(128, 64.0, step_width=2.0)
+    kw = dict(t_final=1.0, n_snapshots=3, n_bins=8, batch_size=2, seed=5, dt=0.05)
+    path = str(tmp_path / 'partial.npz')
+    first = tw.wigner_ensemble(horizon, 4, checkpoint=path, n_workers=1, **kw)
+    assert first['n_batches'] == 2 and first['n_realizations'] == 4
+    grown = tw.wigner_ensemble(horizon, 8, checkpoint=path, n_workers=1, **kw)
+    fresh = tw.wigner_ensemble(horizon, 8, n_workers=2, **kw)
+    assert grown['n_realizations'] == fresh['n_realizations'] == 8
+    assert np.allclose(grown['g2'], fresh['g2']) and np.allclose(grown['density'], fresh['density'])
+    with pytest.raises(ValueError):
+        tw.wigner_ensemble(horizon, 8, checkpoint=path, n_workers=1, **{**kw, 'seed': 6})
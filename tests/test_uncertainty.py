@@ -0,0 +1,59 @@
+"""
+Pytest checks for the Monte Carlo uncertainty engine.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulations'))
+
+import uncertainty as un  # noqa: E402
+
+
+def test_sobol_indices_of_additive_models():
+    inputs = {'x1': ('uniform', 0.0, 1.0), 'x2': ('uniform', 0.0, 1.0), 'c': ('fixed', 3.0)}
+    linear = un.propagate(lambda x: {'y': x['x1'] + 2 * x['x2'] + x['c']}, inputs, n_samples=400_000,
+                          chunk_size=100_000, n_sobol=400_000, sobol_scale='linear', n_workers=1)['y']
+    for indices in (linear['sobol_first'], linear['sobol_total']):
+        assert set(indices) == {'x1', 'x2'}
+        assert np.isclose(indices['x1'], 0.2, atol=0.01) and np.isclose(indices['x2'], 0.8, atol=0.01)
+    # ln(x1 x2^2) = ln x1 + 2 ln x2
+    inputs = {'x1': ('lognormal', 1.0, 1.0), 'x2': ('lognormal', 2.0, 1.0)}
+    product = un.propagate(lambda x: {'y': x['x1'] * x['x2'] ** 2}, inputs, n_samples=400_000,
+                           chunk_size=100_000, n_sobol=400_000, n_workers=1)['y']
+    assert np.isclose(product['sobol_total']['x2'], 0.8, atol=0.01)
+    with pytest.raises(ValueError):
+        un.propagate(lambda x: {'y': x['x1']}, inputs, sobol_scale='rank')
+
+
+def test_moments_quantiles_and_workers():
+    inputs = {'x': ('normal', 5.0, 2.0)}
+    kw = dict(n_samples=300_000, chunk_size=100_000, n_sobol=0, seed=3)
+    single = un.propagate(lambda x: {'y': x['x']}, inputs, n_workers=1, **kw)
+    threaded = un.propagate(lambda x: {'y': x['x']}, inputs, n_workers=3, **kw)
+    assert single['y']['quantiles'] == threaded['y']['quantiles']
+    y = single['y']
+    assert single['n_samples'] == 300_000
+    assert np.isclose(y['mean'], 5, atol=0.02) and np.isclose(y['std'], 2, rtol=0.01)
+    assert np.isclose(y['quantiles'][0.16], 5 - 2 * 0.9945, atol=0.03)
+    assert un.format_interval(y).startswith('4.99 [3.01, 6.98]')
+    with pytest.raises(ValueError):
+        un.sample_inputs({'x': ('cauchy', 0.0, 1.0)}, 10, 0)
+
+
+def test_theory_models_reproduce_point_values():
+    point = {name: spec[1] for name, spec in un.THEORY_INPUTS.items()}
+    point['k_B'] = 1.38e-23
+    alpha = un.alpha_model(point)
+    rho_hand = 1e-45 / (1.38e-23 * np.log(2))
+    assert np.isclose(alpha['rho_hand'], rho_hand)
+    assert np.isclose(alpha['f'], (0.71 / 2.51e-9) / rho_hand * 1.79776 / un.PHI)
+    density = un.density_model(point)
+    assert np.isclose(density['freq_shift'], 2 * rho_hand * 51 * 100 * 0.618 / un.PHI ** 3)
+    assert np.isclose(un.decoherence_model(point)['tau_decoherence'], 1e-13 / 0.71)
+    result = un.propagate(un.decoherence_model, un.theory_inputs('decoherence'), n_samples=200_000,
+                          chunk_size=100_000, n_sobol=100_000, n_workers=1)
+    assert np.isclose(result['tau_decoherence']['quantiles'][0.5], 1e-13 / 0.71, rtol=0.02)
@@ -4,9 +4,18 @@ PQRG Theory Validation Script
 Verifies all key calculations and predictions
 """
 
+import argparse
+import os
 import numpy as np
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulations'))
+from uncertainty import (alpha_model, decoherence_model, density_model, format_interval,  # noqa: E402
+                         propagate, theory_inputs)
+
+# Monte Carlo draws behind every error bar (0 prints point values only)
+UNCERTAINTY_SAMPLES = 10**7
+
 # ANSI color codes for output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -24,6 +33,22 @@ def print_result(test_name, passed, details=""):
     status = f"{GREEN}PASS{RESET}" if passed else f"{RED}FAIL{RESET}"
     print(f"{test_name:<40} [{status}] {details}")
 
+def propagate_uncertainty(model, name):
+    """Monte Carlo summaries of a model of simulations/uncertainty.py (None if disabled)"""
+    if not UNCERTAINTY_SAMPLES:
+        return None
+    return propagate(model, theory_inputs(name), n_samples=UNCERTAINTY_SAMPLES,
+                     chunk_size=min(UNCERTAINTY_SAMPLES, 10**6), n_sobol=min(UNCERTAINTY_SAMPLES, 10**6))
+
+def print_error_bar(mc, output):
+    """68% interval and dominant Sobol inputs of one output"""
+    if mc is None:
+        return
+    summary = mc[output]
+    ranked = sorted(summary['sobol_total'].items(), key=lambda item: -item[1])
+    drivers = ", ".join(f"{key} {value:.2f}" for key, value in ranked if value > 0.01)
+    print(f"{'':<40}  MC 68%: {format_interval(summary)} (total Sobol: {drivers})")
+
 def validate_golden_ratio():
     """Validate golden ratio calculations"""
     print_header("Golden Ratio Validation")
@@ -99,15 +124,19 @@ def validate_alpha_calculation():
     k_B = 1.38e-23      # Boltzmann constant
     S_q = 1.79776       # From Fibonacci sum
     
+    mc = propagate_uncertainty(alpha_model, 'alpha')
+    
     # Calculate retrocausal density
     rho_hand = epsilon_RTI / (k_B * np.log(2))
     test1 = abs(rho_hand - 1e-22) < 1e-23
     print_result("ρ_hand ≈ 10⁻²² bit⁻¹", test1, f"ρ_hand = {rho_hand:.2e}")
+    print_error_bar(mc, 'rho_hand')
     
     # Calculate f function
     f = (1 / (delta_a_mu / PLV_j)) * (1 / rho_hand) * (S_q / phi)
     test2 = abs(f - 137.036) < 0.1
     print_result("f ≈ 137.036", test2, f"f = {f:.3f}")
+    print_error_bar(mc, 'f')
     
     # Calculate alpha
     alpha = (1 / phi**3) * f
@@ -120,6 +149,7 @@ def validate_alpha_calculation():
     test3 = difference < 0.001
     print_result("1/α matches CODATA", test3, 
                  f"1/α = {alpha_inverse:.6f} (CODATA: {alpha_codata})")
+    print_error_bar(mc, 'alpha_inverse')
     
     # Print detailed comparison
     print(f"\n  {YELLOW}Detailed Comparison:{RESET}")
@@ -141,17 +171,21 @@ def validate_consciousness_density():
     PLV_j_target = 0.618  # φ^{-1}
     phi = (1 + np.sqrt(5)) / 2
     
+    mc = propagate_uncertainty(density_model, 'density')
+    
     # Calculate expected α shift
     delta_alpha_over_alpha = rho_hand_base * N_participants * V_chamber * PLV_j_target * (1/phi**3)
     
     test1 = abs(delta_alpha_over_alpha - 7.4e-8) < 1e-8
     print_result("Δα/α ≈ 7.4×10⁻⁸", test1, 
                  f"Δα/α = {delta_alpha_over_alpha:.2e}")
+    print_error_bar(mc, 'delta_alpha_over_alpha')
     
     # Calculate measurable frequency shift
     freq_shift = 2 * delta_alpha_over_alpha  # For atomic transitions
     test2 = abs(freq_shift - 1.5e-7) < 1e-8
     print_result("Δf/f ≈ 1.5×10⁻⁷", test2, f"Δf/f = {freq_shift:.2e}")
+    print_error_bar(mc, 'freq_shift')
     
     return all([test1, test2])
 
@@ -167,6 +201,7 @@ def validate_pqrg_predictions():
     test1 = abs(tau_modified - 1.41e-13) < 1e-14
     print_result("τ_decoherence ≈ 1.41×10⁻¹³ s", test1, 
                  f"τ = {tau_modified:.2e} s")
+    print_error_bar(propagate_uncertainty(decoherence_model, 'decoherence'), 'tau_decoherence')
     
     # Modified dispersion
     xi = 5.92e-10  # LIV parameter
@@ -182,6 +217,12 @@ def validate_pqrg_predictions():
 
 def main():
     """Run all validations"""
+    global UNCERTAINTY_SAMPLES
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=UNCERTAINTY_SAMPLES,
+                        help="Monte Carlo draws per error bar (0: point values only)")
+    UNCERTAINTY_SAMPLES = parser.parse_args().samples
+    
     print(f"\n{BOLD}PQRG Theory Validation Suite{RESET}")
     print(f"Testing all calculations and predictions...\n")
     